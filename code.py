@@ -1,40 +1,470 @@
 import board
 
 import displayio
+import bitmaptools
 import terminalio
 import time
 import rtc
-import adafruit_focaltouch
 import busio
 import microcontroller
 import gc
+import array
+from adafruit_bus_device.i2c_device import I2CDevice
 from adafruit_display_text import label
 from adafruit_bitmap_font import bitmap_font
 from adafruit_display_shapes.rect import Rect
 from adafruit_display_shapes.circle import Circle
 from adafruit_display_shapes.roundrect import RoundRect
 import json
+import os
 import storage
+import supervisor
+import struct
+
+boot_start = time.monotonic_ns()
+
+# Boot profile: boot_phase() closes the phase that just ran with its time and the heap left after
+# it, up to the first frame. Phases over their BOOT_BUDGET (ms) are flagged on serial, and the
+# last BOOT_KEEP profiles are kept on flash, or the SD card if flash is read-only.
+BOOT_BUDGET = {"log": 200, "i2c": 100, "display": 50, "font": 500, "chrome": 150, "clock_face": 1500, "pages": 100,
+               "settings": 200, "handlers": 100, "tasks": 100, "first_frame": 300, "total": 3000}
+BOOT_KEEP = 8
+BOOT_PATHS = ("/boot_profile.json", "/sd/boot_profile.json")
+boot_phases = []  # [name, ms, bytes free after]
+boot_mark = boot_start; boot_profile = None
+
+def boot_phase(name):
+    global boot_mark
+    now = time.monotonic_ns()
+    boot_phases.append([name, (now - boot_mark) // 1000000, gc.mem_free()])
+    boot_mark = now
+
+def boot_finish():
+    # Called as the first frame goes out; the profile is written later by boot_task
+    global boot_start, boot_profile
+    boot_phase("first_frame")
+    total = (boot_mark - boot_start) // 1000000
+    over = [p[0] for p in boot_phases if p[1] > BOOT_BUDGET.get(p[0], total)]
+    if total > BOOT_BUDGET["total"]: over.append("total")
+    boot_profile = {"at": time.time(), "ms": total, "phases": boot_phases, "over": over}
+    print("boot: {} ms to first frame, {} bytes free; {}".format(total, boot_phases[-1][2],
+          ", ".join("{} {}".format(p[0], p[1]) for p in boot_phases)))
+    for name in over:
+        ms = total if name == "total" else [p[1] for p in boot_phases if p[0] == name][0]
+        print("boot: {} took {} ms, budget {}".format(name, ms, BOOT_BUDGET[name]))
+    log_record(LOG_BOOT, len(over), len(boot_phases), total, boot_phases[-1][2])
+    boot_start = 0
+
+def boot_save():
+    for path in BOOT_PATHS:
+        try:
+            with open(path, "r") as f: profiles = json.load(f)
+        except (OSError, ValueError): profiles = []
+        profiles = profiles[-(BOOT_KEEP - 1):] + [boot_profile]
+        try:
+            with open(path, "w") as f: json.dump(profiles, f)
+            count_write(path); return True
+        except OSError: pass
+    print("boot: profile not saved")
+    return False
+
+# Stats: loop, touch-to-frame and I2C timings plus the heap go into fixed array rings, one slot
+# per sample. Timings come from supervisor.ticks_ms(), a small int, so taking a sample allocates
+# nothing; monotonic_ns() hands back a long int that does.
+STATS_SIZE, STATS_INTERVAL = 60, 1  # a minute of one-second samples while lit, one a minute dark
+STAT_FREE, STAT_ALLOC, STAT_LOOP, STAT_BUSY, STAT_TOUCH, STAT_I2C, STAT_FRAMES, STAT_FRAME_MS, STAT_SLOW = range(9)
+STATS_NAMES = ("free", "alloc", "loop_ms", "busy_ms", "touch_ms", "i2c_us", "frames", "frame_ms", "slow")  # frame_ms: the longest refresh
+TICKS_MASK = (1 << 29) - 1  # ticks_ms() wraps here
+stats_rings = [array.array("L", (0 for _ in range(STATS_SIZE))) for _ in STATS_NAMES]
+stats_acc = array.array("L", (0 for _ in STATS_NAMES))  # the sample being gathered
+stats_head = stats_count = 0
+stats_touch_at = -1  # ticks_ms() of a touch whose frame is not out yet
+stats_stream = False  # print every sample to serial as "S,n,free,alloc,..."
+stats_hud = False  # one-line overlay over every page
+stats_bus = False  # the status page lists the I2C devices instead of the system stats
+
+def ticks_since(t0):
+    return (supervisor.ticks_ms() - t0) & TICKS_MASK
+
+def stats_loop(t0):
+    ms = ticks_since(t0)
+    if ms > stats_acc[STAT_LOOP]: stats_acc[STAT_LOOP] = ms
+    stats_acc[STAT_BUSY] += ms
+
+def stats_sample():
+    # Closes the current sample into the rings; the stream line is printed from the ints, not built
+    global stats_head, stats_count
+    acc = stats_acc
+    acc[STAT_FREE] = gc.mem_free(); acc[STAT_ALLOC] = gc.mem_alloc()
+    for i in range(len(STATS_NAMES)): stats_rings[i][stats_head] = acc[i]
+    if stats_stream:
+        print("S", stats_count, acc[STAT_FREE], acc[STAT_ALLOC], acc[STAT_LOOP], acc[STAT_BUSY],
+              acc[STAT_TOUCH], acc[STAT_I2C], acc[STAT_FRAMES], acc[STAT_FRAME_MS], acc[STAT_SLOW], sep=",")
+    for i in range(len(STATS_NAMES)): acc[i] = 0
+    stats_head = (stats_head + 1) % STATS_SIZE; stats_count += 1
+
+def stats_last(stat):
+    return stats_rings[stat][(stats_head - 1) % STATS_SIZE]
+
+def stats_max(stat):
+    top, ring = 0, stats_rings[stat]
+    for i in range(min(stats_count, STATS_SIZE)):
+        if ring[i] > top: top = ring[i]
+    return top
+
+def stats_total(stat):
+    total, ring = 0, stats_rings[stat]
+    for i in range(min(stats_count, STATS_SIZE)): total += ring[i]
+    return total
+
+# SD logger: fixed 16-byte records (time, kind, a, b, c, d) gather in a one-sector RAM buffer and
+# go to /sd/log/YYYYMMDD.bin a whole sector at a time: when the buffer fills, or as the screen goes
+# dark once records have waited LOG_HOLD seconds (the rest of the sector is zero padding). At
+# midnight the day is closed into index.bin, a ring of one 16-byte entry per day that is itself
+# one sector, and the file LOG_DAYS back is deleted. tools/logdecode.py turns the files into CSV.
+LOG_DIR, LOG_INDEX = "/sd/log", "/sd/log/index.bin"
+LOG_SD_PINS = ("SD_SCK", "SD_MOSI", "SD_MISO", "SD_CS")  # board names; a board without them has no card
+LOG_FORMAT, LOG_RECORD, LOG_SECTOR = "<IBBHii", 16, 512
+LOG_INDEX_FORMAT = "<IHHHHI"  # day, sectors, records, flash writes, SD writes, steps
+LOG_DAYS = LOG_SECTOR // LOG_RECORD  # 32 days of files, and the index is one sector
+LOG_HOLD, LOG_BATTERY_EVERY = 900, 600
+LOG_BATTERY, LOG_STEPS, LOG_TIMER, LOG_BOOT, LOG_WRITES = 1, 2, 3, 4, 5  # kind 0 is padding
+log = {"dir": None, "day": 0, "len": 0, "since": 0, "records": 0, "sectors": 0, "battery_at": 0}
+log_buf = bytearray(LOG_SECTOR)
+log_index = bytearray(LOG_SECTOR)
+log_writes = array.array("L", (0, 0))  # today's flash and SD writes, from every writer in this file
+
+def count_write(path):
+    log_writes[path.startswith("/sd/")] += 1
+
+def log_path(day):
+    t = time.localtime(day * 86400)
+    return "{}/{:04d}{:02d}{:02d}.bin".format(LOG_DIR, t[0], t[1], t[2])
+
+def log_mount():
+    # Mounts the card unless boot.py already did; no card (or no pins) leaves logging off
+    try: storage.getmount("/sd")
+    except OSError:
+        try:
+            import sdcardio
+            sck, mosi, miso, cs = (getattr(board, name) for name in LOG_SD_PINS)
+            storage.mount(storage.VfsFat(sdcardio.SDCard(busio.SPI(sck, mosi, miso), cs)), "/sd")
+        except (ImportError, AttributeError, OSError, ValueError, RuntimeError) as e:
+            print("log: no SD card:", e); return False
+    try: os.mkdir(LOG_DIR)
+    except OSError: pass
+    log["dir"], log["day"] = LOG_DIR, time.time() // 86400
+    try:
+        with open(LOG_INDEX, "rb") as f: f.readinto(log_index)
+    except OSError: pass
+    try:
+        # Carry on today's file: count its sectors and the records in them
+        with open(log_path(log["day"]), "rb") as f:
+            while f.readinto(log_buf) == LOG_SECTOR:
+                log["sectors"] += 1
+                log["records"] += sum(1 for i in range(4, LOG_SECTOR, LOG_RECORD) if log_buf[i])
+    except OSError: pass
+    return True
+
+def log_record(kind, a=0, b=0, c=0, d=0):
+    if log["dir"] is None: return
+    t = time.time()
+    if t // 86400 != log["day"]: log_rollover(t // 86400)
+    if not log["len"]: log["since"] = t
+    struct.pack_into(LOG_FORMAT, log_buf, log["len"], t, kind, a, b, c, d)
+    log["len"] += LOG_RECORD; log["records"] += 1
+    if log["len"] == LOG_SECTOR: log_flush(True)
+
+def log_flush(force=False):
+    # One whole sector, padded; unforced, only once the oldest record has waited LOG_HOLD
+    n = log["len"]
+    if not n or log["dir"] is None or not force and time.time() - log["since"] < LOG_HOLD: return
+    for i in range(n, LOG_SECTOR): log_buf[i] = 0
+    path = log_path(log["day"])
+    try:
+        with open(path, "ab") as f: f.write(log_buf)
+    except OSError as e: print("log: not written:", e); return
+    count_write(path); log["sectors"] += 1; log["len"] = 0
+
+def log_rollover(day):
+    # Closes log["day"] into the index, drops the oldest file and starts day with its write counts
+    log_flush(True)
+    old, flash, sd = log["day"], log_writes[0], log_writes[1]
+    slot = 2 * (old % PEDO_DAYS)
+    steps = pedo_days[slot + 1] if pedo_days[slot] == old else 0
+    struct.pack_into(LOG_INDEX_FORMAT, log_index, (old % LOG_DAYS) * LOG_RECORD, old, log["sectors"], log["records"], flash, sd, steps)
+    try:
+        with open(LOG_INDEX, "wb") as f: f.write(log_index)
+        count_write(LOG_INDEX)
+    except OSError as e: print("log: index not written:", e)
+    try: os.remove(log_path(day - LOG_DAYS))
+    except OSError: pass
+    print("log: day {} closed, {} records, {} flash and {} SD writes".format(old, log["records"], flash, sd))
+    log["day"], log["records"], log["sectors"] = day, 0, 0
+    log_writes[0] = log_writes[1] = 0
+    log_record(LOG_WRITES, 0, 0, flash, sd)
+
+log_mount()
+boot_phase("log")
 
 # 1. Initialize I2C
-touch_i2c = busio.I2C(microcontroller.pin.GPIO40, microcontroller.pin.GPIO39)
-sensor_i2c = busio.I2C(microcontroller.pin.GPIO11, microcontroller.pin.GPIO10)
+# I2C bus manager: register reads for every device go through here. Queued reads whose registers
+# touch are merged into one burst into a shadow of the device's registers, so a read younger than
+# its TTL is answered without touching the bus, and each device counts its transactions and bus
+# time for the status page.
+i2c_buses = {"touch": busio.I2C(microcontroller.pin.GPIO40, microcontroller.pin.GPIO39),
+             "sensor": busio.I2C(microcontroller.pin.GPIO11, microcontroller.pin.GPIO10)}
+i2c_devices = {}  # (bus, addr) -> {"dev", "cmd", "regs", "stamps", "pending", "count", "ns"}
+I2C_PASS_TTL = 20  # ms: a register read again within one scheduler pass comes from the shadow
+
+def i2c_ms():
+    return (time.monotonic_ns() // 1000000) & 0xFFFFFFFF or 1  # 0 marks a register never read
+
+def i2c_device(bus, addr):
+    key = (bus, addr)
+    if key not in i2c_devices:
+        i2c_devices[key] = {"dev": I2CDevice(i2c_buses[bus], addr, probe=False), "cmd": bytearray(2),
+                            "regs": bytearray(256), "stamps": array.array("L", (0 for _ in range(256))),
+                            "pending": [], "count": 0, "ns": 0}
+    return i2c_devices[key]
+
+def i2c_fresh(d, reg, n, ttl):
+    if not ttl: return False
+    now, stamps = i2c_ms(), d["stamps"]
+    for r in range(reg, reg + n):
+        if not stamps[r] or (now - stamps[r]) & 0xFFFFFFFF > ttl: return False
+    return True
+
+def i2c_request(bus, addr, reg, n=1, ttl=0):
+    d = i2c_device(bus, addr)
+    if not i2c_fresh(d, reg, n, ttl): d["pending"].append((reg, n))
+
+def i2c_burst(d, start, end):
+    t0 = time.monotonic_ns()
+    try:
+        d["cmd"][0] = start
+        with d["dev"] as dev: dev.write_then_readinto(d["cmd"], d["regs"], out_end=1, in_start=start, in_end=end)
+    except: return False
+    now, stamps = i2c_ms(), d["stamps"]
+    for r in range(start, end): stamps[r] = now
+    ns = time.monotonic_ns() - t0
+    d["count"] += 1; d["ns"] += ns; stats_acc[STAT_I2C] += ns // 1000
+    return True
+
+def i2c_flush():
+    # Sorted pending ranges that touch or overlap go out as one burst; False if any read failed
+    ok = True
+    for d in i2c_devices.values():
+        pending = d["pending"]
+        if not pending: continue
+        pending.sort()
+        start, end = pending[0][0], pending[0][0] + pending[0][1]
+        for reg, n in pending[1:]:
+            if reg <= end: end = max(end, reg + n)
+            else: ok = i2c_burst(d, start, end) and ok; start, end = reg, reg + n
+        ok = i2c_burst(d, start, end) and ok
+        del pending[:]
+    return ok
+
+def i2c_read(bus, addr, reg, n=1, ttl=0):
+    # A failed read leaves the previous values in the shadow
+    i2c_request(bus, addr, reg, n, ttl); i2c_flush()
+    return memoryview(i2c_device(bus, addr)["regs"])[reg:reg + n]
+
+def i2c_read_into(bus, addr, reg, buf, n):
+    # Streams such as a FIFO bypass the shadow: the same register yields new data on every read
+    d = i2c_device(bus, addr)
+    t0 = time.monotonic_ns()
+    try:
+        d["cmd"][0] = reg
+        with d["dev"] as dev: dev.write_then_readinto(d["cmd"], buf, out_end=1, in_end=n)
+    except: return False
+    ns = time.monotonic_ns() - t0
+    d["count"] += 1; d["ns"] += ns; stats_acc[STAT_I2C] += ns // 1000
+    return True
+
+def i2c_write(bus, addr, reg, value):
+    d = i2c_device(bus, addr)
+    t0 = time.monotonic_ns()
+    try:
+        d["cmd"][0] = reg; d["cmd"][1] = value
+        with d["dev"] as dev: dev.write(d["cmd"])
+    except: return False
+    d["regs"][reg] = value; d["stamps"][reg] = i2c_ms()
+    ns = time.monotonic_ns() - t0
+    d["count"] += 1; d["ns"] += ns; stats_acc[STAT_I2C] += ns // 1000
+    return True
+
+# Power telemetry: each sample queues the AXP2101 status, VBAT ADC and fuel gauge registers in
+# one flush, smooths them, and keeps an hour of percentages for the time-to-empty estimate
+PMU_ADDR = 0x34
+POWER_INTERVAL, POWER_HISTORY = 30, 120
+power = {"percent": None, "mv": 0, "charging": False, "vbus": False}
+power_history = array.array("B", bytes(POWER_HISTORY)); power_head = power_count = 0
+
+def power_init():
+    # The VBAT ADC channel is off after reset; the gauge itself runs regardless
+    i2c_write("sensor", PMU_ADDR, 0x30, i2c_read("sensor", PMU_ADDR, 0x30)[0] | 0x01)
+
+def power_apply(regs):
+    # Takes the PMU register map, so a simulated one can be fed in directly
+    global power_head, power_count
+    pct, mv = min(100, regs[0xA4]), ((regs[0x34] & 0x3F) << 8) | regs[0x35]
+    if power["percent"] is None: power["percent"], power["mv"] = pct, mv
+    else:
+        power["percent"] += (pct - power["percent"]) / 4
+        power["mv"] += (mv - power["mv"]) // 4
+    power["charging"] = (regs[0x01] >> 5) & 0x03 == 0x01
+    power["vbus"] = bool(regs[0x00] & 0x20)
+    power_history[power_head] = int(power["percent"] + 0.5)
+    power_head = (power_head + 1) % POWER_HISTORY; power_count = min(POWER_HISTORY, power_count + 1)
+
+def power_sample():
+    # A failed read keeps the last reading instead of reporting an empty battery
+    i2c_request("sensor", PMU_ADDR, 0x00, 2); i2c_request("sensor", PMU_ADDR, 0x34, 2); i2c_request("sensor", PMU_ADDR, 0xA4)
+    if not i2c_flush(): return False
+    power_apply(i2c_device("sensor", PMU_ADDR)["regs"])
+    return True
+
+def battery_percent():
+    return 0 if power["percent"] is None else int(power["percent"] + 0.5)
+
+def power_time_to_empty():
+    # Seconds left at the rate the history ring has been falling, None while charging or level
+    if power["charging"] or power_count < 2: return None
+    newest = power_history[(power_head - 1) % POWER_HISTORY]
+    drop = power_history[(power_head - power_count) % POWER_HISTORY] - newest
+    if drop <= 0: return None
+    return newest * (power_count - 1) * POWER_INTERVAL // drop
+
+# Pedometer: the LIS3DH samples at 10 Hz into its 32-deep FIFO, which is drained in one burst every
+# PEDO_INTERVAL seconds. Steps are found by an integer filter and peak detector that allocates
+# nothing; days are a ring of (day number, steps) pairs written to flash once an hour.
+LIS_WHO_AM_I, LIS_CTRL1, LIS_CTRL4, LIS_CTRL5, LIS_OUT, LIS_FIFO_CTRL, LIS_FIFO_SRC = 0x0F, 0x20, 0x23, 0x24, 0x28, 0x2E, 0x2F
+PEDO_HZ, PEDO_INTERVAL = 10, 3  # 30 samples a drain, inside the FIFO's 32
+PEDO_RISE, PEDO_FALL = 120, 40  # mg over the moving baseline to arm a step, and under to land it
+PEDO_MIN_GAP, PEDO_MAX_GAP = 3, 20  # samples between steps: 0.3 s to 2 s
+PEDO_CONFIRM = 4  # steps in a row before any count, so waving an arm adds nothing
+PEDO_DAYS = 7
+PEDO_PATHS = ("/steps.bin", "/sd/steps.bin")
+pedo = {"addr": None, "base": -1, "smooth": 0, "armed": False, "gap": 0, "run": 0, "overruns": 0, "hour": 0, "dirty": False}
+pedo_raw = bytearray(32 * 6)  # one FIFO's worth of X/Y/Z, little-endian, left-justified 12 bit
+pedo_days = array.array("L", (0 for _ in range(2 * PEDO_DAYS)))  # [day, steps] per slot, slot = day % PEDO_DAYS
+
+def pedo_init():
+    # Either address strap; no LIS3DH leaves the pedometer off
+    for addr in (0x19, 0x18):
+        if i2c_read("sensor", addr, LIS_WHO_AM_I)[0] == 0x33: break
+    else: return False
+    for reg, value in ((LIS_CTRL1, 0x27), (LIS_CTRL4, 0x88), (LIS_CTRL5, 0x48), (LIS_FIFO_CTRL, 0x80)):
+        i2c_write("sensor", addr, reg, value)  # 10 Hz XYZ; +-2 g high-res, BDU; FIFO on, INT1 latched; stream mode
+    pedo["addr"] = addr; pedo["hour"] = time.time() // 3600
+    pedo_load()
+    return True
+
+def pedo_detect(raw, n):
+    # Steps credited from n samples; |x|+|y|+|z| stands in for the magnitude, so no sqrt or floats
+    p, credited = pedo, 0
+    base, smooth, armed, gap, run = p["base"], p["smooth"], p["armed"], p["gap"], p["run"]
+    for i in range(0, 6 * n, 6):
+        m = 0
+        for j in range(i, i + 6, 2):
+            v = raw[j] | raw[j + 1] << 8
+            if v & 0x8000: v -= 0x10000
+            m += (v if v >= 0 else -v) >> 4  # 1 mg per digit
+        if base < 0: base = m
+        base += (m - base) >> 4  # ~1.6 s baseline follows orientation changes
+        smooth += (m - base - smooth) >> 1
+        gap += 1
+        if gap > PEDO_MAX_GAP: run = 0
+        if not armed:
+            if smooth > PEDO_RISE: armed = True
+        elif smooth < PEDO_FALL:
+            armed = False
+            if gap >= PEDO_MIN_GAP:
+                run += 1; gap = 0
+                if run == PEDO_CONFIRM: credited += PEDO_CONFIRM
+                elif run > PEDO_CONFIRM: credited += 1
+    p["base"], p["smooth"], p["armed"], p["gap"], p["run"] = base, smooth, armed, gap, run
+    return credited
+
+def pedo_slot():
+    # Today's slot, cleared if it still holds the day PEDO_DAYS ago
+    day = time.time() // 86400
+    i = 2 * (day % PEDO_DAYS)
+    if pedo_days[i] != day: pedo_days[i], pedo_days[i + 1] = day, 0
+    return i
+
+def steps_today():
+    return pedo_days[pedo_slot() + 1]
+
+def pedo_load():
+    for path in PEDO_PATHS:
+        try:
+            with open(path, "rb") as f: f.readinto(pedo_days)
+            return
+        except OSError: pass
 
-def get_battery_percent():
-    if sensor_i2c.try_lock():
+def pedo_save():
+    for path in PEDO_PATHS:
         try:
-            sensor_i2c.writeto(0x34, bytes([0xA4]))
-            result = bytearray(1)
-            sensor_i2c.readfrom_into(0x34, result)
-            return max(0, min(100, result[0]))
-        except: return 0
-        finally: sensor_i2c.unlock()
-    return 0
+            with open(path, "wb") as f: f.write(pedo_days)
+            count_write(path); pedo["dirty"] = False; return True
+        except OSError: pass
+    return False
+
+def pedo_drain():
+    # Steps found in whatever the FIFO holds; an overrun means samples were lost, not miscounted
+    addr = pedo["addr"]
+    fifo = i2c_read("sensor", addr, LIS_FIFO_SRC, 1, I2C_PASS_TTL)
+    src = fifo[0]; n = src & 0x1F
+    if src & 0x40: pedo["overruns"] += 1; n = 32
+    if not n or not i2c_read_into("sensor", addr, LIS_OUT | 0x80, pedo_raw, 6 * n): return 0
+    fifo[0] = 0x20  # drained: a second look in the same pass sees it empty rather than reading it twice
+    steps = pedo_detect(pedo_raw, n)
+    if steps:
+        pedo_days[pedo_slot() + 1] += steps; pedo["dirty"] = True
+    return steps
+
+# Lift to wake: the LIS3DH's 6D engine raises INT1 as the watch turns face up and stays there for
+# the hold time, so the dark loop sleeps on that pin beside the touch one and never looks at the
+# samples itself. The line latches until INT1_SRC is read, which also re-arms it.
+LIS_CTRL3, LIS_INT1_CFG, LIS_INT1_SRC, LIS_INT1_THS, LIS_INT1_DURATION = 0x22, 0x30, 0x31, 0x32, 0x33
+LIS_INT = microcontroller.pin.GPIO14
+LIFT_LEVELS = (("OFF", 0, 0), ("LOW", 800, 3), ("MID", 650, 2), ("HIGH", 500, 1))  # name, face-up threshold (mg), hold (samples)
+
+def lift_apply(level):
+    # 6D movement into Z high only: turning face up fires, lying face up does not keep firing
+    addr = pedo["addr"]
+    if addr is None: return
+    name, mg, hold = LIFT_LEVELS[level]
+    i2c_write("sensor", addr, LIS_INT1_CFG, 0)  # off while the threshold changes
+    i2c_write("sensor", addr, LIS_INT1_THS, mg // 16); i2c_write("sensor", addr, LIS_INT1_DURATION, hold)  # 16 mg, 1/ODR steps
+    i2c_write("sensor", addr, LIS_CTRL3, 0x40 if mg else 0)  # IA1 on INT1
+    if mg: i2c_write("sensor", addr, LIS_INT1_CFG, 0x60)
+    lift_clear(0)
+
+def lift_armed():
+    return pedo["addr"] is not None and LIFT_LEVELS[settings["lift"]][1] > 0
+
+def lift_clear(ttl=I2C_PASS_TTL):
+    # True if the line had fired. Reading INT1_SRC clears IA, so the shadow is cleared to match and
+    # a second call in the same pass answers False off the bus; ttl=0 forces the read that re-arms
+    addr = pedo["addr"]
+    if addr is None: return False
+    src = i2c_read("sensor", addr, LIS_INT1_SRC, 1, ttl)
+    fired = bool(src[0] & 0x40); src[0] &= ~0x40
+    return fired
+
+power_init()
+pedo_init()
+boot_phase("i2c")
 
 # 2. Setup Display
 display = board.DISPLAY
 root_group = displayio.Group()
 display.root_group = root_group
+display.auto_refresh = False  # frames are pushed once per scheduler pass, see push_frame()
 
 bg_color = 0x05070A
 bg_palette = displayio.Palette(1)
@@ -45,164 +475,465 @@ ORANGE = 0xFF8C00
 DARK_GREEN = 0x006400
 GRAY = 0x808080
 
-try:
-    custom_font = bitmap_font.load_font("/fonts/scientificaBold-11.bdf")
-except:
-    custom_font = terminalio.FONT
-
+# Theme: widgets draw through a few shared palettes, so a colour change is a handful of palette writes
+theme_colors = {"text": ORANGE, "outline": DARK_GREEN}
+theme_palettes = {}  # (fill, outline, rounded) -> Palette
+theme_bindings = []  # (palette, index, role)
+
+def theme_bind(palette, index, role):
+    palette[index] = theme_colors[role]
+    theme_bindings.append((palette, index, role))
+
+def theme_palette(fill=None, outline=None, rounded=False):
+    # Rect: 0 fill, 1 outline. RoundRect/Circle: 0 clear, 1 outline, 2 fill. Roles are names, anything else a colour.
+    key = (fill, outline, rounded)
+    if key not in theme_palettes:
+        pal = displayio.Palette(3 if rounded else 2)
+        if rounded: pal.make_transparent(0)
+        for index, src in (((1, outline), (2, fill)) if rounded else ((0, fill), (1, outline))):
+            if src is None: pal.make_transparent(index)
+            elif src in theme_colors: theme_bind(pal, index, src)
+            else: pal[index] = src
+        theme_palettes[key] = pal
+    return theme_palettes[key]
+
+def themed(shape, fill=None, outline=None):
+    # Shapes are TileGrids, so they can draw through a shared palette; their own .fill/.outline setters stop applying
+    shape.pixel_shader = theme_palette(fill, outline, isinstance(shape, RoundRect))
+    return shape
+
+def themed_label(l, role="text"):
+    # Label keeps a private 2-entry palette and builds glyph TileGrids from it; point both at the shared one.
+    # This leans on Label's _palette and _local_group, so check it against a new adafruit_display_text.
+    # Never set .color on a themed label: it writes the shared palette and recolours every widget in
+    # the role (tools/sim.py fails a run that does). Use set_theme_color, or a plain Label.
+    l._palette = theme_palette(None, role)
+    for tg in l._local_group: tg.pixel_shader = l._palette
+    return l
+
+def set_theme_color(role, color):
+    theme_colors[role] = color
+    for pal, index, r in theme_bindings:
+        if r == role: pal[index] = color
+
+boot_phase("display")
+
+# The .pcf is a subset built by tools/fontsubset.py; the BDF stays as a fallback. Loading every
+# glyph up front moves the parse out of the first frame each character appears in.
+FONT_PATHS = ("/fonts/scientificaBold-11.pcf", "/fonts/scientificaBold-11.bdf")
+FONT_COMPARE = False  # True: boot also loads the fallback and prints its cost next to the one in use
+
+def load_font_timed(path):
+    # (font, ms, heap bytes) for one file with the UI glyphs loaded
+    gc.collect(); t0, free = time.monotonic_ns(), gc.mem_free()
+    font = bitmap_font.load_font(path); font.load_glyphs(range(32, 127))
+    return font, (time.monotonic_ns() - t0) // 1000000, free - gc.mem_free()
+
+custom_font = None
+for path in FONT_PATHS:
+    if custom_font is not None and not FONT_COMPARE: break
+    try: font, ms, used = load_font_timed(path)
+    except: continue
+    print("boot: font {} in {} ms, {} bytes{}".format(path, ms, used, "" if custom_font is None else " (not used)"))
+    if custom_font is None: custom_font = font
+    font = None
+if custom_font is None: custom_font = terminalio.FONT; print("boot: font built-in")
+gc.collect()
+boot_phase("font")
+
+
+# Chrome: one background, border, [X] and status strip shared by every page, instead of each page
+# carrying a 240x240 tile grid and outline. The background sits under the pages and the rest over
+# them; switching page only recolours the border and shows or hides the [X] and strip.
+chrome_bg = displayio.Group(scale=240)  # one 1x1 tile scaled up, not 57,600 tiles
+chrome_bg.append(displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette))
+pages_group = displayio.Group()
+chrome = displayio.Group()
+root_group.append(chrome_bg); root_group.append(pages_group); root_group.append(chrome)
+
+chrome_border = displayio.Palette(2)  # Rect fill index; recoloured per page by show_chrome()
+chrome_border[0] = DARK_GREEN; chrome_border.make_transparent(1)
+for x, y, w, h in ((0, 0, 240, 4), (0, 236, 240, 4), (0, 4, 4, 232), (236, 4, 4, 232)):
+    edge = Rect(x, y, w, h, fill=DARK_GREEN); edge.pixel_shader = chrome_border
+    chrome.append(edge)
+chrome_back = themed_label(label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223))
+chrome.append(chrome_back)
+status_bitmap = displayio.Bitmap(232, 2, 2)  # battery level along the top edge of every page but the clock
+status_strip = displayio.TileGrid(status_bitmap, pixel_shader=theme_palette(None, "text"), x=4, y=4)
+chrome.append(status_strip)
+hud_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=1, x=8, y=12))  # stats overlay, see show_hud()
+hud_label.hidden = True
+chrome.append(hud_label)
 
 main_group = displayio.Group()
-root_group.append(main_group)
-bg_sprite = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-main_group.append(bg_sprite)
-
-edge_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-main_group.append(edge_outline)
-
-
-
-timer_page = displayio.Group()
-timer_bg_sprite = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-timer_page.append(timer_bg_sprite)
-timer_outline = Rect(0, 0, 240, 240, fill=None, outline=0xFF0000, stroke=4)
-timer_page.append(timer_outline)
-timer_page.hidden = True
-root_group.append(timer_page)
-
-settings_page = displayio.Group()
-settings_bg_sprite = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-settings_page.append(settings_bg_sprite)
-settings_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-settings_page.append(settings_outline)
-
-# Settings UI - Arrow Controls
-# Labels (Enlarged and using custom font)
-text_label = label.Label(custom_font, text="TXT", color=0xFFFFFF, scale=3)
-text_label.anchor_point, text_label.anchored_position = (0.5, 0.0), (50, 8)
-outl_label = label.Label(custom_font, text="OUT", color=0xFFFFFF, scale=3)
-outl_label.anchor_point, outl_label.anchored_position = (0.5, 0.0), (125, 8)
-brgt_label = label.Label(custom_font, text="DIM", color=0xFFFFFF, scale=3)
-brgt_label.anchor_point, brgt_label.anchored_position = (0.5, 0.0), (200, 8)
-settings_page.append(text_label); settings_page.append(outl_label); settings_page.append(brgt_label)
-
-# Up Arrows (Moved down by 10 to y=50, scale reduced to 3)
-up_txt = label.Label(custom_font, text="^", color=ORANGE, scale=3, x=42, y=50)
-up_out = label.Label(custom_font, text="^", color=ORANGE, scale=3, x=117, y=50)
-up_brt = label.Label(custom_font, text="^", color=ORANGE, scale=3, x=192, y=50)
-settings_page.append(up_txt); settings_page.append(up_out); settings_page.append(up_brt)
-
-# Previews (Moved up to y=62)
-text_color_preview = Rect(30, 62, 40, 40, fill=ORANGE, outline=DARK_GREEN, stroke=2)
-outline_color_preview = Rect(105, 62, 40, 40, fill=DARK_GREEN, outline=DARK_GREEN, stroke=2)
-bright_preview = Rect(180, 62, 40, 40, fill=0xFFFFFF, outline=DARK_GREEN, stroke=2)
-settings_page.append(text_color_preview); settings_page.append(outline_color_preview); settings_page.append(bright_preview)
-
-# Down Arrows (Moved up by 10 to y=115, scale reduced to 3)
-dn_txt = label.Label(custom_font, text="v", color=ORANGE, scale=3, x=42, y=115)
-dn_out = label.Label(custom_font, text="v", color=ORANGE, scale=3, x=117, y=115)
-dn_brt = label.Label(custom_font, text="v", color=ORANGE, scale=3, x=192, y=115)
-settings_page.append(dn_txt); settings_page.append(dn_out); settings_page.append(dn_brt)
-
-# Return Area Indicator ([X] in bottom right, [SET] in bottom left)
-return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-settings_page.append(return_label)
-set_btn = label.Label(custom_font, text="[SET]", color=ORANGE, scale=3, x=10, y=215)
-settings_page.append(set_btn)
-
-settings_page.hidden = True
-root_group.append(settings_page)
-
-calendar_page = displayio.Group()
-calendar_bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-calendar_page.append(calendar_bg)
-calendar_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-calendar_page.append(calendar_outline)
-calendar_title = label.Label(terminalio.FONT, text="CALENDAR", color=ORANGE, scale=2, x=70, y=20)
-calendar_page.append(calendar_title)
-
-# Calendar Grid Setup
-days_header = ["M", "T", "W", "T", "F", "S", "S"]
-for i, d in enumerate(days_header):
-    l = label.Label(terminalio.FONT, text=d, color=GRAY, scale=1, x=25 + i*30, y=50)
-    calendar_page.append(l)
-
-cal_labels = []
-for row in range(6):
-    for col in range(7):
-        idx = row * 7 + col
-        l = label.Label(terminalio.FONT, text="", color=0xFFFFFF, scale=2, x=20 + col*30, y=85 + row*25)
-        calendar_page.append(l)
-        cal_labels.append(l)
-
-cal_highlight = Rect(15, 75, 25, 22, fill=None, outline=ORANGE, stroke=1)
-calendar_page.append(cal_highlight)
-cal_highlight.hidden = True
-
-# Calendar Return Icon [X]
-cal_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-calendar_page.append(cal_return_label)
+pages_group.append(main_group)
+boot_phase("chrome")
+
+
+
+# Outlined digits: every glyph is drawn once (ring, shadow, fill) into an indexed sprite sheet,
+# so a clock field is a single TileGrid and a tick only swaps tile indices.
+OUTLINE_CHARS = "0123456789:"  # contiguous from ord("0"), tile = ord(c) - 48
+OUTLINE_CLEAR, OUTLINE_RING, OUTLINE_SHADOW, OUTLINE_TEXT = 0, 1, 2, 3
+OUTLINE_LCAP, OUTLINE_RCAP = len(OUTLINE_CHARS), 2 * len(OUTLINE_CHARS)
+OUTLINE_OFFS = [(-1,0),(1,0),(0,-1),(0,1),(-1,-1),(1,1),(-1,1),(1,-1)]
+
+def glyph_pixels(glyph):
+    # terminalio glyphs share one tile sheet, BDF glyphs own their bitmap
+    cols = max(1, glyph.bitmap.width // max(1, glyph.width))
+    sx, sy = (glyph.tile_index % cols) * glyph.width, (glyph.tile_index // cols) * glyph.height
+    return [(gx, gy) for gy in range(glyph.height) for gx in range(glyph.width) if glyph.bitmap[sx + gx, sy + gy]]
+
+def build_outline_sheet(scale, ring=12, shadow=8):
+    # Tiles: [glyph cells][left ring caps][right ring caps]; caps carry the ring past the cell edges
+    glyphs = [custom_font.get_glyph(ord(c)) for c in OUTLINE_CHARS]
+    n, adv = len(glyphs), max(g.shift_x for g in glyphs) * scale
+    top, bottom = max(g.dy + g.height for g in glyphs), min(g.dy for g in glyphs)
+    th = (top - bottom) * scale + 2 * ring
+    palette = displayio.Palette(4)
+    palette[OUTLINE_SHADOW] = 0x000000
+    theme_bind(palette, OUTLINE_RING, "outline"); theme_bind(palette, OUTLINE_TEXT, "text")
+    palette.make_transparent(OUTLINE_CLEAR)
+    sheet = displayio.Bitmap(adv * n * (3 if ring else 1), th, 4)
+    scratch = displayio.Bitmap(adv + 2 * ring, th, 4)
+    for i, g in enumerate(glyphs):
+        bitmaptools.fill_region(scratch, 0, 0, scratch.width, th, OUTLINE_CLEAR)
+        pixels = glyph_pixels(g)
+        for dist, value in ((ring, OUTLINE_RING), (shadow, OUTLINE_SHADOW), (0, OUTLINE_TEXT)):
+            if value != OUTLINE_TEXT and not dist: continue
+            for gx, gy in pixels:
+                x0, y0 = ring + (g.dx + gx) * scale, ring + (top - g.dy - g.height + gy) * scale
+                for ox, oy in (OUTLINE_OFFS if dist else [(0, 0)]):
+                    x, y = x0 + ox * dist, y0 + oy * dist
+                    bitmaptools.fill_region(scratch, x, y, x + scale, y + scale, value)
+        bitmaptools.blit(sheet, scratch, i * adv, 0, x1=ring, y1=0, x2=ring + adv, y2=th)
+        if ring:
+            bitmaptools.blit(sheet, scratch, (OUTLINE_LCAP + i + 1) * adv - ring, 0, x1=0, y1=0, x2=ring, y2=th)
+            bitmaptools.blit(sheet, scratch, (OUTLINE_RCAP + i) * adv, 0, x1=ring + adv, y1=0, x2=2 * ring + adv, y2=th)
+    del scratch
+    return {"bitmap": sheet, "palette": palette, "glyphs": glyphs, "scale": scale, "adv": adv, "h": th, "ring": ring, "top": top}
+
+def create_outline_field(sheet, text, x, y, anchor=(0.5, 0.5)):
+    # Anchored on the same box a Label would use: pen origin to the last glyph's ink, ink top to bottom
+    caps = 1 if sheet["ring"] else 0
+    grid = displayio.TileGrid(sheet["bitmap"], pixel_shader=sheet["palette"], width=len(text) + 2 * caps, height=1,
+                              tile_width=sheet["adv"], tile_height=sheet["h"])
+    scale, used = sheet["scale"], [sheet["glyphs"][ord(c) - 48] for c in text]
+    last = used[-1]
+    box_w = (len(text) - 1) * sheet["adv"] + (last.dx + last.width) * scale
+    ink_top = sheet["ring"] + (sheet["top"] - max(g.dy + g.height for g in used)) * scale
+    ink_bot = sheet["ring"] + (sheet["top"] - min(g.dy for g in used)) * scale
+    grid.x = int(x - anchor[0] * box_w) - caps * sheet["adv"]
+    grid.y = int(y - ink_top - anchor[1] * (ink_bot - ink_top))
+    set_outline_field(grid, text)
+    return grid
+
+def set_outline_field(grid, text):
+    caps = 1 if grid.width > len(text) else 0
+    for i, c in enumerate(text): grid[caps + i] = ord(c) - 48
+    if caps: grid[0], grid[len(text) + 1] = OUTLINE_LCAP + ord(text[0]) - 48, OUTLINE_RCAP + ord(text[-1]) - 48
+
+def set_outline_digits(grid, value):
+    # Two-digit fields without building a string per tick
+    hi, lo = value // 10 % 10, value % 10
+    if grid.width == 4: grid[0], grid[1], grid[2], grid[3] = OUTLINE_LCAP + hi, hi, lo, OUTLINE_RCAP + lo
+    else: grid[0], grid[1] = hi, lo
+
+def update_all_colors():
+    set_theme_color("text", current_text_color)
+    set_theme_color("outline", current_outline_color)
+    show_chrome()
+
+# Main Clock UI
+digit_sheet = build_outline_sheet(9)
+sec_sheet = build_outline_sheet(6, ring=0, shadow=0)
+h_field = create_outline_field(digit_sheet, "00", 60, 88)
+c_field = create_outline_field(digit_sheet, ":", 129, 88)
+m_field = create_outline_field(digit_sheet, "00", 189, 88)
+
+# Seconds Container - Left side 2px closer to center (x=89), width reduced (w=64) to keep right edge fixed
+sec_bg_x, sec_bg_y, sec_bg_w, sec_bg_h = 89, 138, 64, 48
+sec_rect = themed(Rect(sec_bg_x, sec_bg_y, sec_bg_w, sec_bg_h, fill=0x000000, outline=DARK_GREEN, stroke=4), fill=0x000000, outline="outline")
+s_field = create_outline_field(sec_sheet, "00", 123, 162)
+
+main_group.append(h_field); main_group.append(c_field); main_group.append(m_field)
+main_group.append(sec_rect); main_group.append(s_field)
+
+# Steps today, left of the seconds box; hidden without a pedometer
+steps_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=2))
+steps_label.anchor_point, steps_label.anchored_position = (0.0, 0.5), (10, 162)
+steps_label.hidden = pedo["addr"] is None
+main_group.append(steps_label)
+
+
+
+days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+date_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=3))
+date_label.anchor_point, date_label.anchored_position = (0.0, 1.0), (8, 231)
+main_group.append(date_label)
+
+date_num_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=3))
+date_num_label.anchor_point, date_num_label.anchored_position = (0.5, 1.0), (120, 233)
+main_group.append(date_num_label)
+
+
+
+bar_w, bar_h, bar_x, bar_y = 12, 30, 221, 202
+batt_group = displayio.Group()
+batt_outline = themed(Rect(bar_x, bar_y, bar_w, bar_h, fill=None, outline=ORANGE, stroke=1), outline="text")
+batt_tip = themed(Rect(bar_x + 3, bar_y - 2, 6, 2, fill=ORANGE), fill="text")
+# The fill is a fixed bitmap redrawn in place, so a new level never allocates
+batt_fill_bitmap = displayio.Bitmap(bar_w - 4, bar_h - 4, 2); batt_fill_h = 0
+batt_fill = displayio.TileGrid(batt_fill_bitmap, pixel_shader=theme_palette(None, "text"), x=bar_x + 2, y=bar_y + 2)
+batt_group.append(batt_outline); batt_group.append(batt_tip); batt_group.append(batt_fill)
+main_group.append(batt_group)
+
+def show_battery(percent):
+    global batt_fill_h
+    w = percent * 232 // 100
+    bitmaptools.fill_region(status_bitmap, 0, 0, 232, 2, 0)
+    if w: bitmaptools.fill_region(status_bitmap, 0, 0, w, 2, 1)
+    h = max(1, percent * (bar_h - 4) // 100)
+    if h == batt_fill_h: return
+    if h < bar_h - 4: bitmaptools.fill_region(batt_fill_bitmap, 0, 0, bar_w - 4, bar_h - 4 - h, 0)
+    bitmaptools.fill_region(batt_fill_bitmap, 0, bar_h - 4 - h, bar_w - 4, bar_h - 4, 1)
+    batt_fill_h = h; request_frame()
+
+boot_phase("clock_face")
+
+# Page builders: each returns its Group and publishes only what the handlers touch as globals
+def build_timer_page():
+    global t_m_field, t_s_field, t_lap_label
+    timer_page = displayio.Group()
+
+    t_m_field = create_outline_field(digit_sheet, "00", 60, 88)
+    t_c_field = create_outline_field(digit_sheet, ":", 129, 88)
+    t_s_field = create_outline_field(digit_sheet, "00", 189, 88)
+    timer_page.append(t_m_field); timer_page.append(t_c_field); timer_page.append(t_s_field)
+
+    up_m = themed_label(label.Label(custom_font, text="^", color=ORANGE, scale=3, x=52, y=29))
+    dn_m = themed_label(label.Label(custom_font, text="v", color=ORANGE, scale=3, x=52, y=142))
+    up_s = themed_label(label.Label(custom_font, text="^", color=ORANGE, scale=3, x=172, y=29))
+    dn_s = themed_label(label.Label(custom_font, text="v", color=ORANGE, scale=3, x=172, y=142))
+    timer_page.append(up_m); timer_page.append(dn_m); timer_page.append(up_s); timer_page.append(dn_s)
+
+    # Timer Arrow Outlines
+    up_m_box = themed(Rect(0, 4, 120, 40, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    dn_m_box = themed(Rect(0, 132, 120, 40, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    up_s_box = themed(Rect(120, 4, 120, 40, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    dn_s_box = themed(Rect(120, 132, 120, 40, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    timer_page.append(up_m_box); timer_page.append(dn_m_box); timer_page.append(up_s_box); timer_page.append(dn_s_box)
+
+    # Timer Mode Buttons (+, -, R) - MASSIVE (63x63) touching
+    t_minus_box = themed(Rect(5, 172, 63, 63, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    t_minus_btn = themed_label(label.Label(custom_font, text="-", color=ORANGE, scale=3, x=36, y=203))
+    t_plus_box = themed(Rect(68, 172, 63, 63, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    t_plus_btn = themed_label(label.Label(custom_font, text="+", color=ORANGE, scale=3, x=99, y=203))
+    t_reset_box = themed(Rect(131, 172, 63, 63, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    t_reset_btn = themed_label(label.Label(custom_font, text="R", color=ORANGE, scale=3, x=162, y=203))
+    timer_page.append(t_minus_box); timer_page.append(t_minus_btn)
+    timer_page.append(t_plus_box); timer_page.append(t_plus_btn)
+    timer_page.append(t_reset_box); timer_page.append(t_reset_btn)
+    t_lap_label = themed_label(label.Label(custom_font, text="", color=ORANGE, x=200, y=184))
+    timer_page.append(t_lap_label)
+    return timer_page
+
+t_m_field = t_s_field = t_lap_label = None
+
+# Timer engine: timers hold absolute monotonic_ns start/deadline values and everything shown is
+# derived from them, so loop jitter never accumulates. Countdowns are named and run side by side.
+NS = 1000000000
+MAX_LAPS = 10
+stopwatch = {"start": None, "acc": 0, "laps": []}  # start is None while stopped
+countdowns = {}  # name -> {"deadline": ns while running else None, "left": ns while paused}
+
+def sw_elapsed(now=None):
+    if stopwatch["start"] is None: return stopwatch["acc"]
+    return stopwatch["acc"] + (now or time.monotonic_ns()) - stopwatch["start"]
+
+def sw_start():
+    if stopwatch["start"] is None: stopwatch["start"] = time.monotonic_ns()
+
+def sw_stop():
+    if stopwatch["start"] is not None: stopwatch["acc"] = sw_elapsed(); stopwatch["start"] = None
+
+def sw_lap():
+    laps = stopwatch["laps"]
+    laps.append(sw_elapsed())
+    if len(laps) > MAX_LAPS: laps.pop(0)
+
+def sw_reset(elapsed=0):
+    if stopwatch["acc"] and stopwatch["start"] is None: log_record(LOG_TIMER, 0, 0, stopwatch["acc"] // NS, len(stopwatch["laps"]))
+    stopwatch["start"] = None; stopwatch["acc"] = elapsed; stopwatch["laps"] = []
+
+def cd_set(name, seconds):
+    countdowns[name] = {"deadline": None, "left": seconds * NS, "total": seconds}
+
+def cd_start(name):
+    cd = countdowns.get(name)
+    if cd and cd["deadline"] is None and cd["left"] > 0: cd["deadline"] = time.monotonic_ns() + cd["left"]
+
+def cd_pause(name):
+    cd = countdowns.get(name)
+    if cd and cd["deadline"] is not None: cd["left"] = max(0, cd["deadline"] - time.monotonic_ns()); cd["deadline"] = None
+
+def cd_left(name, now=None):
+    cd = countdowns.get(name)
+    if not cd: return 0
+    if cd["deadline"] is None: return cd["left"]
+    return max(0, cd["deadline"] - (now or time.monotonic_ns()))
+
+def cd_running(name):
+    cd = countdowns.get(name)
+    return bool(cd) and cd["deadline"] is not None
+
+def timers_running():
+    return stopwatch["start"] is not None or any(cd["deadline"] is not None for cd in countdowns.values())
+
+def timer_shown(now=None):
+    # Countdowns round up so "00:01" is on screen for the last second, the stopwatch rounds down
+    if timer_direction == -1: secs = (cd_left("timer", now) + NS - 1) // NS
+    else: secs = sw_elapsed(now) // NS
+    return secs // 60 % 100, secs % 60
+
+def show_timer(now=None):
+    # The timers keep running while the page is closed or evicted
+    if t_m_field is not None:
+        m, s = timer_shown(now)
+        set_outline_digits(t_m_field, m); set_outline_digits(t_s_field, s); request_frame()
+        laps = stopwatch["laps"]
+        if timer_direction == 1 and laps:
+            split = (laps[-1] - (laps[-2] if len(laps) > 1 else 0)) // NS
+            t_lap_label.text = "L{}\n{:02d}:{:02d}".format(len(laps), split // 60 % 100, split % 60)
+        else: t_lap_label.text = ""
+
+def build_settings_page():
+    global text_color_preview, outline_color_preview, bright_preview, sec_mode_label, lift_label
+    settings_page = displayio.Group()
+
+    # Settings UI - Arrow Controls
+    # Labels (Enlarged and using custom font)
+    text_label = label.Label(custom_font, text="TXT", color=0xFFFFFF, scale=3)
+    text_label.anchor_point, text_label.anchored_position = (0.5, 0.0), (50, 8)
+    outl_label = label.Label(custom_font, text="OUT", color=0xFFFFFF, scale=3)
+    outl_label.anchor_point, outl_label.anchored_position = (0.5, 0.0), (125, 8)
+    brgt_label = label.Label(custom_font, text="DIM", color=0xFFFFFF, scale=3)
+    brgt_label.anchor_point, brgt_label.anchored_position = (0.5, 0.0), (200, 8)
+    settings_page.append(text_label); settings_page.append(outl_label); settings_page.append(brgt_label)
+
+    # Up Arrows (Moved down by 10 to y=50, scale reduced to 3)
+    up_txt = themed_label(label.Label(custom_font, text="^", color=ORANGE, scale=3, x=42, y=50))
+    up_out = themed_label(label.Label(custom_font, text="^", color=ORANGE, scale=3, x=117, y=50))
+    up_brt = themed_label(label.Label(custom_font, text="^", color=ORANGE, scale=3, x=192, y=50))
+    settings_page.append(up_txt); settings_page.append(up_out); settings_page.append(up_brt)
+
+    # Previews (Moved up to y=62)
+    text_color_preview = Rect(30, 62, 40, 40, fill=ORANGE, outline=DARK_GREEN, stroke=2)
+    outline_color_preview = Rect(105, 62, 40, 40, fill=DARK_GREEN, outline=DARK_GREEN, stroke=2)
+    bright_preview = Rect(180, 62, 40, 40, fill=0xFFFFFF, outline=DARK_GREEN, stroke=2)
+    settings_page.append(text_color_preview); settings_page.append(outline_color_preview); settings_page.append(bright_preview)
+
+    # Down Arrows (Moved up by 10 to y=115, scale reduced to 3)
+    dn_txt = themed_label(label.Label(custom_font, text="v", color=ORANGE, scale=3, x=42, y=115))
+    dn_out = themed_label(label.Label(custom_font, text="v", color=ORANGE, scale=3, x=117, y=115))
+    dn_brt = themed_label(label.Label(custom_font, text="v", color=ORANGE, scale=3, x=192, y=115))
+    settings_page.append(dn_txt); settings_page.append(dn_out); settings_page.append(dn_brt)
+
+    # Lift-to-wake sensitivity, cycled by a tap; hidden without the accelerometer
+    lift_label = themed_label(label.Label(custom_font, text="LIFT " + LIFT_LEVELS[settings["lift"]][0], color=ORANGE, scale=2))
+    lift_label.anchor_point, lift_label.anchored_position = (0.5, 0.5), (120, 160)
+    lift_label.hidden = pedo["addr"] is None
+    settings_page.append(lift_label)
+
+    # [SET] in bottom left; the [X] comes from the chrome
+    settings_page.append(themed_label(label.Label(custom_font, text="[SET]", color=ORANGE, scale=3, x=10, y=215)))
+    sec_mode_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=3, x=95, y=215))
+    settings_page.append(sec_mode_label)
+    return settings_page
+
+def show_previews():
+    # Previews carry their own fill, so they are refreshed rather than themed
+    b_val = int(current_brightness * 255)
+    text_color_preview.fill = current_text_color
+    outline_color_preview.fill = current_outline_color
+    bright_preview.fill = (b_val << 16) | (b_val << 8) | b_val
+    for preview in (text_color_preview, outline_color_preview, bright_preview): preview.outline = current_outline_color
+    sec_mode_label.text = "[SEC]" if settings["seconds"] else "[MIN]"
+
+def build_calendar_page():
+    global calendar_title, cal_labels, cal_highlight, cal_shown
+    calendar_page = displayio.Group()
+    calendar_title = themed_label(label.Label(terminalio.FONT, text="CALENDAR", color=ORANGE, scale=2, x=70, y=20))
+    calendar_page.append(calendar_title)
+
+    # Calendar Grid Setup
+    for i, d in enumerate(["M", "T", "W", "T", "F", "S", "S"]):
+        calendar_page.append(label.Label(terminalio.FONT, text=d, color=GRAY, scale=1, x=25 + i*30, y=50))
+
+    cal_labels = []
+    for row in range(6):
+        for col in range(7):
+            l = label.Label(terminalio.FONT, text="", color=0xFFFFFF, scale=2, x=20 + col*30, y=85 + row*25)
+            calendar_page.append(l)
+            cal_labels.append(l)
+    cal_shown = [""] * 42
+
+    cal_highlight = themed(Rect(15, 75, 25, 22, fill=None, outline=ORANGE, stroke=1), outline="text")
+    calendar_page.append(cal_highlight)
+    cal_highlight.hidden = True
+
+    # Calendar Month Navigation Arrows
+    cal_prev_month = themed_label(label.Label(custom_font, text="<", color=ORANGE, scale=2, x=35, y=20))
+    cal_next_month = themed_label(label.Label(custom_font, text=">", color=ORANGE, scale=2, x=190, y=20))
+    cal_prev_box = themed(Rect(25, 10, 40, 25, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    cal_next_box = themed(Rect(175, 10, 40, 25, fill=None, outline=DARK_GREEN, stroke=1), outline="outline")
+    calendar_page.append(cal_prev_month); calendar_page.append(cal_next_month)
+    calendar_page.append(cal_prev_box); calendar_page.append(cal_next_box)
+    return calendar_page
+
+def enter_calendar():
+    global cal_view_year, cal_view_month
+    curr_t = time.localtime()
+    cal_view_year, cal_view_month = curr_t.tm_year, curr_t.tm_mon
+    update_calendar()
 
 # Extra Page UI (3x3 Grid)
-extra_page = displayio.Group()
-extra_bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-extra_page.append(extra_bg)
-extra_grid_lines = []
-for i in range(1, 3):
-    v_line = Rect(i * 80 - 2, 0, 5, 240, fill=DARK_GREEN)
-    h_line = Rect(0, i * 80 - 2, 240, 5, fill=DARK_GREEN)
-    extra_page.append(v_line); extra_page.append(h_line)
-    extra_grid_lines.extend([v_line, h_line])
-extra_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=5)
-extra_page.append(extra_outline)
-extra_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-extra_page.append(extra_return_label)
-extra_calc_btn = label.Label(custom_font, text="[CALC]", color=ORANGE, scale=2, x=10, y=35)
-extra_page.append(extra_calc_btn)
-extra_dice_btn = label.Label(custom_font, text="[DICE]", color=ORANGE, scale=2, x=90, y=35)
-extra_page.append(extra_dice_btn)
-extra_8ball_btn = label.Label(custom_font, text="[8B]", color=ORANGE, scale=2, x=170, y=35)
-extra_page.append(extra_8ball_btn)
-extra_page.hidden = True
-root_group.append(extra_page)
+def build_extra_page():
+    extra_page = displayio.Group()
+    for i in range(1, 3):
+        extra_page.append(themed(Rect(i * 80 - 2, 0, 5, 240, fill=DARK_GREEN), fill="outline"))
+        extra_page.append(themed(Rect(0, i * 80 - 2, 240, 5, fill=DARK_GREEN), fill="outline"))
+    extra_page.append(themed_label(label.Label(custom_font, text="[CALC]", color=ORANGE, scale=2, x=10, y=35)))
+    extra_page.append(themed_label(label.Label(custom_font, text="[DICE]", color=ORANGE, scale=2, x=90, y=35)))
+    extra_page.append(themed_label(label.Label(custom_font, text="[8B]", color=ORANGE, scale=2, x=170, y=35)))
+    extra_page.append(themed_label(label.Label(custom_font, text="[SYS]", color=ORANGE, scale=2, x=10, y=115)))
+    extra_page.append(themed_label(label.Label(custom_font, text="[SNK]", color=ORANGE, scale=2, x=90, y=115)))
+    return extra_page
 
 # Magic 8-Ball Page UI
-eight_ball_page = displayio.Group()
-ball_bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-eight_ball_page.append(ball_bg)
-ball_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-eight_ball_page.append(ball_outline)
-
-# The Ball
-ball_circle = Circle(120, 110, 80, fill=0x000000, outline=DARK_GREEN)
-eight_ball_page.append(ball_circle)
-ball_8 = label.Label(custom_font, text="8", color=0xFFFFFF, scale=5, x=105, y=100)
-eight_ball_page.append(ball_8)
-
-ball_msg = label.Label(terminalio.FONT, text="TAP ME", color=ORANGE, scale=2, x=75, y=210)
-eight_ball_page.append(ball_msg)
-
-ball_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-eight_ball_page.append(ball_return_label)
-eight_ball_page.hidden = True
-root_group.append(eight_ball_page)
+def build_eight_ball_page():
+    global ball_8, ball_msg
+    eight_ball_page = displayio.Group()
 
-# Dice Roller Page UI
-dice_page = displayio.Group()
-dice_bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-dice_page.append(dice_bg)
-dice_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-dice_page.append(dice_outline)
+    # The Ball
+    eight_ball_page.append(themed(Circle(120, 110, 80, fill=0x000000, outline=DARK_GREEN), fill=0x000000, outline="outline"))
+    ball_8 = label.Label(custom_font, text="8", color=0xFFFFFF, scale=5, x=105, y=100)
+    eight_ball_page.append(ball_8)
+
+    ball_msg = themed_label(label.Label(terminalio.FONT, text="TAP ME", color=ORANGE, scale=2, x=75, y=210))
+    eight_ball_page.append(ball_msg)
+    return eight_ball_page
 
 # Helper to Creating Visual Dice
 def create_die(x, y):
     g = displayio.Group(x=x, y=y)
-    face = RoundRect(0, 0, 70, 70, 10, fill=None, outline=DARK_GREEN, stroke=2)
+    face = themed(RoundRect(0, 0, 70, 70, 10, fill=None, outline=DARK_GREEN, stroke=2), outline="outline")
     g.append(face)
     pips = []
     # 7 pips needed for 1-6 layouts: TL, TR, ML, C, MR, BL, BR
     pos = [(15,15),(55,15),(15,35),(35,35),(55,35),(15,55),(55,55)]
     for px, py in pos:
-        p = Circle(px, py, 6, fill=ORANGE)
+        p = themed(Circle(px, py, 6, fill=ORANGE), fill="text")
         p.hidden = True
         g.append(p); pips.append(p)
     return g, face, pips
@@ -219,299 +950,437 @@ def set_die_value(pips, val):
     }
     for idx in layouts.get(val, []): pips[idx].hidden = False
 
-die1_group, die1_face, die1_pips = create_die(40, 75)
-die2_group, die2_face, die2_pips = create_die(130, 75)
-dice_page.append(die1_group); dice_page.append(die2_group)
-
-roll_btn = label.Label(custom_font, text="[ROLL]", color=ORANGE, scale=3, x=72, y=180)
-dice_page.append(roll_btn)
-
-d_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-dice_page.append(d_return_label)
-dice_page.hidden = True
-root_group.append(dice_page)
+# Dice Roller Page UI
+def build_dice_page():
+    global die1_pips, die2_pips, dice_groups, dice_total
+    dice_page = displayio.Group()
 
-# Calculator Page UI
-calc_page = displayio.Group()
-calc_bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-calc_page.append(calc_bg)
-calc_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-calc_page.append(calc_outline)
+    die1_group, die1_face, die1_pips = create_die(40, 75)
+    die2_group, die2_face, die2_pips = create_die(130, 75)
+    dice_page.append(die1_group); dice_page.append(die2_group)
+    dice_groups = (die1_group, die2_group)
+    dice_total = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=3, anchor_point=(0.5, 0.5), anchored_position=(120, 45)))
+    dice_page.append(dice_total)
 
-calc_display = label.Label(custom_font, text="0", color=0xFFFFFF, scale=3)
-calc_display.anchor_point, calc_display.anchored_position = (1.0, 0.0), (230, 10)
-calc_page.append(calc_display)
+    dice_page.append(themed_label(label.Label(custom_font, text="[ROLL]", color=ORANGE, scale=3, x=72, y=180)))
+    return dice_page
 
 # Calculator Keys (Grid 4x4)
 calc_keys = ["7", "8", "9", "/", "4", "5", "6", "*", "1", "2", "3", "-", "0", "C", "=", "+"]
-calc_labels = []
-for i, key in enumerate(calc_keys):
-    row, col = i // 4, i % 4
-    l = label.Label(custom_font, text=key, color=ORANGE, scale=3, x=20 + col * 55, y=80 + row * 45)
-    calc_page.append(l); calc_labels.append(l)
-
-c_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-calc_page.append(c_return_label)
-calc_page.hidden = True
-root_group.append(calc_page)
-
-# Calendar Month Navigation Arrows
-cal_prev_month = label.Label(custom_font, text="<", color=ORANGE, scale=2, x=35, y=20)
-cal_next_month = label.Label(custom_font, text=">", color=ORANGE, scale=2, x=190, y=20)
-cal_prev_box = Rect(25, 10, 40, 25, fill=None, outline=DARK_GREEN, stroke=1)
-cal_next_box = Rect(175, 10, 40, 25, fill=None, outline=DARK_GREEN, stroke=1)
-calendar_page.append(cal_prev_month); calendar_page.append(cal_next_month)
-calendar_page.append(cal_prev_box); calendar_page.append(cal_next_box)
-
-set_page = displayio.Group()
-set_bg = displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette, width=240, height=240)
-set_page.append(set_bg)
-set_outline = Rect(0, 0, 240, 240, fill=None, outline=DARK_GREEN, stroke=4)
-set_page.append(set_outline)
-
-# Date/Time Set UI - Reordered: HR MI DA MO YEAR
-set_h_label = label.Label(custom_font, text="00", color=0xFFFFFF, scale=2, x=10, y=80)
-set_mi_label = label.Label(custom_font, text="00", color=0xFFFFFF, scale=2, x=55, y=80)
-set_d_label = label.Label(custom_font, text="01", color=0xFFFFFF, scale=2, x=100, y=80)
-set_mo_label = label.Label(custom_font, text="01", color=0xFFFFFF, scale=2, x=145, y=80)
-set_y_label = label.Label(custom_font, text="2025", color=0xFFFFFF, scale=2, x=185, y=80)
-set_page.append(set_h_label); set_page.append(set_mi_label); set_page.append(set_d_label); set_page.append(set_mo_label); set_page.append(set_y_label)
-
-# Headers
-set_h1 = label.Label(terminalio.FONT, text="HR", color=GRAY, x=10, y=20)
-set_h2 = label.Label(terminalio.FONT, text="MI", color=GRAY, x=55, y=20)
-set_h3 = label.Label(terminalio.FONT, text="DA", color=GRAY, x=100, y=20)
-set_h4 = label.Label(terminalio.FONT, text="MO", color=GRAY, x=145, y=20)
-set_h5 = label.Label(terminalio.FONT, text="YEAR", color=GRAY, x=185, y=20)
-set_page.append(set_h1); set_page.append(set_h2); set_page.append(set_h3); set_page.append(set_h4); set_page.append(set_h5)
-
-# Arrows
-set_up_h = label.Label(custom_font, text="^", color=ORANGE, scale=2, x=10, y=50)
-set_up_mi = label.Label(custom_font, text="^", color=ORANGE, scale=2, x=55, y=50)
-set_up_d = label.Label(custom_font, text="^", color=ORANGE, scale=2, x=100, y=50)
-set_up_mo = label.Label(custom_font, text="^", color=ORANGE, scale=2, x=145, y=50)
-set_up_y = label.Label(custom_font, text="^", color=ORANGE, scale=2, x=195, y=50)
-set_page.append(set_up_h); set_page.append(set_up_mi); set_page.append(set_up_d); set_page.append(set_up_mo); set_page.append(set_up_y)
-
-set_dn_h = label.Label(custom_font, text="v", color=ORANGE, scale=2, x=10, y=110)
-set_dn_mi = label.Label(custom_font, text="v", color=ORANGE, scale=2, x=55, y=110)
-set_dn_d = label.Label(custom_font, text="v", color=ORANGE, scale=2, x=100, y=110)
-set_dn_mo = label.Label(custom_font, text="v", color=ORANGE, scale=2, x=145, y=110)
-set_dn_y = label.Label(custom_font, text="v", color=ORANGE, scale=2, x=195, y=110)
-set_page.append(set_dn_h); set_page.append(set_dn_mi); set_page.append(set_dn_d); set_page.append(set_dn_mo); set_page.append(set_dn_y)
-
-save_btn = label.Label(custom_font, text="[SAVE]", color=ORANGE, scale=3, x=65, y=180)
-set_page.append(save_btn)
-set_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-set_page.append(set_return_label)
-
-set_page.hidden = True
-root_group.append(set_page)
-
-calendar_page.hidden = True
-root_group.append(calendar_page)
-
-
-
-
-def create_double_outline_label(text, x, y, scale, main_color, anchor=(0.5, 0.5), has_green=True, has_black=True):
-    group = displayio.Group()
-    layers = []
-    if has_green:
-        green_offs = [(-12,0),(12,0),(0,-12),(0,12),(-12,-12),(12,12),(-12,12),(12,-12)]
-        for ox, oy in green_offs:
-            l = label.Label(custom_font, text=text, color=DARK_GREEN, scale=scale)
-            l.anchor_point, l.anchored_position = anchor, (x + ox, y + oy)
-            group.append(l); layers.append(l)
-    if has_black:
-        black_offs = [(-8,0),(8,0),(0,-8),(0,8),(-8,-8),(8,8),(-8,8),(8,-8)]
-        for ox, oy in black_offs:
-            l = label.Label(custom_font, text=text, color=0x000000, scale=scale)
-            l.anchor_point, l.anchored_position = anchor, (x + ox, y + oy)
-            group.append(l); layers.append(l)
-    main_l = label.Label(custom_font, text=text, color=main_color, scale=scale)
-    main_l.anchor_point, main_l.anchored_position = anchor, (x, y)
-    group.append(main_l)
-    return group, main_l, layers
-
-def update_all_colors():
-    # Update main clock labels
-    h_main.color = current_text_color
-    m_main.color = current_text_color
-    s_main.color = current_text_color
-    c_main.color = current_text_color
-    for l in h_layers[:8]: l.color = current_outline_color
-    for l in m_layers[:8]: l.color = current_outline_color
-    for l in c_layers[:8]: l.color = current_outline_color
-    # Update timer labels
-    t_m_label.color = current_text_color
-    t_s_label.color = current_text_color
-    t_c_main.color = current_text_color
-    for l in t_m_layers[:8]: l.color = current_outline_color
-    for l in t_s_layers[:8]: l.color = current_outline_color
-    for l in t_c_layers[:8]: l.color = current_outline_color
-    # Update date labels
-    date_label.color = current_text_color
-    date_num_label.color = current_text_color
-    # Update outlines
-    edge_outline.outline = current_outline_color
-    sec_rect.outline = current_outline_color
-    # Update battery
-    batt_outline.outline = current_text_color
-    batt_tip.fill = current_text_color
-    # Update settings UI
-    settings_outline.outline = current_outline_color
-    text_color_preview.outline = current_outline_color
-    outline_color_preview.outline = current_outline_color
-    bright_preview.outline = current_outline_color
-    up_txt.color = current_text_color
-    up_out.color = current_text_color
-    up_brt.color = current_text_color
-    dn_txt.color = current_text_color
-    dn_out.color = current_text_color
-    dn_brt.color = current_text_color
-    # Update timer arrows
-    up_m.color = current_text_color
-    dn_m.color = current_text_color
-    up_s.color = current_text_color
-    dn_s.color = current_text_color
-    # Update timer boxes
-    up_m_box.outline = current_outline_color
-    dn_m_box.outline = current_outline_color
-    up_s_box.outline = current_outline_color
-    dn_s_box.outline = current_outline_color
-    # Update settings and timer return area
-    return_label.color = current_text_color
-    t_return_label.color = current_text_color
-    cal_return_label.color = current_text_color
-    set_btn.color = current_text_color
-    # Update timer mode buttons
-    t_plus_btn.color = current_text_color
-    t_minus_btn.color = current_text_color
-    t_reset_btn.color = current_text_color
-    t_plus_box.outline = current_outline_color
-    t_minus_box.outline = current_outline_color
-    t_reset_box.outline = current_outline_color
-    # Update set page
-    set_outline.outline = current_outline_color
-    set_y_label.color = current_text_color
-    set_mo_label.color = current_text_color
-    set_d_label.color = current_text_color
-    set_h_label.color = current_text_color
-    set_mi_label.color = current_text_color
-    save_btn.color = current_text_color
-    set_return_label.color = current_text_color
-    for arrow in [set_up_y, set_up_mo, set_up_d, set_up_h, set_up_mi, set_dn_y, set_dn_mo, set_dn_d, set_dn_h, set_dn_mi]:
-        arrow.color = current_text_color
-    # Update calendar
-    calendar_outline.outline = current_outline_color
-    calendar_title.color = current_text_color
-    cal_highlight.outline = current_text_color
-    cal_prev_month.color = current_text_color
-    cal_next_month.color = current_text_color
-    cal_prev_box.outline = current_outline_color
-    cal_next_box.outline = current_outline_color
-    # Update extra page
-    extra_outline.outline = current_outline_color
-    extra_return_label.color = current_text_color
-    extra_calc_btn.color = current_text_color
-    for line in extra_grid_lines: line.fill = current_outline_color
-    # Update calc page
-    calc_outline.outline = current_outline_color
-    calc_display.color = current_text_color
-    c_return_label.color = current_text_color
-    for l in calc_labels: l.color = current_text_color
-    # Update dice page
-    dice_outline.outline = current_outline_color
-    die1_face.outline = current_outline_color
-    die2_face.outline = current_outline_color
-    for p in die1_pips + die2_pips: p.fill = current_text_color
-    roll_btn.color = current_text_color
-    d_return_label.color = current_text_color
-    extra_dice_btn.color = current_text_color
-    # Update 8-ball page
-    ball_outline.outline = current_outline_color
-    ball_circle.outline = current_outline_color
-    ball_msg.color = current_text_color
-    ball_return_label.color = current_text_color
-    extra_8ball_btn.color = current_text_color
-
-# Main Clock UI
-h_group, h_main, h_layers = create_double_outline_label("00", 60, 88, 9, ORANGE)
-c_group, c_main, c_layers = create_double_outline_label(":", 129, 88, 9, ORANGE)
-m_group, m_main, m_layers = create_double_outline_label("00", 189, 88, 9, ORANGE)
-
-# Seconds Container - Left side 2px closer to center (x=89), width reduced (w=64) to keep right edge fixed
-sec_bg_x, sec_bg_y, sec_bg_w, sec_bg_h = 89, 138, 64, 48
-sec_rect = Rect(sec_bg_x, sec_bg_y, sec_bg_w, sec_bg_h, fill=0x000000, outline=DARK_GREEN, stroke=4)
-s_group, s_main, s_layers = create_double_outline_label("00", 123, 162, 6, ORANGE, has_green=False, has_black=False)
-
-main_group.append(h_group); main_group.append(c_group); main_group.append(m_group)
-main_group.append(sec_rect); main_group.append(s_group)
-
-
-
-# Timer Page UI
-t_m_group, t_m_label, t_m_layers = create_double_outline_label("00", 60, 88, 9, ORANGE)
-t_c_group, t_c_main, t_c_layers = create_double_outline_label(":", 129, 88, 9, ORANGE)
-t_s_group, t_s_label, t_s_layers = create_double_outline_label("00", 189, 88, 9, ORANGE)
-timer_page.append(t_m_group); timer_page.append(t_c_group); timer_page.append(t_s_group)
-
-up_m = label.Label(custom_font, text="^", color=ORANGE, scale=3, x=52, y=29)
-dn_m = label.Label(custom_font, text="v", color=ORANGE, scale=3, x=52, y=142)
-up_s = label.Label(custom_font, text="^", color=ORANGE, scale=3, x=172, y=29)
-dn_s = label.Label(custom_font, text="v", color=ORANGE, scale=3, x=172, y=142)
-timer_page.append(up_m); timer_page.append(dn_m); timer_page.append(up_s); timer_page.append(dn_s)
-
-# Timer Arrow Outlines
-up_m_box = Rect(0, 4, 120, 40, fill=None, outline=DARK_GREEN, stroke=1)
-dn_m_box = Rect(0, 132, 120, 40, fill=None, outline=DARK_GREEN, stroke=1)
-up_s_box = Rect(120, 4, 120, 40, fill=None, outline=DARK_GREEN, stroke=1)
-dn_s_box = Rect(120, 132, 120, 40, fill=None, outline=DARK_GREEN, stroke=1)
-timer_page.append(up_m_box); timer_page.append(dn_m_box); timer_page.append(up_s_box); timer_page.append(dn_s_box)
-
-# Timer Mode Buttons (+, -, R) - MASSIVE (63x63) touching
-t_minus_box = Rect(5, 172, 63, 63, fill=None, outline=DARK_GREEN, stroke=1)
-t_minus_btn = label.Label(custom_font, text="-", color=ORANGE, scale=3, x=36, y=203)
-t_plus_box = Rect(68, 172, 63, 63, fill=None, outline=DARK_GREEN, stroke=1)
-t_plus_btn = label.Label(custom_font, text="+", color=ORANGE, scale=3, x=99, y=203)
-t_reset_box = Rect(131, 172, 63, 63, fill=None, outline=DARK_GREEN, stroke=1)
-t_reset_btn = label.Label(custom_font, text="R", color=ORANGE, scale=3, x=162, y=203)
-timer_page.append(t_minus_box); timer_page.append(t_minus_btn)
-timer_page.append(t_plus_box); timer_page.append(t_plus_btn)
-timer_page.append(t_reset_box); timer_page.append(t_reset_btn)
-
-# Timer Return Icon [X]
-t_return_label = label.Label(custom_font, text="[X]", color=ORANGE, scale=2, x=207, y=223)
-timer_page.append(t_return_label)
-
-days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-date_label = label.Label(custom_font, text="", color=ORANGE, scale=3)
-date_label.anchor_point, date_label.anchored_position = (0.0, 1.0), (8, 231)
-main_group.append(date_label)
 
-date_num_label = label.Label(custom_font, text="", color=ORANGE, scale=3)
-date_num_label.anchor_point, date_num_label.anchored_position = (0.5, 1.0), (120, 233)
-main_group.append(date_num_label)
+# Calculator Page UI
+def build_calc_page():
+    global calc_display
+    calc_page = displayio.Group()
+
+    calc_display = themed_label(label.Label(custom_font, text=calc_input[:12], color=0xFFFFFF, scale=3))
+    calc_display.anchor_point, calc_display.anchored_position = (1.0, 0.0), (230, 10)
+    calc_page.append(calc_display)
+
+    for i, key in enumerate(calc_keys):
+        row, col = i // 4, i % 4
+        calc_page.append(themed_label(label.Label(custom_font, text=key, color=ORANGE, scale=3, x=20 + col * 55, y=80 + row * 45)))
+    return calc_page
+
+# Snake: the playfield is one TileGrid over a three-tile sheet (empty, body, food), so a move
+# writes the new head's tile and clears the tail's. The body is a ring of cell numbers and a
+# bitset of the cells it covers, so growing, moving and the self-collision test are O(1) at any
+# length. Moves run on a fixed timestep off ticks_ms() and only request a frame; pacing the frames
+# is push_frame's job. Until a tap starts a game the snake plays itself round a Hamiltonian cycle.
+SNAKE_COLS, SNAKE_ROWS, SNAKE_CELL = 22, 16, 10  # even rows, so the cycle closes up column 0
+SNAKE_CELLS = SNAKE_COLS * SNAKE_ROWS
+SNAKE_X, SNAKE_Y = 10, 20
+SNAKE_START, SNAKE_STEP_MS, SNAKE_FAST_MS, SNAKE_CATCHUP = 4, 150, 70, 3  # a late loop runs up to 3 moves, then drops the rest
+SNAKE_DX, SNAKE_DY = (0, 1, 0, -1), (-1, 0, 1, 0)  # up, right, down, left
+snake = {"head": 0, "len": 0, "dir": 1, "queued": 0, "food": -1, "state": "demo", "score": 0, "acc": 0, "at": 0}
+snake_body = array.array("H", (0 for _ in range(SNAKE_CELLS)))  # ring, tail to head
+snake_bits = bytearray((SNAKE_CELLS + 7) // 8)
+snake_turns = bytearray(2)  # swipes not yet taken, so a quick double turn is not lost
+snake_grid = snake_label = None
+
+def build_snake_page():
+    global snake_grid, snake_label
+    snake_page = displayio.Group()
+    sheet = displayio.Bitmap(3 * SNAKE_CELL, SNAKE_CELL, 3)
+    bitmaptools.fill_region(sheet, SNAKE_CELL, 0, 2 * SNAKE_CELL - 1, SNAKE_CELL - 1, 1)
+    bitmaptools.fill_region(sheet, 2 * SNAKE_CELL + 2, 2, 3 * SNAKE_CELL - 3, SNAKE_CELL - 3, 2)
+    # 0 clear, 1 body in the text colour, 2 food in the outline colour: the rounded-shape layout, so
+    # rebuilds share that palette instead of binding a new one each time
+    snake_grid = displayio.TileGrid(sheet, pixel_shader=theme_palette("outline", "text", rounded=True),
+                                    width=SNAKE_COLS, height=SNAKE_ROWS, tile_width=SNAKE_CELL, tile_height=SNAKE_CELL, x=SNAKE_X, y=SNAKE_Y)
+    snake_page.append(snake_grid)
+    if snake["state"] == "play": snake_redraw()  # a game left running outlives a torn-down page
+    snake_page.append(themed(Rect(SNAKE_X - 2, SNAKE_Y - 2, SNAKE_COLS * SNAKE_CELL + 4, SNAKE_ROWS * SNAKE_CELL + 4, fill=None, outline=DARK_GREEN), outline="outline"))
+    snake_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=2, x=10, y=205))
+    snake_page.append(snake_label)
+    return snake_page
+
+def snake_cycle_dir(x, y):
+    # Right along even rows, left along odd ones from column 1, then back up column 0
+    if x == 0: return 1 if y == 0 else 0
+    if y % 2 == 0: return 1 if x < SNAKE_COLS - 1 else 2
+    if x > 1: return 3
+    return 2 if y < SNAKE_ROWS - 1 else 3
+
+def snake_reset(length=SNAKE_START, state="play"):
+    # Lays the snake along the cycle from the top left, head last
+    for i in range(len(snake_bits)): snake_bits[i] = 0
+    for i in range(SNAKE_CELLS): snake_grid[i] = 0
+    x, y = 1, 0
+    for i in range(length):
+        c = y * SNAKE_COLS + x
+        snake_body[i] = c; snake_bits[c >> 3] |= 1 << (c & 7); snake_grid[c] = 1
+        if i < length - 1: d = snake_cycle_dir(x, y); x += SNAKE_DX[d]; y += SNAKE_DY[d]
+    snake["head"], snake["len"], snake["dir"], snake["queued"] = length - 1, length, snake_cycle_dir(x, y), 0
+    snake["state"], snake["score"], snake["acc"], snake["at"] = state, 0, 0, supervisor.ticks_ms()
+    snake_food(); show_snake()
+
+def snake_redraw():
+    # Every cell from the bitset and the food, for a grid that starts out empty
+    for c in range(SNAKE_CELLS): snake_grid[c] = 1 if snake_bits[c >> 3] & 1 << (c & 7) else 0
+    if snake["food"] >= 0: snake_grid[snake["food"]] = 2
+
+def snake_food():
+    # A few random probes, then a scan on from the last one, so a nearly full board still ends
+    import random
+    c = 0
+    for _ in range(8):
+        c = random.randrange(SNAKE_CELLS)
+        if not snake_bits[c >> 3] & 1 << (c & 7): break
+    else:
+        for _ in range(SNAKE_CELLS):
+            c = (c + 1) % SNAKE_CELLS
+            if not snake_bits[c >> 3] & 1 << (c & 7): break
+    snake["food"] = c; snake_grid[c] = 2
+
+def snake_turn(d):
+    # Queued for the next moves; reversing onto the neck is ignored
+    n = snake["queued"]
+    last = snake_turns[n - 1] if n else snake["dir"]
+    if snake["state"] != "play" or n == len(snake_turns) or d == last or d == (last + 2) % 4: return
+    snake_turns[n] = d; snake["queued"] = n + 1
+
+def snake_step():
+    s, body = snake, snake_body
+    h = body[s["head"]]; x, y = h % SNAKE_COLS, h // SNAKE_COLS
+    if s["state"] == "demo": s["dir"] = snake_cycle_dir(x, y)
+    elif s["queued"]:
+        s["dir"] = snake_turns[0]; snake_turns[0] = snake_turns[1]; s["queued"] -= 1
+    x += SNAKE_DX[s["dir"]]; y += SNAKE_DY[s["dir"]]
+    if x < 0 or y < 0 or x >= SNAKE_COLS or y >= SNAKE_ROWS: snake_over(); return
+    c = y * SNAKE_COLS + x
+    eat = c == s["food"]
+    if not eat:
+        # The tail moves off first, so chasing it is legal
+        tail = body[(s["head"] - s["len"] + 1) % SNAKE_CELLS]
+        snake_bits[tail >> 3] &= ~(1 << (tail & 7)); snake_grid[tail] = 0
+    if snake_bits[c >> 3] & 1 << (c & 7): snake_over(); return
+    snake_bits[c >> 3] |= 1 << (c & 7); snake_grid[c] = 1
+    s["head"] = (s["head"] + 1) % SNAKE_CELLS; body[s["head"]] = c
+    if eat:
+        s["len"] += 1; s["score"] += 1
+        if s["len"] == SNAKE_CELLS: snake_over(); return
+        snake_food(); show_snake()
+
+def snake_over():
+    if snake["state"] == "demo": snake_reset(state="demo"); return
+    snake["state"] = "over"
+    if snake["score"] > settings["snake_best"]: set_settings(snake_best=snake["score"])
+    show_snake()
+
+def show_snake():
+    # Rewritten on a score change only, never per move
+    best = settings["snake_best"]
+    if snake["state"] == "demo": snake_label.text = "TAP TO PLAY  HI {}".format(best)
+    elif snake["state"] == "over": snake_label.text = "OVER {}  HI {}".format(snake["score"], best)
+    else: snake_label.text = "{}  HI {}".format(snake["score"], best)
+
+def enter_snake():
+    # A game left running is paused, not lost; otherwise the demo starts over
+    if snake["state"] == "play": snake["acc"], snake["at"] = 0, supervisor.ticks_ms(); show_snake()
+    else: snake_reset(state="demo")
+    wake_task(snake_task)
+
+# Matrix rain: the screensaver shown for RAIN_SECS before the screen goes dark. The screen is one
+# TileGrid of terminalio cells over a sheet holding every glyph once per palette index, so a cell
+# is drawn once, when a column's head reaches it, and fades as the palette rotates: each tick the
+# newest index takes the head colour and the rest shift one step darker. A column clears its tail
+# before the index it wrote comes round again. Per tick that is a tile or two per column that
+# moved and RAIN_LEVELS palette writes, with the columns in preallocated arrays.
+RAIN_CHARS = "0123457:=*+<>ZX|"  # 16, so getrandbits(4) picks one
+RAIN_LEVELS = 15  # palette indices 1..15; 1 + 15 * 16 tiles still fit TileGrid's 8-bit tile numbers
+RAIN_W, RAIN_H = terminalio.FONT.get_bounding_box()[:2]
+RAIN_COLS, RAIN_ROWS = 240 // RAIN_W, (240 + RAIN_H - 1) // RAIN_H
+RAIN_MS, RAIN_SECS = 40, 10  # 25 fps, under FRAME_FPS so each frame goes out unpaced; RAIN_SECS = 0 blanks straight away
+RAIN_LIFT_TTL = 100  # ms: the lift latch is read every few ticks, off the INT1_SRC shadow in between
+RAIN_FADE = (0xD0FFD0,) + tuple((0xE0 * (RAIN_LEVELS - a) ** 2 // (RAIN_LEVELS - 1) ** 2) << 8 for a in range(1, RAIN_LEVELS))  # by age in ticks
+rain = {"tick": 0, "acc": 0, "at": 0}
+rain_pos = array.array("h", (0 for _ in range(RAIN_COLS)))  # head, 1/8 rows
+rain_speed = array.array("B", (0 for _ in range(RAIN_COLS)))  # 1/8 rows a tick
+rain_head = array.array("h", (0 for _ in range(RAIN_COLS)))  # last row drawn
+rain_grid = rain_palette = None
+
+def build_rain_page():
+    global rain_grid, rain_palette
+    rain_page = displayio.Group()
+    glyphs = [terminalio.FONT.get_glyph(ord(c)) for c in RAIN_CHARS]
+    top, n = max(g.dy + g.height for g in glyphs), len(RAIN_CHARS)
+    sheet = displayio.Bitmap((1 + RAIN_LEVELS * n) * RAIN_W, RAIN_H, RAIN_LEVELS + 1)  # tile 0 is blank
+    for i, g in enumerate(glyphs):
+        for gx, gy in glyph_pixels(g):
+            x, y = g.dx + gx, top - g.dy - g.height + gy
+            if not (0 <= x < RAIN_W and 0 <= y < RAIN_H): continue
+            for level in range(RAIN_LEVELS): sheet[(1 + level * n + i) * RAIN_W + x, y] = level + 1
+    rain_palette = displayio.Palette(RAIN_LEVELS + 1)
+    rain_palette[0] = 0x000000
+    rain_grid = displayio.TileGrid(sheet, pixel_shader=rain_palette, width=RAIN_COLS, height=RAIN_ROWS,
+                                   tile_width=RAIN_W, tile_height=RAIN_H)
+    rain_page.append(rain_grid)
+    return rain_page
+
+def rain_spawn(i):
+    # Starts above the screen at a random height, so the columns do not fall in step
+    import random
+    rain_pos[i] = -1 - random.getrandbits(7); rain_speed[i] = 2 + random.getrandbits(3) % 6
+    rain_head[i] = rain_pos[i] >> 3
+
+def rain_step():
+    import random
+    bits, grid, pos, speed, heads = random.getrandbits, rain_grid, rain_pos, rain_speed, rain_head
+    t = rain["tick"] = (rain["tick"] + 1) % RAIN_LEVELS
+    base = 1 + t * len(RAIN_CHARS)
+    for i in range(RAIN_COLS):
+        p = pos[i] + speed[i]; pos[i] = p
+        r, trail = heads[i], (RAIN_LEVELS - 1) * speed[i] >> 3  # rows a cell takes to reach the oldest shade
+        while r < p >> 3:
+            r += 1
+            if 0 <= r < RAIN_ROWS: grid[r * RAIN_COLS + i] = base + bits(4)
+            if 0 <= r - trail < RAIN_ROWS: grid[(r - trail) * RAIN_COLS + i] = 0
+        heads[i] = r
+        if r - trail >= RAIN_ROWS - 1: rain_spawn(i)
+    for age in range(RAIN_LEVELS): rain_palette[1 + (t - age) % RAIN_LEVELS] = RAIN_FADE[age]
+
+def enter_rain():
+    for c in range(RAIN_COLS * RAIN_ROWS): rain_grid[c] = 0
+    for i in range(RAIN_COLS): rain_spawn(i)
+    rain["acc"], rain["at"] = 0, supervisor.ticks_ms()
+    wake_task(rain_task)
+
+def build_set_page():
+    global set_h_label, set_mi_label, set_d_label, set_mo_label, set_y_label
+    set_page = displayio.Group()
+
+    # Date/Time Set UI - Reordered: HR MI DA MO YEAR
+    set_h_label = label.Label(custom_font, text="00", color=0xFFFFFF, scale=2, x=10, y=80)
+    set_mi_label = label.Label(custom_font, text="00", color=0xFFFFFF, scale=2, x=55, y=80)
+    set_d_label = label.Label(custom_font, text="01", color=0xFFFFFF, scale=2, x=100, y=80)
+    set_mo_label = label.Label(custom_font, text="01", color=0xFFFFFF, scale=2, x=145, y=80)
+    set_y_label = label.Label(custom_font, text="2025", color=0xFFFFFF, scale=2, x=185, y=80)
+    for l in (set_h_label, set_mi_label, set_d_label, set_mo_label, set_y_label): themed_label(l); set_page.append(l)
+
+    # Headers
+    for text, x in (("HR", 10), ("MI", 55), ("DA", 100), ("MO", 145), ("YEAR", 185)):
+        set_page.append(label.Label(terminalio.FONT, text=text, color=GRAY, x=x, y=20))
+
+    # Arrows
+    for x in (10, 55, 100, 145, 195):
+        set_page.append(themed_label(label.Label(custom_font, text="^", color=ORANGE, scale=2, x=x, y=50)))
+        set_page.append(themed_label(label.Label(custom_font, text="v", color=ORANGE, scale=2, x=x, y=110)))
+
+    set_page.append(themed_label(label.Label(custom_font, text="[SAVE]", color=ORANGE, scale=3, x=65, y=180)))
+    return set_page
+
+def show_set_values():
+    set_y_label.text = str(set_val[0])
+    set_mo_label.text = "{:02d}".format(set_val[1])
+    set_d_label.text = "{:02d}".format(set_val[2])
+    set_h_label.text = "{:02d}".format(set_val[3])
+    set_mi_label.text = "{:02d}".format(set_val[4])
+
+def enter_set():
+    global set_val
+    curr = r.datetime
+    set_val = [curr.tm_year, curr.tm_mon, curr.tm_mday, curr.tm_hour, curr.tm_min]
+    show_set_values()
+
+# System status: the stats rings, battery, CPU temperature and uptime. The page's text is built
+# once per sample while it is shown; the sampler itself never allocates.
+def build_status_page():
+    global status_label, status_graph, hud_button, log_button
+    status_page = displayio.Group()
+    status_label = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=2, x=12, y=16, line_spacing=0.85))  # 8 lines above the graph
+    status_page.append(status_label)
+    status_graph = displayio.Bitmap(180, 16, 2)  # free heap over the ring, oldest on the left
+    status_page.append(displayio.TileGrid(status_graph, pixel_shader=theme_palette(None, "text"), x=30, y=188))
+    status_page.append(themed(Rect(28, 186, 184, 20, fill=None, outline=DARK_GREEN), outline="outline"))
+    hud_button = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=2, x=10, y=223))
+    log_button = themed_label(label.Label(custom_font, text="", color=ORANGE, scale=2, x=95, y=223))
+    status_page.append(hud_button); status_page.append(log_button)
+    return status_page
+
+def show_system():
+    up = time.monotonic_ns() // NS
+    try: temp = "{:.0f}C".format(microcontroller.cpu.temperature)
+    except: temp = "--"
+    left = power_time_to_empty()  # appended to the battery line while discharging
+    left = "" if left is None else " {}h{:02d}".format(left // 3600, left // 60 % 60)
+    # FRAME: the last and the longest refresh over the ring, and how many went past FRAME_NS
+    status_label.text = "RAM {} free\nHEAP {} used\nLOOP {}ms {}ms/s\nTOUCH {}ms {}fps\nFRAME {}/{}ms {} SLOW\nI2C {}us/s\nBAT {}mV {}%{}\nCPU {} UP {}:{:02d}:{:02d}".format(
+        stats_last(STAT_FREE), stats_last(STAT_ALLOC), stats_last(STAT_LOOP), stats_last(STAT_BUSY),
+        stats_max(STAT_TOUCH), stats_last(STAT_FRAMES), stats_last(STAT_FRAME_MS), stats_max(STAT_FRAME_MS), stats_total(STAT_SLOW),
+        stats_last(STAT_I2C), power["mv"], battery_percent(), left, temp, up // 3600, up // 60 % 60, up % 60)
+
+def show_status():
+    if stats_bus: show_bus()
+    else: show_system()
+    hud_button.text = "[HUD*]" if stats_hud else "[HUD]"
+    log_button.text = "[LOG*]" if stats_stream else "[LOG]"
+    # Each sample is a 3px column scaled between the ring's lowest and highest free heap
+    n, ring = min(stats_count, STATS_SIZE), stats_rings[STAT_FREE]
+    bitmaptools.fill_region(status_graph, 0, 0, 180, 16, 0)
+    if not n: return
+    lo = hi = ring[(stats_head - 1) % STATS_SIZE]
+    for k in range(n):
+        v = ring[(stats_head - n + k) % STATS_SIZE]
+        if v < lo: lo = v
+        if v > hi: hi = v
+    for k in range(n):
+        v = ring[(stats_head - n + k) % STATS_SIZE]
+        h = 1 + (v - lo) * 15 // (hi - lo or 1)
+        bitmaptools.fill_region(status_graph, (STATS_SIZE - n + k) * 3, 16 - h, (STATS_SIZE - n + k) * 3 + 2, 16, 1)
+
+def show_bus():
+    # One line per device: bus, address, transactions and bus time since boot; then light sleeps,
+    # the time spent in them and what woke them (touch, lift, the next task)
+    status_label.text = "I2C {}us/s\n".format(stats_last(STAT_I2C)) + "\n".join(
+        "{} {:02X} {}x {}ms".format(bus[0].upper(), addr, d["count"], d["ns"] // 1000000) for (bus, addr), d in sorted(i2c_devices.items())) + \
+        "\nSLEEP {}x {}s\nWAKE T{} L{} C{}".format(sleep_stats["sleeps"], int(sleep_stats["slept"]),
+                                                  sleep_stats["touch_wakes"], sleep_stats["lift_wakes"], sleep_stats["time_wakes"])
+
+def show_hud():
+    hud_label.text = "F{} L{} T{} I{}".format(stats_last(STAT_FREE), stats_last(STAT_LOOP), stats_max(STAT_TOUCH), stats_last(STAT_I2C))
+
+# Touch router: pages register rectangles with handlers. Each page keeps a coarse grid of buckets
+# holding the regions that overlap each cell, so a touch only tests the few regions in its cell.
+TOUCH_CELL, TOUCH_COLS = 40, 6
+touch_maps = {}
+
+def on_touch(page, x0, y0, x1, y1, handler):
+    # Half-open [x0, x1) x [y0, y1); where regions overlap, the one registered first wins
+    if page not in touch_maps: touch_maps[page] = [[] for _ in range(TOUCH_COLS * TOUCH_COLS)]
+    buckets, region = touch_maps[page], (x0, y0, x1, y1, handler)
+    for row in range(y0 // TOUCH_CELL, min(TOUCH_COLS, (y1 - 1) // TOUCH_CELL + 1)):
+        for col in range(x0 // TOUCH_CELL, min(TOUCH_COLS, (x1 - 1) // TOUCH_CELL + 1)):
+            buckets[row * TOUCH_COLS + col].append(region)
+
+def route_touch(tx, ty):
+    buckets = touch_maps.get(current_page)
+    if buckets is None: return
+    for x0, y0, x1, y1, handler in buckets[min(ty, 239) // TOUCH_CELL * TOUCH_COLS + min(tx, 239) // TOUCH_CELL]:
+        if x0 <= tx < x1 and y0 <= ty < y1:
+            handler(tx, ty); return
+
+# Page registry: a page is a builder plus enter/exit hooks. It is built the first time it is shown,
+# and pages not visited recently are torn down again when the heap runs low. Only the active page
+# is attached to the display tree; navigation is a stack, so [X] returns to wherever you came from.
+PAGE_MIN_FREE = 96 * 1024
+pages = {}
+nav_stack = ["clock"]
+
+def register_page(name, build, enter=None, exit=None, refs=(), back=None, border="outline", swipe=None):
+    # refs: globals the builder publishes, dropped on teardown so the widgets can be collected
+    # back: page [X] falls back to when there is no history; border: a theme role or a colour
+    # swipe: called with a direction (0 up, 1 right, 2 down, 3 left) each time a held finger moves SWIPE_MIN
+    pages[name] = {"build": build, "enter": enter, "exit": exit, "refs": refs, "back": back, "border": border, "group": None, "seen": 0, "bytes": 0, "swipe": swipe}
+    if back: on_touch(name, 181, 181, 240, 240, lambda tx, ty: pop_page())
+
+def teardown_page(name):
+    # Never the active page, so the group is already detached
+    pages[name]["group"] = None
+    for ref in pages[name]["refs"]: globals()[ref] = None
+
+def trim_pages(keep=()):
+    gc.collect()
+    for seen, name in sorted((p["seen"], n) for n, p in pages.items()):
+        if gc.mem_free() >= PAGE_MIN_FREE: break
+        if name in keep or name == current_page or pages[name]["build"] is None or pages[name]["group"] is None: continue
+        teardown_page(name); gc.collect()
+
+def show_page(name):
+    # Swaps the attached group; callers go through push/pop/replace so the stack stays in step.
+    # The screensaver covers a page rather than leaving it: the page's exit is skipped on the way
+    # to "matrix" and its enter on the way back, so unsaved set edits and the calendar month stay
+    global current_page
+    old, new = pages[current_page], pages[name]
+    covering, uncovering = name == "matrix", current_page == "matrix"
+    for anim in list(anims): cancel_anim(anim)
+    if old["exit"] and not covering: old["exit"]()
+    if new["group"] is None:
+        trim_pages((name,))
+        free = gc.mem_free()
+        new["group"] = new["build"]()
+        new["bytes"] = free - gc.mem_free()  # build cost, listed when the stats stream starts
+        print("page {}: {} bytes".format(name, new["bytes"]))
+    pages_group.remove(old["group"]); pages_group.append(new["group"])
+    new["seen"] = time.monotonic(); current_page = name
+    show_chrome()
+    if new["enter"] and not uncovering: new["enter"]()
+
+def push_page(name):
+    # Going to a page already in the history unwinds back to it rather than growing a loop
+    if name in nav_stack: del nav_stack[nav_stack.index(name) + 1:]
+    else: nav_stack.append(name)
+    show_page(name)
+
+def pop_page():
+    if len(nav_stack) > 1: nav_stack.pop()
+    else: nav_stack[0] = pages[nav_stack[0]]["back"] or "clock"
+    show_page(nav_stack[-1])
+
+def replace_page(name):
+    nav_stack[-1] = name
+    if name in nav_stack[:-1]: del nav_stack[nav_stack.index(name) + 1:]
+    show_page(name)
+
+def show_chrome():
+    page = pages[current_page]
+    chrome_border[0] = theme_colors.get(page["border"], page["border"])
+    chrome_back.hidden = page["back"] is None
+    status_strip.hidden = current_page in ("clock", "matrix")
+
+register_page("clock", None)
+pages["clock"]["group"] = main_group
+register_page("timer", build_timer_page, enter=show_timer, refs=("t_m_field", "t_s_field", "t_lap_label"), back="clock", border=0xFF0000)
+register_page("settings", build_settings_page, enter=show_previews, refs=("text_color_preview", "outline_color_preview", "bright_preview", "sec_mode_label", "lift_label"), back="clock")
+register_page("calendar", build_calendar_page, enter=enter_calendar, refs=("calendar_title", "cal_labels", "cal_highlight"), back="clock")
+register_page("extra", build_extra_page, back="clock")
+register_page("8ball", build_eight_ball_page, refs=("ball_8", "ball_msg"), back="extra")
+register_page("dice", build_dice_page, refs=("die1_pips", "die2_pips", "dice_groups", "dice_total"), back="extra")
+register_page("calc", build_calc_page, refs=("calc_display",), back="extra")
+register_page("snake", build_snake_page, enter=enter_snake, refs=("snake_grid", "snake_label"), back="extra", swipe=snake_turn)
+register_page("status", build_status_page, enter=show_status, refs=("status_label", "status_graph", "hud_button", "log_button"), back="extra")
+register_page("matrix", build_rain_page, enter=enter_rain, refs=("rain_grid", "rain_palette"), border=0x000000)
+register_page("set", build_set_page, enter=enter_set, refs=("set_h_label", "set_mi_label", "set_d_label", "set_mo_label", "set_y_label"), back="settings")
 
+r = rtc.RTC()
 
+# Touch: the FT6336's point registers read straight through the bus manager, one 5-byte burst a
+# poll, so the busiest device on either bus is counted and timed with the others
+TOUCH_ADDR, TOUCH_TD_STATUS = 0x38, 0x02
+touch_buf = bytearray(5)  # TD_STATUS, then the first point's XH, XL, YH, YL
 
-bar_w, bar_h, bar_x, bar_y = 12, 30, 221, 202
-batt_group = displayio.Group()
-batt_outline = Rect(bar_x, bar_y, bar_w, bar_h, fill=None, outline=ORANGE, stroke=1)
-batt_tip = Rect(bar_x + 3, bar_y - 2, 6, 2, fill=ORANGE)
-batt_fill = Rect(bar_x + 2, bar_y + bar_h - 3, bar_w - 4, 1, fill=ORANGE)
-batt_group.append(batt_outline); batt_group.append(batt_tip); batt_group.append(batt_fill)
-main_group.append(batt_group)
+def touch_read():
+    # The first point as (x, y), or None; TD_STATUS outside 1-2 is no touch or a bad read
+    if not i2c_read_into("touch", TOUCH_ADDR, TOUCH_TD_STATUS, touch_buf, 5) or not 1 <= touch_buf[0] & 0x0F <= 2: return None
+    return (touch_buf[1] & 0x0F) << 8 | touch_buf[2], (touch_buf[3] & 0x0F) << 8 | touch_buf[4]
 
-r = rtc.RTC()
-try: ft = adafruit_focaltouch.Adafruit_FocalTouch(touch_i2c, address=0x38)
-except: ft = None
+touch_ok = i2c_read_into("touch", TOUCH_ADDR, TOUCH_TD_STATUS, touch_buf, 1)  # False with no controller on the bus
+boot_phase("pages")
 
 current_page = "clock"; display.brightness = 0.25
 last_interaction = time.monotonic(); TIMEOUT = 5.0
-touch_debounced = False; last_batt_check = -60; last_day = -1
-timer_min, timer_sec = 0, 0; timer_running = False; last_timer_tick = 0
+touch_debounced = False
+cd_set("timer", 0)
 timer_direction = -1  # -1 for countdown, 1 for count-up
 set_val = [2025, 1, 1, 0, 0] # Y, M, D, H, M
 cal_view_year, cal_view_month = 2025, 1
@@ -526,320 +1395,671 @@ text_color_index = 2  # Start at orange
 outline_color_index = 5  # Start at green-ish
 current_brightness = 0.25
 
+# Settings store: values live in RAM and are written behind once taps have been quiet for
+# SETTINGS_QUIET seconds or the screen goes dark. The file goes through a temp file and rename;
+# if the filesystem is read-only (no boot.py remount) the store falls back to microcontroller.nvm.
+SETTINGS_VERSION = 1
+SETTINGS_PATH, SETTINGS_TMP = "/settings.json", "/settings.tmp"
+SETTINGS_MAGIC = b"TWS"  # nvm record: magic, version, length (2 bytes), checksum, compact JSON
+SETTINGS_QUIET = 3.0
+settings = {"text_index": 2, "outline_index": 5, "brightness": 0.25, "seconds": True, "lift": 2, "snake_best": 0}  # defaults; new keys start here
+SETTINGS_DEFAULTS = dict(settings)
+settings_seq = 0  # bumped per write, so the newer of file and nvm wins on load
+settings_dirty = False; settings_changed_at = 0
+
+def set_settings(**values):
+    global settings_dirty, settings_changed_at
+    for key, value in values.items():
+        if settings.get(key) != value: settings[key] = value; settings_dirty = True
+    if settings_dirty: settings_changed_at = time.monotonic(); wake_task(settings_task)
+
+def settings_read_file():
+    for path in (SETTINGS_PATH, SETTINGS_TMP):  # a write interrupted after the remove leaves only the temp
+        try:
+            with open(path, "r") as f: return json.load(f)
+        except OSError: pass
+        except ValueError as e: print("settings: bad", path, e)
+    return None
+
+def settings_read_nvm():
+    nvm = microcontroller.nvm
+    if not nvm or nvm[0:3] != SETTINGS_MAGIC: return None
+    n = nvm[4] | nvm[5] << 8
+    payload = nvm[7:7 + n]
+    if nvm[3] > SETTINGS_VERSION or sum(payload) & 0xFF != nvm[6]: return None
+    return json.loads(str(payload, "utf-8"))
+
+def settings_write_file(data):
+    with open(SETTINGS_TMP, "w") as f: json.dump(data, f)
+    try: os.remove(SETTINGS_PATH)
+    except OSError: pass
+    os.rename(SETTINGS_TMP, SETTINGS_PATH)
+    count_write(SETTINGS_TMP)
+
+def settings_write_nvm(data):
+    payload = json.dumps(data).encode()
+    nvm = microcontroller.nvm
+    if not nvm or 7 + len(payload) > len(nvm): raise OSError("settings: nvm too small")
+    nvm[0:7 + len(payload)] = SETTINGS_MAGIC + bytes((SETTINGS_VERSION, len(payload) & 0xFF, len(payload) >> 8, sum(payload) & 0xFF)) + payload
+    count_write("/nvm")
+
+def flush_settings():
+    global settings_dirty, settings_seq
+    if not settings_dirty: return
+    settings_seq += 1
+    data = dict(settings, v=SETTINGS_VERSION, seq=settings_seq)
+    try: settings_write_file(data)
+    except OSError as e:
+        try: settings_write_nvm(data)
+        except OSError as e2: print("settings: not saved:", e, e2); return
+    settings_dirty = False
+
 def load_settings():
-    global current_text_color, current_outline_color, text_color_index, outline_color_index, current_brightness
-    try:
-        with open("/settings.json", "r") as f:
-            s = json.load(f)
-            text_color_index = s.get("text_index", 2)
-            outline_color_index = s.get("outline_index", 5)
-            current_brightness = s.get("brightness", 0.25)
-            current_text_color = color_palette[text_color_index]
-            current_outline_color = color_palette[outline_color_index]
-            display.brightness = current_brightness
-            # Update visuals
-            b_val = int(current_brightness * 255)
-            bright_preview.fill = (b_val << 16) | (b_val << 8) | b_val
-            text_color_preview.fill = current_text_color
-            outline_color_preview.fill = current_outline_color
-    except: pass
-
-def save_settings():
-    try:
-        with open("/settings.json", "w") as f:
-            json.dump({"text_index": text_color_index, "outline_index": outline_color_index, "brightness": current_brightness}, f)
-    except: pass
+    # Keys missing from an older version keep their defaults; unknown ones are dropped
+    global current_text_color, current_outline_color, text_color_index, outline_color_index, current_brightness, settings_seq
+    stored = [d for d in (settings_read_file(), settings_read_nvm()) if d and d.get("v", 1) <= SETTINGS_VERSION]
+    if stored:
+        data = max(stored, key=lambda d: d.get("seq", 0))
+        settings_seq = data.get("seq", 0)
+        for key in settings:
+            if key in data: settings[key] = data[key]
+    # A record that parses can still hold a bad value (hand-edited, or from a build with a longer
+    # palette); each index out of range, or of the wrong type, falls back to its default
+    for key, n in (("text_index", len(color_palette)), ("outline_index", len(color_palette)), ("lift", len(LIFT_LEVELS))):
+        if type(settings[key]) is not int or not 0 <= settings[key] < n: settings[key] = SETTINGS_DEFAULTS[key]
+    if type(settings["brightness"]) not in (int, float): settings["brightness"] = SETTINGS_DEFAULTS["brightness"]
+    settings["brightness"] = min(1.0, max(0.0, settings["brightness"]))
+    text_color_index, outline_color_index = settings["text_index"], settings["outline_index"]
+    current_brightness = settings["brightness"]
+    current_text_color = color_palette[text_color_index]
+    current_outline_color = color_palette[outline_color_index]
+    display.brightness = current_brightness
+    lift_apply(settings["lift"])
 
 load_settings()
 update_all_colors()
+boot_phase("settings")
 
 dragging_text_slider = False
 dragging_outline_slider = False
 dragging_bright_slider = False
 
+# Calendar engine: month layouts are worked out arithmetically (Sakamoto) and kept in a small
+# LRU, and only cells whose text differs from what is on screen are rewritten
+CAL_MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+CAL_DAY_TEXT = ("",) + tuple(str(n) for n in range(1, 32))
+CAL_CACHE_SIZE = 6
+cal_cache = []  # [(year, month), cells], most recently used last
+cal_shown = [""] * 42
+
+def cal_weekday(y, m, d):
+    # 0 is Monday, matching tm_wday
+    if m < 3: y -= 1
+    return (y + y // 4 - y // 100 + y // 400 + (0, 3, 2, 5, 0, 3, 5, 1, 4, 6, 2, 4)[m - 1] + d + 6) % 7
+
+def cal_days(y, m):
+    if m == 2: return 29 if (y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)) else 28
+    return 30 if m in (4, 6, 9, 11) else 31
+
+def cal_layout(y, m):
+    key = (y, m)
+    for i, entry in enumerate(cal_cache):
+        if entry[0] == key:
+            if i != len(cal_cache) - 1: cal_cache.append(cal_cache.pop(i))
+            return entry[1]
+    first, days = cal_weekday(y, m, 1), cal_days(y, m)
+    cells = tuple(CAL_DAY_TEXT[i - first + 1] if 0 <= i - first < days else "" for i in range(42))
+    cal_cache.append((key, cells))
+    if len(cal_cache) > CAL_CACHE_SIZE: cal_cache.pop(0)
+    return cells
+
 def update_calendar():
-    global cal_view_year, cal_view_month
-    months = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
-    calendar_title.text = "{} {:04d}".format(months[cal_view_month-1], cal_view_year)
-    
-    # Accurate first day of month weekday calculation
-    # tm_wday: 0 is Monday
-    t_struct = (cal_view_year, cal_view_month, 1, 0, 0, 0, -1, -1, -1)
-    first_day_dt = time.localtime(time.mktime(t_struct))
-    first_day_wday = first_day_dt.tm_wday
-    
-    days_in_month = 31
-    if cal_view_month in [4, 6, 9, 11]: days_in_month = 30
-    elif cal_view_month == 2:
-        days_in_month = 29 if (cal_view_year % 4 == 0 and (cal_view_year % 100 != 0 or cal_view_year % 400 == 0)) else 28
-        
-    curr = time.localtime()
-    cal_highlight.hidden = True
+    calendar_title.text = "{} {:04d}".format(CAL_MONTHS[cal_view_month-1], cal_view_year)
+    cells = cal_layout(cal_view_year, cal_view_month)
     for i in range(42):
-        day_num = i - first_day_wday + 1
-        if 1 <= day_num <= days_in_month:
-            cal_labels[i].text = str(day_num)
-            if day_num == curr.tm_mday and cal_view_month == curr.tm_mon and cal_view_year == curr.tm_year:
-                cal_highlight.x = 18 + (i % 7) * 30
-                cal_highlight.y = 75 + (i // 7) * 25
-                cal_highlight.hidden = False
-        else:
-            cal_labels[i].text = ""
-
-gc.collect()
+        if cells[i] != cal_shown[i]: cal_labels[i].text = cal_shown[i] = cells[i]
 
-while True:
-    now = time.monotonic()
-    points = ft.touches if ft else []
-    if points:
-        if not touch_debounced:
-            p = points[0]; tx, ty = p['x'], p['y']
+    curr = time.localtime()
+    if cal_view_month == curr.tm_mon and cal_view_year == curr.tm_year:
+        i = cal_weekday(curr.tm_year, curr.tm_mon, 1) + curr.tm_mday - 1
+        cal_highlight.x = 18 + (i % 7) * 30
+        cal_highlight.y = 75 + (i // 7) * 25
+        cal_highlight.hidden = False
+    else: cal_highlight.hidden = True
+
+# Animations: a named list of keyframes stepped by anim_task. (secs, fn) calls fn once as the
+# keyframe starts and then holds; (secs, fn, a, b) tweens, calling fn with a value eased from a
+# to b on every frame. Cancelling runs done at once, so done must leave the final state.
+anims = {}  # name -> {"keys", "i", "t0", "started", "done"}
+
+def animate(name, keys, done=None):
+    cancel_anim(name)
+    anims[name] = {"keys": keys, "i": 0, "t0": time.monotonic_ns(), "started": False, "done": done}
+    wake_task(anim_task)
+
+def cancel_anim(name):
+    anim = anims.pop(name, None)
+    if anim and anim["done"]: anim["done"]()
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+def fade_color(c1, c2, t):
+    return sum(int(((c1 >> s) & 0xFF) + (((c2 >> s) & 0xFF) - ((c1 >> s) & 0xFF)) * t) << s for s in (16, 8, 0))
+
+def anim_step(anim, now):
+    # False once the last keyframe is over; keyframe starts advance by duration, so late frames catch up.
+    # Times are integer ns: float monotonic() loses sub-frame resolution after a few hours up
+    keys = anim["keys"]
+    while anim["i"] < len(keys):
+        key = keys[anim["i"]]
+        span = int(key[0] * 1000000000)
+        if not anim["started"]:
+            anim["started"] = True
+            if len(key) == 2: key[1]()
+        t = min(1.0, (now - anim["t0"]) / span) if span else 1.0
+        if len(key) == 4: key[1](key[2] + (key[3] - key[2]) * ease_out(t))
+        if t < 1.0: return True
+        anim["i"] += 1; anim["t0"] += span; anim["started"] = False
+    return False
+
+# Touch handlers
+def go(page):
+    return lambda tx, ty: push_page(page)
+
+def go_dark():
+    # The screen going off, on a timeout or a tap: settings and the log reach storage, spare pages go
+    display.brightness = 0.0; trim_pages(); flush_settings(); lift_clear()  # re-arm a latch set while lit
+    log_flush()
+
+def sleep_now(tx, ty):
+    go_dark()
+
+def ask_eight_ball(tx, ty):
+    # Blink THINKING, then slide the answer up and fade the 8 back in; a tap mid-way jumps to the end
+    import random
+    if "8ball" in anims: cancel_anim("8ball"); return
+    answer = random.choice(eight_ball_answers)
+    def reveal():
+        ball_msg.text = answer; ball_msg.x = 120 - (len(answer) * 6); ball_msg.y = 240
+        ball_8.color = 0x000000; ball_8.hidden = False
+    def done():
+        reveal(); ball_msg.y = 210; ball_8.color = 0xFFFFFF
+    ball_8.hidden = True
+    blink = [(0.1, lambda: setattr(ball_msg, "text", "THINKING")), (0.1, lambda: setattr(ball_msg, "text", ""))]
+    animate("8ball", blink * 6 + [(0, reveal), (0.25, lambda y: setattr(ball_msg, "y", int(y)), 240, 210),
+                                  (0.4, lambda v: setattr(ball_8, "color", fade_color(0x000000, 0xFFFFFF, v)), 0, 1)], done)
+
+def dice_shake(frame):
+    import random
+    set_die_value(die1_pips, random.randint(1, 6)); set_die_value(die2_pips, random.randint(1, 6))
+    for g, x in zip(dice_groups, (40, 130)): g.x = x + (3 if frame % 2 else -3)
+
+def roll_dice(tx, ty):
+    # Shake through random faces, land on the rolled pair, then count the total up; a tap lands at once
+    import random
+    if "dice" in anims: cancel_anim("dice"); return
+    a, b = random.randint(1, 6), random.randint(1, 6)
+    def land():
+        set_die_value(die1_pips, a); set_die_value(die2_pips, b)
+        dice_groups[0].x, dice_groups[1].x = 40, 130
+    def done():
+        land(); dice_total.text = "= {}".format(a + b)
+    dice_total.text = ""
+    animate("dice", [(0.06, lambda f=f: dice_shake(f)) for f in range(6)] + [(0, land),
+                     (0.3, lambda v: setattr(dice_total, "text", "= {}".format(int(v + 0.5))), 2, a + b)], done)
+
+def calc_press(tx, ty):
+    global calc_input, calc_op, calc_total, calc_new_num
+    col, row = (tx - 10) // 55, (ty - 55) // 45
+    col = max(0, min(3, col)); row = max(0, min(3, row))
+    key = calc_keys[row * 4 + col]
+    if key.isdigit():
+        if calc_new_num: calc_input = key; calc_new_num = False
+        else: calc_input += key
+    elif key == "C": calc_input = "0"; calc_total = 0; calc_op = ""; calc_new_num = True
+    elif key == "=":
+        try:
+            if calc_op == "+": calc_total += float(calc_input)
+            elif calc_op == "-": calc_total -= float(calc_input)
+            elif calc_op == "*": calc_total *= float(calc_input)
+            elif calc_op == "/": calc_total /= float(calc_input)
+            else: calc_total = float(calc_input)
+            calc_input = str(int(calc_total)) if calc_total == int(calc_total) else "{:.2f}".format(calc_total)
+            calc_op = ""; calc_new_num = True
+        except: calc_input = "Error"; calc_new_num = True
+    else: # Operators
+        try:
+            if calc_op == "+": calc_total += float(calc_input)
+            elif calc_op == "-": calc_total -= float(calc_input)
+            elif calc_op == "*": calc_total *= float(calc_input)
+            elif calc_op == "/": calc_total /= float(calc_input)
+            else: calc_total = float(calc_input)
+            calc_op = key; calc_new_num = True
+            calc_input = str(int(calc_total)) if calc_total == int(calc_total) else "{:.2f}".format(calc_total)
+        except: calc_input = "Error"; calc_new_num = True
+    calc_display.text = calc_input[:12] # Limit display
+
+def timer_mode(direction):
+    def handler(tx, ty):
+        global timer_direction
+        timer_direction = direction
+        show_timer(); wake_task(timer_task)
+    return handler
+
+def timer_reset(tx, ty):
+    # R captures a lap while the stopwatch runs, otherwise clears the timer on screen
+    if timer_direction == 1:
+        if stopwatch["start"] is not None: sw_lap()
+        else: sw_reset()
+    else: cd_set("timer", 0)
+    show_timer()
+
+def timer_toggle(tx, ty):
+    if timer_direction == 1:
+        if stopwatch["start"] is None: sw_start()
+        else: sw_stop()
+    elif cd_running("timer"): cd_pause("timer")
+    else: cd_start("timer")
+    show_timer(); wake_task(timer_task)
+
+def timer_step(minutes, delta):
+    def handler(tx, ty):
+        if (stopwatch["start"] is not None) if timer_direction == 1 else cd_running("timer"): return
+        m, s = timer_shown()
+        if minutes: m = (m + delta) % 60
+        else: s = (s + delta) % 60
+        if timer_direction == 1: sw_reset((m * 60 + s) * NS)
+        else: cd_set("timer", m * 60 + s)
+        show_timer()
+    return handler
+
+def settings_step(column, up):
+    def handler(tx, ty):
+        global text_color_index, outline_color_index, current_text_color, current_outline_color, current_brightness
+        if column == 0: # Text Color
+            text_color_index = (text_color_index + (1 if up else -1)) % len(color_palette)
+            current_text_color = color_palette[text_color_index]
+        elif column == 1: # Outline Color
+            outline_color_index = (outline_color_index + (1 if up else -1)) % len(color_palette)
+            current_outline_color = color_palette[outline_color_index]
+        else: # Brightness
+            current_brightness = min(1.0, current_brightness + 0.25) if up else max(0.25, current_brightness - 0.25)
+            display.brightness = current_brightness
+        update_all_colors(); show_previews()
+        set_settings(text_index=text_color_index, outline_index=outline_color_index, brightness=current_brightness)
+    return handler
+
+def set_save(tx, ty):
+    global clock_anchor
+    r.datetime = time.struct_time((set_val[0], set_val[1], set_val[2], set_val[3], set_val[4], 0, -1, -1, -1))
+    clock_anchor = None; clock_shown[:] = [-1, -1, -1, -1, -1]
+    pop_page()
+
+def snake_tap(tx, ty):
+    # Starts a game from the demo or the score; turns are swipes
+    if snake["state"] != "play": snake_reset()
+
+def rain_tap(tx, ty):
+    # Any touch ends the screensaver on the page it covered
+    pop_page()
+
+def toggle_hud(tx, ty):
+    global stats_hud
+    stats_hud = not stats_hud; hud_label.hidden = not stats_hud
+    if stats_hud: show_hud()
+    show_status()
+
+def toggle_bus(tx, ty):
+    global stats_bus
+    stats_bus = not stats_bus; show_status()
+
+def toggle_stream(tx, ty):
+    global stats_stream
+    stats_stream = not stats_stream
+    if stats_stream:
+        for name, page in pages.items():
+            if page["bytes"]: print("P", name, page["bytes"], sep=",")
+        for (bus, addr), d in sorted(i2c_devices.items()): print("D", bus, addr, d["count"], d["ns"] // 1000, sep=",")
+        print("W", sleep_stats["sleeps"], int(sleep_stats["slept"]), sleep_stats["touch_wakes"], sleep_stats["lift_wakes"], sleep_stats["time_wakes"], sep=",")
+        print("S,n," + ",".join(STATS_NAMES))  # column header for the lines that follow
+    show_status()
+
+def lift_step(tx, ty):
+    set_settings(lift=(settings["lift"] + 1) % len(LIFT_LEVELS)); lift_apply(settings["lift"])
+    lift_label.text = "LIFT " + LIFT_LEVELS[settings["lift"]][0]
+
+def toggle_seconds(tx, ty):
+    set_settings(seconds=not settings["seconds"]); show_seconds_mode(); show_previews()
+
+def set_step(col, inc):
+    def handler(tx, ty):
+        if col == 3: set_val[3] = (set_val[3] + inc) % 24
+        elif col == 4: set_val[4] = (set_val[4] + inc) % 60
+        elif col == 2: set_val[2] = max(1, min(31, set_val[2] + inc))
+        elif col == 1: set_val[1] = max(1, min(12, set_val[1] + inc))
+        elif col == 0: set_val[0] += inc
+        show_set_values()
+    return handler
+
+def calendar_step(delta):
+    def handler(tx, ty):
+        global cal_view_year, cal_view_month
+        cal_view_month += delta
+        if cal_view_month < 1: cal_view_month = 12; cal_view_year -= 1
+        elif cal_view_month > 12: cal_view_month = 1; cal_view_year += 1
+        update_calendar()
+    return handler
+
+# Hit regions (the [X] return area is added by register_page)
+on_touch("clock", 0, 0, 240, 50, go("extra"))
+on_touch("clock", 0, 58, 240, 119, go("timer"))
+on_touch("clock", 101, 119, 140, 201, sleep_now)
+on_touch("clock", 121, 201, 240, 240, go("settings"))
+on_touch("clock", 0, 201, 80, 240, go("calendar"))
+
+on_touch("extra", 0, 0, 80, 80, go("calc"))
+on_touch("extra", 81, 0, 160, 80, go("dice"))
+on_touch("extra", 161, 0, 240, 80, go("8ball"))
+on_touch("extra", 0, 81, 80, 160, go("status"))
+on_touch("extra", 81, 81, 160, 160, go("snake"))
+
+on_touch("8ball", 41, 31, 200, 190, ask_eight_ball)
+on_touch("dice", 51, 151, 190, 220, roll_dice)
+on_touch("calc", 0, 51, 240, 240, calc_press)
+
+on_touch("timer", 0, 173, 68, 240, timer_mode(-1)) # Minus (Countdown)
+on_touch("timer", 68, 173, 131, 240, timer_mode(1)) # Plus (Count-up)
+on_touch("timer", 131, 173, 194, 240, timer_reset)
+on_touch("timer", 0, 41, 240, 136, timer_toggle)
+on_touch("timer", 0, 0, 120, 22, timer_step(True, 1))
+on_touch("timer", 0, 140, 120, 173, timer_step(True, -1))
+on_touch("timer", 120, 0, 240, 22, timer_step(False, 1))
+on_touch("timer", 120, 140, 240, 173, timer_step(False, -1))
+
+on_touch("snake", 0, 0, 240, 181, snake_tap)
+
+on_touch("matrix", 0, 0, 240, 240, rain_tap)
+
+on_touch("status", 0, 208, 85, 240, toggle_hud)
+on_touch("status", 85, 208, 170, 240, toggle_stream)
+on_touch("status", 0, 0, 240, 180, toggle_bus)
+
+on_touch("settings", 0, 181, 80, 240, go("set"))
+on_touch("settings", 85, 181, 181, 240, toggle_seconds)
+for column, (x0, x1) in enumerate(((0, 80), (80, 160), (160, 240))):
+    on_touch("settings", x0, 0, x1, 85, settings_step(column, True))
+    on_touch("settings", x0, 85, x1, 145 if pedo["addr"] is not None else 170, settings_step(column, False))  # the lift row takes 145-181
+if pedo["addr"] is not None: on_touch("settings", 0, 145, 240, 181, lift_step)
+
+on_touch("set", 61, 161, 180, 220, set_save)
+for col, (x0, x1) in ((3, (0, 50)), (4, (50, 95)), (2, (95, 140)), (1, (140, 185)), (0, (185, 240))): # HR MI DA MO YEAR
+    on_touch("set", x0, 0, x1, 80, set_step(col, 1))
+    on_touch("set", x0, 80, x1, 240, set_step(col, -1))
+
+on_touch("calendar", 0, 0, 80, 45, calendar_step(-1))
+on_touch("calendar", 161, 0, 240, 45, calendar_step(1))
+boot_phase("handlers")
+
+# Clock: the RTC second edge is found once and the face then ticks off monotonic_ns, pushing only
+# the fields that changed. It re-syncs to the RTC hourly and after the time is set.
+CLOCK_REANCHOR = 3600
+clock_anchor = None  # (monotonic_ns at an RTC second edge, time.time() at that edge)
+clock_probe = None  # RTC second seen while waiting for the edge
+clock_shown = [-1, -1, -1, -1, -1]  # hour, minute, second, day of month, steps on screen
+
+def show_clock(secs):
+    s, m, h = secs % 60, secs // 60 % 60, secs // 3600 % 24
+    changed = False
+    if settings["seconds"] and s != clock_shown[2]: set_outline_digits(s_field, s); clock_shown[2] = s; changed = True
+    if m != clock_shown[1]: set_outline_digits(m_field, m); clock_shown[1] = m; changed = True
+    if h != clock_shown[0]:
+        set_outline_digits(h_field, h); clock_shown[0] = h; changed = True
+        t = time.localtime(secs)
+        if t.tm_mday != clock_shown[3]:
+            date_label.text = "{}".format(days[t.tm_wday][:3])
+            date_num_label.text = "{:02d}/{:02d}".format(t.tm_mday, t.tm_mon)
+            clock_shown[3] = t.tm_mday
+    if pedo["addr"] is not None:
+        steps = steps_today()
+        if steps != clock_shown[4]: steps_label.text = str(steps); clock_shown[4] = steps; changed = True
+    if changed: request_frame()
+
+def show_seconds_mode():
+    sec_rect.hidden = s_field.hidden = not settings["seconds"]
+    clock_shown[2] = -1; wake_task(clock_task)
+
+# Scheduler: each task returns the seconds until it next wants to run, and the loop sleeps
+# until the earliest deadline instead of polling at a fixed rate.
+TOUCH_POLL, TOUCH_POLL_SWIPE, TOUCH_POLL_DARK = 0.05, 0.02, 0.1  # 50 Hz only where a swipe is tracked
+SWIPE_MIN = 24  # px a held finger moves before it counts as a swipe
+tasks = []  # [deadline ns, task]; integer ns, since float monotonic() coarsens as uptime grows
+TASK_MIN_NS = 1000000  # a wait a task worked out off monotonic() can round to ~0 and spin the loop
+
+def add_task(task, delay=0):
+    tasks.append([time.monotonic_ns() + int(delay * 1000000000), task])
+
+def wake_task(task):
+    for entry in tasks:
+        if entry[1] is task: entry[0] = 0
+
+# Frames: with auto-refresh off, every widget change made during a scheduler pass goes out in
+# one refresh at the end of it. Back-to-back frames are paced to FRAME_FPS; a frame after an idle
+# gap is pushed straight away, since refresh() drops a paced frame that comes more than a frame
+# after the last paced call. A dropped frame is pushed straight away too, so it is never lost.
+FRAME_FPS = 30
+FRAME_NS = 1000000000 // FRAME_FPS
+frame_pending = frame_now = False; frame_last = 0
+
+def request_frame(now=False):
+    # now: skip the pacing wait, for a frame that ends an animation and has no successor to pace
+    global frame_pending, frame_now
+    frame_pending = True; frame_now = frame_now or now
+
+def push_frame():
+    global frame_pending, frame_now, frame_last, stats_touch_at
+    if not frame_pending or display.brightness <= 0: return
+    t0 = time.monotonic_ns()
+    if frame_now or t0 - frame_last > FRAME_NS or not display.refresh(target_frames_per_second=FRAME_FPS, minimum_frames_per_second=0):
+        display.refresh()
+    frame_last = time.monotonic_ns(); frame_pending = frame_now = False
+    stats_acc[STAT_FRAMES] += 1
+    if stats_touch_at >= 0:
+        ms = ticks_since(stats_touch_at); stats_touch_at = -1
+        if ms > stats_acc[STAT_TOUCH]: stats_acc[STAT_TOUCH] = ms
+    ms = (frame_last - t0) // 1000000
+    if ms > stats_acc[STAT_FRAME_MS]: stats_acc[STAT_FRAME_MS] = ms
+    if ms * 1000000 > FRAME_NS: stats_acc[STAT_SLOW] += 1
+    if boot_start: boot_finish(); wake_task(boot_task)
+
+# Power manager: while the screen is dark the loop light-sleeps until the next task deadline, a
+# touch (the touch controller pulls INT low) or a wrist raise (the LIS3DH drives INT1 high),
+# instead of polling the panel every 100 ms.
+# Any module with the alarm API can stand in for the real one.
+try: import alarm
+except ImportError: alarm = None
+TOUCH_INT = microcontroller.pin.GPIO16
+light_sleep = alarm is not None  # cleared if the port refuses, and touch goes back to polling
+sleep_stats = {"sleeps": 0, "touch_wakes": 0, "lift_wakes": 0, "time_wakes": 0, "slept": 0.0}
+
+def power_sleep(wait):
+    # False if light sleep is unavailable, so the caller falls back to time.sleep
+    global light_sleep
+    if not light_sleep: return False
+    t0 = time.monotonic()
+    try:
+        wakes = [alarm.pin.PinAlarm(TOUCH_INT, value=False, pull=True), alarm.time.TimeAlarm(monotonic_time=t0 + wait)]
+        if lift_armed(): wakes.append(alarm.pin.PinAlarm(LIS_INT, value=True))
+        woke = alarm.light_sleep_until_alarms(*wakes)
+    except (ValueError, RuntimeError, NotImplementedError):
+        light_sleep = False; wake_task(touch_task); return False
+    sleep_stats["sleeps"] += 1; sleep_stats["slept"] += time.monotonic() - t0
+    if isinstance(woke, alarm.pin.PinAlarm) and woke.pin == LIS_INT:
+        sleep_stats["lift_wakes"] += 1; lift_clear(0); wake_screen()  # the line is high: clear it on the bus
+    elif isinstance(woke, alarm.pin.PinAlarm): sleep_stats["touch_wakes"] += 1; wake_task(touch_task)
+    else: sleep_stats["time_wakes"] += 1
+    return True
+
+def run_tasks():
+    while True:
+        t0 = supervisor.ticks_ms(); now = time.monotonic_ns()
+        for entry in tasks:
+            if entry[0] <= now: entry[0] = now + max(TASK_MIN_NS, int(entry[1]() * 1000000000))
+        push_frame(); stats_loop(t0)
+        wait = (min(entry[0] for entry in tasks) - time.monotonic_ns()) / 1000000000
+        if wait > 0 and not (display.brightness <= 0 and power_sleep(wait)): time.sleep(wait)
+
+def wake_screen():
+    global last_interaction
+    last_interaction = time.monotonic()
+    display.brightness = current_brightness; show_battery(battery_percent())
+    wake_task(clock_task); wake_task(snake_task); request_frame()  # a game left when the screen went dark resumes
+
+swipe_x = swipe_y = 0
+
+def touch_task():
+    global touch_debounced, last_interaction, stats_touch_at, swipe_x, swipe_y
+    point = touch_read() if touch_ok else None
+    if point:
+        tx, ty = point
+        if touch_debounced:
+            # A held finger: swipes are measured from where the last one ended
+            swipe, dx, dy = pages[current_page]["swipe"], tx - swipe_x, ty - swipe_y
+            if swipe and display.brightness > 0 and max(abs(dx), abs(dy)) >= SWIPE_MIN:
+                swipe((1 if dx > 0 else 3) if abs(dx) > abs(dy) else (2 if dy > 0 else 0))
+                swipe_x, swipe_y = tx, ty; last_interaction = time.monotonic()
+        else:
+            swipe_x, swipe_y = tx, ty
+            stats_touch_at = supervisor.ticks_ms()
+            last_interaction = time.monotonic()
             if display.brightness < 0.1:
-                display.brightness = current_brightness; last_interaction = now
+                wake_screen()
             else:
-                if current_page == "clock" and ty < 50:
-                    main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden, extra_page.hidden = True, True, True, True, False
-                    current_page = "extra"; last_interaction = now
-                elif current_page == "clock" and 57 < ty < 119:
-                    main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden = True, False, True, True
-                    current_page = "timer"; last_interaction = now
-                elif current_page == "clock" and (100 < tx < 140 and ty >= 119 and ty <= 200):
-                    display.brightness = 0.0; current_page = "clock"
-                    main_group.hidden, timer_page.hidden, settings_page.hidden = False, True, True
-                elif current_page == "clock" and tx > 120 and ty > 200:
-                    main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden = True, True, False, True
-                    current_page = "settings"; last_interaction = now
-                elif current_page == "clock" and tx < 80 and ty > 200:
-                    curr_t = time.localtime()
-                    cal_view_year, cal_view_month = curr_t.tm_year, curr_t.tm_mon
-                    update_calendar()
-                    main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden = True, True, True, False
-                    current_page = "calendar"; last_interaction = now
-                elif current_page == "extra":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, extra_page.hidden = False, True
-                    elif tx < 80 and ty < 80: # CALC button
-                        current_page = "calc"
-                        extra_page.hidden, calc_page.hidden = True, False
-                    elif 80 < tx < 160 and ty < 80: # DICE button
-                        current_page = "dice"
-                        extra_page.hidden, dice_page.hidden = True, False
-                    elif 160 < tx and ty < 80: # 8BALL button
-                        current_page = "8ball"
-                        extra_page.hidden, eight_ball_page.hidden = True, False
-                elif current_page == "8ball":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden, extra_page.hidden, calc_page.hidden, dice_page.hidden, eight_ball_page.hidden = False, True, True, True, True, True, True, True
-                    elif 40 < tx < 200 and 30 < ty < 190: # Tap Ball
-                        import random
-                        ball_8.hidden = True
-                        for _ in range(6):
-                            ball_msg.text = "THINKING"
-                            display.refresh(); time.sleep(0.1)
-                            ball_msg.text = ""
-                            display.refresh(); time.sleep(0.1)
-                        ball_msg.text = random.choice(eight_ball_answers)
-                        ball_msg.x = 120 - (len(ball_msg.text) * 6)
-                        ball_8.hidden = False
-                elif current_page == "dice":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden, extra_page.hidden, calc_page.hidden, dice_page.hidden, eight_ball_page.hidden = False, True, True, True, True, True, True, True
-                    elif 50 < tx < 190 and 150 < ty < 220: # ROLL
-                        import random
-                        for _ in range(5): # Shake animation
-                            set_die_value(die1_pips, random.randint(1, 6))
-                            set_die_value(die2_pips, random.randint(1, 6))
-                            display.refresh()
-                            time.sleep(0.05)
-                elif current_page == "calc":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden, extra_page.hidden, calc_page.hidden, dice_page.hidden, eight_ball_page.hidden = False, True, True, True, True, True, True, True
-                    elif ty > 50:
-                        col, row = (tx - 10) // 55, (ty - 55) // 45
-                        col = max(0, min(3, col)); row = max(0, min(3, row))
-                        key = calc_keys[row * 4 + col]
-                        if key.isdigit():
-                            if calc_new_num: calc_input = key; calc_new_num = False
-                            else: calc_input += key
-                        elif key == "C": calc_input = "0"; calc_total = 0; calc_op = ""; calc_new_num = True
-                        elif key == "=":
-                            try:
-                                if calc_op == "+": calc_total += float(calc_input)
-                                elif calc_op == "-": calc_total -= float(calc_input)
-                                elif calc_op == "*": calc_total *= float(calc_input)
-                                elif calc_op == "/": calc_total /= float(calc_input)
-                                else: calc_total = float(calc_input)
-                                calc_input = str(int(calc_total)) if calc_total == int(calc_total) else "{:.2f}".format(calc_total)
-                                calc_op = ""; calc_new_num = True
-                            except: calc_input = "Error"; calc_new_num = True
-                        else: # Operators
-                            try:
-                                if calc_op == "+": calc_total += float(calc_input)
-                                elif calc_op == "-": calc_total -= float(calc_input)
-                                elif calc_op == "*": calc_total *= float(calc_input)
-                                elif calc_op == "/": calc_total /= float(calc_input)
-                                else: calc_total = float(calc_input)
-                                calc_op = key; calc_new_num = True
-                                calc_input = str(int(calc_total)) if calc_total == int(calc_total) else "{:.2f}".format(calc_total)
-                            except: calc_input = "Error"; calc_new_num = True
-                        calc_display.text = calc_input[:12] # Limit display
-                elif current_page == "timer":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, timer_page.hidden, settings_page.hidden = False, True, True
-                    elif ty > 172: # Mode/Reset buttons row (Massive buttons)
-                        if tx < 68: # Minus (Countdown)
-                            timer_direction = -1
-                        elif tx < 131: # Plus (Count-up)
-                            timer_direction = 1
-                        elif tx < 194: # Reset
-                            timer_running = False
-                            timer_min, timer_sec = 0, 0
-                    elif 40 < ty < 136:
-                        timer_running = not timer_running; last_timer_tick = now
-                    elif not timer_running:
-                        if tx < 120:
-                            if ty < 22: timer_min = (timer_min + 1) % 60
-                            elif ty >= 140: timer_min = (timer_min - 1) % 60
-                        else:
-                            if ty < 22: timer_sec = (timer_sec + 1) % 60
-                            elif ty >= 140: timer_sec = (timer_sec - 1) % 60
-                    m_str, s_str = "{:02d}".format(timer_min), "{:02d}".format(timer_sec)
-                    t_m_label.text, t_s_label.text = m_str, s_str
-                    for l in t_m_layers: l.text = m_str
-                    for l in t_s_layers: l.text = s_str
-                elif current_page == "settings":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden = False, True, True, True
-                    elif tx < 80 and ty > 180: # SET button
-                        curr = r.datetime
-                        set_val = [curr.tm_year, curr.tm_mon, curr.tm_mday, curr.tm_hour, curr.tm_min]
-                        set_y_label.text = str(set_val[0])
-                        set_mo_label.text = "{:02d}".format(set_val[1])
-                        set_d_label.text = "{:02d}".format(set_val[2])
-                        set_h_label.text = "{:02d}".format(set_val[3])
-                        set_mi_label.text = "{:02d}".format(set_val[4])
-                        settings_page.hidden, set_page.hidden = True, False
-                        current_page = "set"
-                    else:
-                        if tx < 80: # Text Color
-                            if ty < 85: text_color_index = (text_color_index + 1) % len(color_palette)
-                            elif ty < 170: text_color_index = (text_color_index - 1) % len(color_palette)
-                            current_text_color = color_palette[text_color_index]
-                            text_color_preview.fill = current_text_color
-                        elif tx < 160: # Outline Color
-                            if ty < 85: outline_color_index = (outline_color_index + 1) % len(color_palette)
-                            elif ty < 170: outline_color_index = (outline_color_index - 1) % len(color_palette)
-                            current_outline_color = color_palette[outline_color_index]
-                            outline_color_preview.fill = current_outline_color
-                        else: # Brightness
-                            if ty < 85: current_brightness = min(1.0, current_brightness + 0.25)
-                            elif ty < 170: current_brightness = max(0.25, current_brightness - 0.25)
-                            display.brightness = current_brightness
-                            b_val = int(current_brightness * 255)
-                            bright_preview.fill = (b_val << 16) | (b_val << 8) | b_val
-                        update_all_colors(); save_settings()
-                elif current_page == "set":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "settings"
-                        settings_page.hidden, set_page.hidden = False, True
-                    elif 60 < tx < 180 and 160 < ty < 220: # SAVE
-                        r.datetime = time.struct_time((set_val[0], set_val[1], set_val[2], set_val[3], set_val[4], 0, -1, -1, -1))
-                        current_page = "settings"
-                        settings_page.hidden, set_page.hidden = False, True
-                    else:
-                        col = 0
-                        if tx < 50: col = 3 # Hour
-                        elif tx < 95: col = 4 # Minute
-                        elif tx < 140: col = 2 # Day
-                        elif tx < 185: col = 1 # Month
-                        else: col = 0 # Year
-                        
-                        inc = 1 if ty < 80 else -1
-                        if col == 3: set_val[3] = (set_val[3] + inc) % 24
-                        elif col == 4: set_val[4] = (set_val[4] + inc) % 60
-                        elif col == 2: set_val[2] = max(1, min(31, set_val[2] + inc))
-                        elif col == 1: set_val[1] = max(1, min(12, set_val[1] + inc))
-                        elif col == 0: set_val[0] += inc
-                        
-                        set_y_label.text = str(set_val[0])
-                        set_mo_label.text = "{:02d}".format(set_val[1])
-                        set_d_label.text = "{:02d}".format(set_val[2])
-                        set_h_label.text = "{:02d}".format(set_val[3])
-                        set_mi_label.text = "{:02d}".format(set_val[4])
-                elif current_page == "calendar":
-                    last_interaction = now
-                    if tx > 180 and ty > 180: # Return area [X]
-                        current_page = "clock"
-                        main_group.hidden, timer_page.hidden, settings_page.hidden, calendar_page.hidden = False, True, True, True
-                    elif ty < 45: # Header Area (Navigation)
-                        if tx < 80: # Prev Month
-                            cal_view_month -= 1
-                            if cal_view_month < 1:
-                                cal_view_month = 12
-                                cal_view_year -= 1
-                            update_calendar()
-                        elif tx > 160: # Next Month
-                            cal_view_month += 1
-                            if cal_view_month > 12:
-                                cal_view_month = 1
-                                cal_view_year += 1
-                            update_calendar()
+                route_touch(tx, ty)
+            wake_task(clock_task); request_frame()
             touch_debounced = True
     else: touch_debounced = False
+    if display.brightness > 0: return TOUCH_POLL_SWIPE if pages[current_page]["swipe"] else TOUCH_POLL
+    return 60 if light_sleep else TOUCH_POLL_DARK  # the INT pin alarm wakes this task while dark
+
+def clock_task():
+    # Anchored, it wakes exactly on each second (each minute with seconds hidden) off monotonic_ns;
+    # unanchored, it draws from the RTC and polls every 10 ms until the RTC second turns over
+    global clock_anchor, clock_probe
+    if display.brightness <= 0 or current_page != "clock": return 60
+    now = time.monotonic_ns()
+    if clock_anchor is not None and now - clock_anchor[0] > CLOCK_REANCHOR * NS: clock_anchor = None
+    if clock_anchor is None:
+        secs = time.time()
+        if clock_probe is None or secs == clock_probe:
+            clock_probe = secs; show_clock(secs); return 0.01
+        clock_anchor, clock_probe = (now, secs), None
+    elapsed = (now - clock_anchor[0]) // NS
+    secs = clock_anchor[1] + elapsed
+    show_clock(secs)
+    step = 1 if settings["seconds"] else 60 - secs % 60
+    return (clock_anchor[0] + (elapsed + step) * NS - now) / NS
+
+def timer_task():
+    # Wakes on the next displayed-second change or countdown deadline, whichever comes first
+    now = time.monotonic_ns(); wait = 60 * NS
+    for cd in countdowns.values():
+        if cd["deadline"] is None: continue
+        if cd["deadline"] <= now: cd["deadline"] = None; cd["left"] = 0; log_record(LOG_TIMER, 1, 0, cd["total"])
+        else: wait = min(wait, cd["deadline"] - now)
+    show_timer(now)
+    if timer_direction == 1 and stopwatch["start"] is not None: wait = min(wait, NS - sw_elapsed(now) % NS)
+    elif timer_direction == -1 and cd_running("timer"): wait = min(wait, cd_left("timer", now) % NS or NS)
+    return wait / NS
+
+def power_task():
+    # Samples keep running while dark so the history has no gaps; a busy bus retries shortly
+    if not power_sample(): return 1
+    if display.brightness > 0: show_battery(battery_percent())
+    if time.time() >= log["battery_at"]:
+        log["battery_at"] = time.time() + LOG_BATTERY_EVERY
+        log_record(LOG_BATTERY, battery_percent(), power["mv"], power["charging"], power["vbus"])
+    return POWER_INTERVAL
+
+def anim_task():
+    if not anims: return 60
+    now, ended = time.monotonic_ns(), False
+    for name in list(anims):
+        if not anim_step(anims[name], now): cancel_anim(name); ended = True
+    request_frame(now=ended)
+    return FRAME_NS / 1000000000
+
+def idle_task():
+    if display.brightness > 0 and not timers_running() and not (current_page == "snake" and snake["state"] == "play"):
+        saver = current_page == "matrix"
+        left = last_interaction + TIMEOUT + (RAIN_SECS if saver else 0) - time.monotonic()
+        if left > 0: return left
+        if RAIN_SECS and not saver: push_page("matrix"); return RAIN_SECS
+        if saver: pop_page()  # so a wake shows the page the screensaver covered
+        go_dark()
+    return TIMEOUT
+
+def stats_task():
+    # Dark, a sample a minute keeps the rings going without waking the light sleep every second
+    stats_sample()
+    if display.brightness <= 0: return 60
+    if current_page == "status": show_status(); request_frame()
+    if stats_hud: show_hud(); request_frame()
+    return STATS_INTERVAL
+
+def pedo_task():
+    # Runs while dark too: the FIFO holds 3.2 s of samples, so this sets the light-sleep wake rate
+    if pedo["addr"] is None: return 3600
+    if pedo_drain() and current_page == "clock": wake_task(clock_task)
+    if not light_sleep and display.brightness <= 0 and lift_armed() and lift_clear(): wake_screen()  # no pin alarm: poll the latch
+    hour = time.time() // 3600
+    if hour != pedo["hour"]:
+        pedo["hour"] = hour
+        if pedo["dirty"]: pedo_save()
+        log_record(LOG_STEPS, hour % 24, 0, steps_today())
+    return PEDO_INTERVAL
+
+def snake_task():
+    # Fixed timestep: moves are owed for the ticks that passed, whatever the frame rate did
+    if display.brightness <= 0 or current_page != "snake" or snake["state"] not in ("play", "demo"): return 60
+    now = supervisor.ticks_ms()
+    snake["acc"] += (now - snake["at"]) & TICKS_MASK; snake["at"] = now
+    step = max(SNAKE_FAST_MS, SNAKE_STEP_MS - 2 * snake["score"])
+    moves = 0
+    while snake["acc"] >= step and moves < SNAKE_CATCHUP and snake["state"] in ("play", "demo"):
+        snake_step(); snake["acc"] -= step; moves += 1
+    if moves == SNAKE_CATCHUP: snake["acc"] = 0
+    if moves: request_frame()
+    return (step - snake["acc"]) / 1000
+
+def rain_task():
+    # One tick per RAIN_MS off ticks_ms(); a late loop drops ticks rather than running them back to back
+    if display.brightness <= 0 or current_page != "matrix": return 60
+    if lift_armed() and lift_clear(RAIN_LIFT_TTL): pop_page(); wake_screen(); return 60  # the screen counts as lit, so no pin alarm sees a raise
+    now = supervisor.ticks_ms()
+    rain["acc"] += (now - rain["at"]) & TICKS_MASK; rain["at"] = now
+    if rain["acc"] >= RAIN_MS:
+        rain["acc"] = rain["acc"] - RAIN_MS if rain["acc"] < 2 * RAIN_MS else 0
+        rain_step(); request_frame()
+    return (RAIN_MS - rain["acc"]) / 1000
+
+def boot_task():
+    # Woken once the first frame is out, so the flash write stays off the boot path
+    global boot_profile
+    if boot_profile: boot_save(); boot_profile = None
+    return 86400
+
+def settings_task():
+    if not settings_dirty: return 60
+    left = settings_changed_at + SETTINGS_QUIET - time.monotonic()
+    if left > 0: return left
+    flush_settings()
+    return 60 if not settings_dirty else SETTINGS_QUIET
+
+add_task(touch_task); add_task(clock_task); add_task(timer_task); add_task(power_task); add_task(idle_task); add_task(settings_task); add_task(anim_task); add_task(stats_task, STATS_INTERVAL); add_task(boot_task, 86400); add_task(pedo_task, PEDO_INTERVAL); add_task(snake_task, 60); add_task(rain_task, 60)
+show_seconds_mode()
 
-    if timer_running and now - last_timer_tick >= 1.0:
-        if timer_direction == -1: # Count down
-            if timer_min == 0 and timer_sec == 0: timer_running = False
-            else:
-                if timer_sec == 0: timer_min -= 1; timer_sec = 59
-                else: timer_sec -= 1
-        else: # Count up
-            timer_sec += 1
-            if timer_sec == 60: timer_sec = 0; timer_min = (timer_min + 1) % 100
-            m_str, s_str = "{:02d}".format(timer_min), "{:02d}".format(timer_sec)
-            t_m_label.text, t_s_label.text = m_str, s_str
-            for l in t_m_layers: l.text = m_str
-            for l in t_s_layers: l.text = s_str
-        last_timer_tick = now
-
-    if now - last_interaction > TIMEOUT and display.brightness > 0 and not timer_running:
-        display.brightness = 0.0; gc.collect()
-
-    if display.brightness > 0:
-        if current_page == "clock":
-            t = time.localtime()
-            h_str, m_str, s_str = "{:02d}".format(t.tm_hour), "{:02d}".format(t.tm_min), "{:02d}".format(t.tm_sec)
-            if s_main.text != s_str:
-                h_main.text, m_main.text, s_main.text = h_str, m_str, s_str
-                for l in h_layers: l.text = h_str
-                for l in m_layers: l.text = m_str
-                for l in s_layers: l.text = s_str
-            if t.tm_mday != last_day:
-                date_label.text = "{}".format(days[t.tm_wday][:3])
-                date_num_label.text = "{:02d}/{:02d}".format(t.tm_mday, t.tm_mon)
-                last_day = t.tm_mday
-            if now - last_batt_check > 30:
-                level = get_battery_percent()
-                new_fill_h = max(1, int((level / 100) * (bar_h - 4)))
-                batt_group.remove(batt_fill)
-                batt_fill = Rect(bar_x+2, bar_y+(bar_h-2)-new_fill_h, bar_w-4, new_fill_h, fill=ORANGE)
-                batt_group.append(batt_fill); last_batt_check = now
-            
-
-
-            time.sleep(0.05)
-        else: time.sleep(0.001)
-    else: time.sleep(0.1)
+gc.collect()
+boot_phase("tasks")
+
+run_tasks()
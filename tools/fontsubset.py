@@ -0,0 +1,166 @@
+"""Subset the BDF fonts to the characters code.py can draw and write them as PCF.
+
+Run on the host from the repo root:
+
+    python tools/fontsubset.py                  # every fonts/*.bdf
+    python tools/fontsubset.py fonts/ter-u14b.bdf --extra "%"
+
+The character set is every printable character in code.py's string literals,
+plus the digits and anything passed with --extra. The output sits next to the
+source as <name>.pcf, in the big-endian, 32-bit padded layout that
+adafruit_bitmap_font's PCF loader reads.
+"""
+import argparse
+import ast
+import glob
+import os
+import struct
+
+PCF_PROPERTIES, PCF_ACCELERATORS, PCF_METRICS, PCF_BITMAPS, PCF_BDF_ENCODINGS = 1, 2, 4, 8, 32
+PCF_MSB = 0x0C  # most significant byte and bit first
+PCF_ACCEL_W_INKBOUNDS = 0x100
+PCF_GLYPH_PAD = 2  # rows padded to 4 bytes
+
+
+def ui_chars(source):
+    chars = set("0123456789")
+    for node in ast.walk(ast.parse(open(source).read())):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            chars.update(c for c in node.value if 32 <= ord(c) < 127)
+    return chars
+
+
+def read_bdf(path):
+    font = {"ascent": 0, "descent": 0, "bbox": None, "glyphs": {}}
+    glyph = rows = None
+    for line in open(path, encoding="latin-1"):
+        parts = line.split()
+        if not parts: continue
+        key = parts[0]
+        if rows is not None:
+            if key == "ENDCHAR":
+                glyph["rows"] = rows; rows = None
+                if glyph["code"] >= 0: font["glyphs"][glyph["code"]] = glyph
+            else: rows.append(int(key, 16))
+        elif key == "FONTBOUNDINGBOX": font["bbox"] = tuple(int(p) for p in parts[1:5])
+        elif key == "FONT_ASCENT": font["ascent"] = int(parts[1])
+        elif key == "FONT_DESCENT": font["descent"] = int(parts[1])
+        elif key == "STARTCHAR": glyph = {}
+        elif key == "ENCODING": glyph["code"] = int(parts[1])
+        elif key == "DWIDTH": glyph["dwidth"] = int(parts[1])
+        elif key == "BBX": glyph["bbx"] = tuple(int(p) for p in parts[1:5])
+        elif key == "BITMAP": rows = []
+    return font
+
+
+def metrics(glyph):
+    w, h, x, y = glyph["bbx"]
+    return (x, x + w, glyph["dwidth"], y + h, -y, 0)
+
+
+def bounds(all_metrics, pick):
+    return tuple(pick(m[i] for m in all_metrics) for i in range(5)) + (0,)
+
+
+def glyph_bits(glyph):
+    # BDF rows are whole bytes, left aligned; PCF rows are 32-bit words
+    w, h = glyph["bbx"][:2]
+    row_bytes, words = (w + 7) // 8, (w + 31) // 32
+    out = bytearray()
+    for row in glyph["rows"][:h]:
+        out += row.to_bytes(row_bytes, "big") + bytes(4 * words - row_bytes)
+    return bytes(out)
+
+
+def write_pcf(font, codes, path):
+    codes = sorted(c for c in codes if c in font["glyphs"] and c < 0x10000)
+    glyphs = [font["glyphs"][c] for c in codes]
+    all_metrics = [metrics(g) for g in glyphs]
+    # Labels lay out from the bounding box, so keep the full font's box rather than the subset's
+    if font["bbox"]: all_metrics.append(metrics({"bbx": font["bbox"], "dwidth": font["bbox"][0]}))
+    minb, maxb = bounds(all_metrics, min), bounds(all_metrics, max)
+
+    fmt = PCF_MSB | PCF_GLYPH_PAD
+    props = struct.pack("<I", fmt) + struct.pack(">I", 0) + struct.pack(">I", 0)
+    accel = struct.pack("<I", fmt | PCF_ACCEL_W_INKBOUNDS)
+    accel += struct.pack(">BBBBBBBBIII", 0, 0, 0, 0, 0, 0, 0, 0, font["ascent"], font["descent"], 0)
+    for m in (minb, maxb, minb, maxb): accel += struct.pack(">5hH", *m)
+    mets = struct.pack("<I", fmt) + struct.pack(">I", len(glyphs)) + b"".join(struct.pack(">5hH", *m) for m in all_metrics[:len(glyphs)])
+
+    data, offsets = bytearray(), []
+    for g in glyphs:
+        offsets.append(len(data)); data += glyph_bits(g)
+    sizes = [len(data)] * 4  # only the 4-byte pad entry is read; the others are advisory
+    bitmaps = struct.pack("<I", fmt) + struct.pack(">I", len(glyphs)) + struct.pack(">%dI" % len(glyphs), *offsets)
+    bitmaps += struct.pack(">4I", *sizes) + bytes(data)
+
+    lo, hi = min(codes), max(codes)
+    b1, b2 = (lo >> 8, hi >> 8), (min(c & 0xFF for c in codes), max(c & 0xFF for c in codes))
+    index = {c: i for i, c in enumerate(codes)}
+    table = [index.get((r << 8) | c, 0xFFFF) for r in range(b1[0], b1[1] + 1) for c in range(b2[0], b2[1] + 1)]
+    enc = struct.pack("<I", fmt) + struct.pack(">5h", b2[0], b2[1], b1[0], b1[1], 0) + struct.pack(">%dH" % len(table), *table)
+
+    tables = [(PCF_PROPERTIES, props), (PCF_ACCELERATORS, accel), (PCF_METRICS, mets), (PCF_BITMAPS, bitmaps), (PCF_BDF_ENCODINGS, enc)]
+    offset = 8 + 16 * len(tables)
+    head, body = struct.pack("<4sI", b"\x01fcp", len(tables)), bytearray()
+    for kind, blob in tables:
+        blob += bytes(-len(blob) % 4)
+        head += struct.pack("<IIII", kind, struct.unpack_from("<I", blob)[0], len(blob), offset + len(body))
+        body += blob
+    with open(path, "wb") as f: f.write(head + body)
+    return len(codes)
+
+
+def read_pcf(path):
+    # The inverse of write_pcf, for the layout it writes: the same dict read_bdf returns
+    data = open(path, "rb").read()
+    magic, count = struct.unpack_from("<4sI", data)
+    if magic != b"\x01fcp": raise ValueError("not a PCF file: " + path)
+    tables = {kind: offset for kind, _, _, offset in (struct.unpack_from("<IIII", data, 8 + 16 * i) for i in range(count))}
+
+    at = tables[PCF_ACCELERATORS] + 4
+    ascent, descent = struct.unpack_from(">II", data, at + 8)
+    minb, maxb = struct.unpack_from(">5hH", data, at + 20), struct.unpack_from(">5hH", data, at + 32)
+
+    at = tables[PCF_METRICS] + 4
+    n, = struct.unpack_from(">I", data, at)
+    metrics_ = [struct.unpack_from(">5hH", data, at + 4 + 12 * i) for i in range(n)]
+
+    at = tables[PCF_BITMAPS] + 4
+    offsets = struct.unpack_from(">%dI" % n, data, at + 4)
+    bits = at + 4 + 4 * n + 16
+
+    at = tables[PCF_BDF_ENCODINGS] + 4
+    c_lo, c_hi, r_lo, r_hi, _ = struct.unpack_from(">5h", data, at)
+    cols = c_hi - c_lo + 1
+    table = struct.unpack_from(">%dH" % (cols * (r_hi - r_lo + 1)), data, at + 10)
+
+    font = {"ascent": ascent, "descent": descent, "glyphs": {},
+            "bbox": (maxb[1] - minb[0], maxb[3] + maxb[4], minb[0], -maxb[4])}
+    for i, index in enumerate(table):
+        if index == 0xFFFF: continue
+        left, right, width, up, down, _ = metrics_[index]
+        w, h = right - left, up + down
+        stride, row_bytes = 4 * ((w + 31) // 32), (w + 7) // 8
+        rows = [int.from_bytes(data[bits + offsets[index] + y * stride:][:row_bytes], "big") for y in range(h)]
+        code = (r_lo + i // cols) << 8 | (c_lo + i % cols)
+        font["glyphs"][code] = {"code": code, "dwidth": width, "bbx": (w, h, left, -down), "rows": rows}
+    return font
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("fonts", nargs="*", help="BDF files (default: fonts/*.bdf)")
+    parser.add_argument("--source", default="code.py", help="file whose string literals set the character set")
+    parser.add_argument("--extra", default="", help="characters to keep in addition to the scanned ones")
+    args = parser.parse_args()
+
+    codes = {ord(c) for c in ui_chars(args.source) | set(args.extra)}
+    for bdf in args.fonts or sorted(glob.glob("fonts/*.bdf")):
+        pcf = os.path.splitext(bdf)[0] + ".pcf"
+        count = write_pcf(read_bdf(bdf), codes, pcf)
+        print("{}: {} glyphs, {} -> {} bytes".format(pcf, count, os.path.getsize(bdf), os.path.getsize(pcf)))
+
+
+if __name__ == "__main__":
+    main()
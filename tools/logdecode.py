@@ -0,0 +1,86 @@
+"""Turn the SD card logs code.py writes into CSV.
+
+Run on the host from the repo root, against the card's log directory:
+
+    python tools/logdecode.py /media/SD/log > log.csv       # every day, oldest first
+    python tools/logdecode.py /media/SD/log --day 2026-01-02 --kind battery
+    python tools/logdecode.py /media/SD/log --index         # one line per closed day
+    python tools/logdecode.py /media/SD/log --index --day 2026-01-02
+
+Each YYYYMMDD.bin is whole 512-byte sectors of 16-byte records: time, kind, a, b, c, d
+(little-endian "<IBBHii"). Kind 0 is sector padding and is skipped. index.bin is a ring of one
+16-byte entry per day (day number, sectors, records, flash writes, SD writes, steps), slot
+day % 32, written as each day closes.
+"""
+import argparse
+import calendar
+import csv
+import glob
+import os
+import struct
+import sys
+import time
+
+RECORD, INDEX = struct.Struct("<IBBHii"), struct.Struct("<IHHHHI")
+# kind: (name, column per field a, b, c, d; None where unused)
+KINDS = {1: ("battery", ("percent", "mv", "charging", "vbus")),
+         2: ("steps", ("hour", None, "steps", None)),
+         3: ("timer", ("countdown", None, "seconds", "laps")),
+         4: ("boot", ("over_budget", "phases", "ms", "free")),
+         5: ("writes", (None, None, "flash_writes", "sd_writes"))}
+COLUMNS = ["time", "kind"] + list(dict.fromkeys(c for _, cols in KINDS.values() for c in cols if c))
+
+
+def records(path):
+    with open(path, "rb") as f: data = f.read()
+    for t, kind, *fields in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+        if kind: yield t, kind, fields
+
+
+def row(t, kind, fields):
+    name, cols = KINDS.get(kind, ("kind{}".format(kind), ("a", "b", "c", "d")))
+    out = {"time": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(t)), "kind": name}
+    out.update((col, value) for col, value in zip(cols, fields) if col)
+    return out
+
+
+def read_index(log_dir):
+    try:
+        with open(os.path.join(log_dir, "index.bin"), "rb") as f: data = f.read()
+    except OSError: return []
+    return sorted(entry for entry in INDEX.iter_unpack(data) if entry[0])
+
+
+def day_file(log_dir, day):
+    return os.path.join(log_dir, time.strftime("%Y%m%d", time.gmtime(day * 86400)) + ".bin")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("log_dir", help="the card's log directory")
+    parser.add_argument("--day", help="only this day, YYYY-MM-DD")
+    parser.add_argument("--kind", choices=sorted(name for name, _ in KINDS.values()), help="only these records")
+    parser.add_argument("--index", action="store_true", help="print the day index instead of the records")
+    args = parser.parse_args()
+
+    day = calendar.timegm(time.strptime(args.day, "%Y-%m-%d")) // 86400 if args.day else None
+    if args.index:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["date", "sectors", "records", "flash_writes", "sd_writes", "steps"])
+        for entry in read_index(args.log_dir):
+            if day is None or entry[0] == day:
+                writer.writerow([time.strftime("%Y-%m-%d", time.gmtime(entry[0] * 86400))] + list(entry[1:]))
+        return
+    if day is not None: paths = [day_file(args.log_dir, day)]
+    else: paths = sorted(glob.glob(os.path.join(args.log_dir, "[0-9]" * 8 + ".bin")))
+    writer = csv.DictWriter(sys.stdout, COLUMNS)
+    writer.writeheader()
+    for path in paths:
+        if not os.path.exists(path): print("no log for", args.day, file=sys.stderr); continue
+        for t, kind, fields in records(path):
+            r = row(t, kind, fields)
+            if not args.kind or r["kind"] == args.kind: writer.writerow(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1542 @@
+"""Run code.py on the host against stand-in CircuitPython modules and report what it costs.
+
+Run on the host from the repo root:
+
+    python tools/sim.py                               # every scenario, report on stdout
+    python tools/sim.py --scenario clock_hour --out bench.json
+    python tools/sim.py --trace touches.json --seconds 60 --ppm frames/
+    python tools/sim.py --out new.json --compare bench.json   # exit 1 if a count grew
+
+The stand-ins cover board, displayio, bitmaptools, terminalio, rtc, busio, microcontroller,
+supervisor, storage, sdcardio, alarm and the Adafruit libraries code.py imports. Time is virtual:
+time.sleep() and light sleep move a nanosecond clock forward, so an hour on the watch runs in
+seconds. A trace is a JSON list of [t, x, y, duration] touches in virtual seconds; a touch given
+as [t, x, y, duration, x2, y2] slides to (x2, y2) over its duration, which is a swipe.
+
+Every handler a touch fires is listed under "routed" as [t_ms, page, region, action, page after],
+the action named by the function that made the handler and its constants: go('timer'),
+settings_step(0, True), back() for the [X] corner. The tour scenario, and --trace given --expect,
+fail the run unless the touches fire exactly the [page, action, page after] listed:
+
+    python tools/sim.py --trace touches.json --expect routes.json
+
+An acceleration trace is a CSV of x,y,z in mg at 10 Hz, with an optional "# steps N" line giving
+the true count. It feeds a LIS3DH FIFO at 0x19, and the report compares code.py's step count with
+the truth and times each FIFO batch. "# raise T" lines mark wrist raises starting at T seconds;
+INT1 is worked out from the 6D registers code.py sets, and the report counts lift wakes, the ones
+no raise explains, the raises missed and the delay from the interrupt to a lit frame. A raise
+while the screensaver is up counts as a wake once it ends the saver. The lift scenario fails if a
+raise is missed:
+
+    python tools/sim.py --accel walk.csv
+
+An SD card is present unless --no-sd is given. Its writes are counted apart from flash writes, and
+--sd DIR copies what is on it after each run, for tools/logdecode.py:
+
+    python tools/sim.py --scenario log_day --sd card/ && python tools/logdecode.py card/log_day/log
+
+Each refresh closes a frame. Per frame the report has the host time spent in that scheduler pass,
+the bytes allocated during it (tracemalloc, so the stand-ins' own allocations are included) and
+the widget writes it made. Touches also get the virtual delay from finger down to the frame
+showing it. Counts (widget writes, I2C transactions, refreshes, file writes) are deterministic
+and comparable between machines; host times are only comparable on one machine.
+
+A scenario can also time something inside the run, reported under "bench": outline builds a clock
+field as the 17-Label stack code.py used to draw and as the sprite-sheet TileGrid, and compares
+build cost, a minute of ticks and the area displayio composites for each. pages registers 40 more
+pages and times switching to each, cold and warm, and the walk displayio makes for dirty areas with
+only the active page attached and with every built page attached and hidden. fonts loads the
+compiled .pcf and the .bdf code.py falls back to, with the heap and glyphs each gives; the device
+prints the same per file at boot with FONT_COMPARE set. timer_drift runs a stopwatch and a one-hour
+countdown with every sleep overrunning by up to 8 ms, and fails unless each shown second turns
+over, and the countdown ends, within 10 ms of the true time. i2c_bus drives the I2C bus manager
+against a mock device (bursts, shadow, TTL reads, writes, streamed reads, a NAK) and fails on any
+difference. saver_cover lets the screensaver cover the set page and the calendar with edits on
+them, and fails unless both are as they were when it ends. snake_evict tears the snake page down
+under a running game and fails unless the rebuilt playfield shows the game. cycle_colours fails
+unless its burst of settings taps reaches the settings file as one write.
+
+The display draws the group tree into a 240x240 RGB framebuffer: labels use the
+file code.py loads from fonts/, shapes are drawn from their size, radius and stroke. It is close
+to the panel, not exact.
+
+Any scenario fails if a label is given a character its font has no glyph for; the .pcf is a
+subset, so a new string can need tools/fontsubset.py run again. It also fails if .color is set on
+a label themed_label has pointed at a shared palette, which would recolour the whole role.
+"""
+import argparse
+import ast
+import bisect
+import builtins
+import calendar
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time as host_time
+import tracemalloc
+import types
+import zlib
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fontsubset import read_bdf, read_pcf
+
+NS = 1000000000
+WIDTH = HEIGHT = 240
+EPOCH = calendar.timegm((2026, 1, 1, 9, 0, 0))  # RTC at boot
+SPIN_LIMIT = 200000  # clock reads without a sleep before the run counts as a busy loop
+KEEP_ALIVE = (20, 150)  # a spot on the clock face with no handler
+HEAP = 8 * 1024 * 1024  # gc.mem_free() is this less what tracemalloc sees, the harness included
+
+
+class Stop(Exception):
+    pass
+
+
+class Run:
+    """Everything one code.py run touches; the stand-ins read and write the current one."""
+
+    def __init__(self, seconds, trace, root, readonly=False, render=False, alloc=True, accel=None, card=True, calls=()):
+        self.limit, self.trace, self.root = int(seconds * NS), sorted(trace), root
+        self.calls, self.namespace = sorted(((int(t * NS), fn) for t, fn in calls), key=lambda c: c[0]), None
+        self.card, self.sd = card, False
+        self.accel, self.accel_read, self.batch_t0, self.batches = accel, 0, 0, []
+        self.int_clear, self.int_key, self.int_events, self.lifts, self.lift_latency, self.pending_lift = -1, None, [], [], [], None
+        self.saver_lift = None  # (line high at, pass) for a latch read while the screensaver is up
+        self.readonly, self.render, self.alloc = readonly, render, alloc
+        self.vt, self.rtc_offset, self.spin = NS, 0, 0  # boot at 1 s; traces should start after it
+        self.mut, self.i2c, self.i2c_regs, self.counts = Counter(), {}, {}, Counter()
+        self.i2c_fail = set()  # addresses that NAK, as a device gone from the bus
+        self.frames, self.touches, self.console = [], [], []
+        self.bench = {}  # measurements scenario calls make inside the run
+        self.routed = []  # (t_ms, page, region, action, page after) per handler a touch fired
+        self.writes = Counter()  # path: opens for writing, and renames onto it
+        self.missing = Counter()
+        self.shared_color = []  # texts of themed labels given a .color, which recolours the whole role  # (font, char): times a Label was given a character its font lacks
+        self.jitter, self.rng, self.watch = 0, random.Random(6), []  # sleep overrun (ns, up to); per-frame hooks
+        self.seen_touch, self.pending_touches = None, []
+        self.boot, self.display, self.fb = None, None, None
+        self.pass_t0 = self.pass_mem = self.pass_mut = 0
+        self.nvm = NVM(8192)
+        self.starts = [int(t[0] * NS) for t in self.trace]
+
+    def mutated(self, kind, n=1):
+        self.mut[kind] += n
+
+    def i2c_count(self, addr, nbytes):
+        entry = self.i2c.setdefault("0x%02X" % addr, {"transactions": 0, "bytes": 0})
+        entry["transactions"] += 1; entry["bytes"] += nbytes
+
+    def start_pass(self):
+        self.spin = 0
+        self.pass_mut = sum(self.mut.values())
+        if self.alloc:
+            tracemalloc.reset_peak(); self.pass_mem = tracemalloc.get_traced_memory()[0]
+        self.pass_t0 = host_time.perf_counter_ns()
+
+    def end_pass(self):
+        # Called as the loop goes to sleep; the first pass also carries all of boot
+        self.counts["passes"] += 1
+        if self.batch_t0: self.batches.append((host_time.perf_counter_ns() - self.batch_t0) // 1000); self.batch_t0 = 0
+        if self.boot is None:
+            self.boot = {"host_ms": round((host_time.perf_counter_ns() - self.pass_t0) / 1e6, 2),
+                         "alloc_bytes": self.allocated(), "mutations": dict(self.mut),
+                         "i2c_transactions": sum(e["transactions"] for e in self.i2c.values())}
+
+    def allocated(self):
+        if not self.alloc: return 0
+        return max(0, tracemalloc.get_traced_memory()[1] - self.pass_mem)
+
+    def frame(self):
+        host_us = (host_time.perf_counter_ns() - self.pass_t0) // 1000
+        record = {"t_ms": self.vt // 1000000, "host_us": host_us, "alloc_bytes": self.allocated(),
+                  "mutations": sum(self.mut.values()) - self.pass_mut, "boot": self.boot is None}
+        for t0 in self.pending_touches:
+            self.touches.append({"t_ms": t0 // 1000000, "latency_ms": round((self.vt - t0) / 1e6, 3), "host_us": host_us})
+        self.pending_touches = []
+        if self.saver_lift and self.saver_lift[1] == self.counts["passes"] and self.namespace.get("current_page") != "matrix":
+            self.lifts.append(self.saver_lift[0]); self.pending_lift = self.saver_lift[0]; self.saver_lift = None
+        if self.pending_lift is not None and self.display.brightness > 0:
+            self.lift_latency.append((round((self.vt - self.pending_lift) / 1e6, 3), host_us)); self.pending_lift = None
+        if self.namespace and self.namespace.get("current_page") == "snake": record["snake_len"] = self.namespace["snake"]["len"]
+        if self.namespace and self.namespace.get("current_page") == "matrix": record["rain"] = True
+        for fn in self.watch: fn(self.namespace)
+        if self.render:
+            fb = render(self.display)
+            record["pixels"] = changed_pixels(self.fb, fb); self.fb = fb
+        self.frames.append(record)
+
+    def advance(self, until):
+        self.vt = max(self.vt, until)
+        if self.vt >= self.limit: raise Stop()
+        while self.calls and self.calls[0][0] <= self.vt: self.calls.pop(0)[1](self.namespace)
+
+    def clock_read(self):
+        self.spin += 1
+        if self.spin > SPIN_LIMIT: raise RuntimeError("busy loop: {} clock reads without sleeping".format(self.spin))
+        return self.vt
+
+    def touch_at(self, vt):
+        # Touches do not overlap, so only the last one to start can still be down
+        i = bisect.bisect_right(self.starts, vt) - 1
+        if i < 0 or vt >= self.starts[i] + int(self.trace[i][3] * NS): return None
+        t, x, y, duration, *to = self.trace[i]
+        if to:
+            f = (vt - self.starts[i]) / (duration * NS)
+            x, y = round(x + (to[0] - x) * f), round(y + (to[1] - y) * f)
+        return i, x, y
+
+    def next_touch(self, vt):
+        i = bisect.bisect_left(self.starts, vt)
+        return self.starts[i] if i < len(self.starts) else None
+
+
+R = None  # the current Run
+
+
+# time, rtc
+
+def monotonic_ns():
+    return R.clock_read()
+
+
+def sleep(seconds):
+    R.end_pass(); R.counts["sleeps"] += 1
+    R.advance(R.vt + int(seconds * NS) + (R.rng.randrange(R.jitter) if R.jitter else 0))
+    R.start_pass()
+
+
+def wall_time():
+    return EPOCH + R.rtc_offset + R.vt // NS
+
+
+def stand_in_time():
+    return module("time", monotonic_ns=monotonic_ns, monotonic=lambda: R.clock_read() / NS, sleep=sleep,
+                  time=wall_time, localtime=lambda secs=None: host_time.gmtime(wall_time() if secs is None else secs),
+                  mktime=lambda t: calendar.timegm(tuple(t)[:6]), struct_time=host_time.struct_time)
+
+
+class RTC:
+    @property
+    def datetime(self):
+        return host_time.gmtime(wall_time())
+
+    @datetime.setter
+    def datetime(self, value):
+        R.counts["rtc_sets"] += 1
+        R.rtc_offset = calendar.timegm(tuple(value)[:6]) - EPOCH - R.vt // NS
+
+
+# displayio, bitmaptools
+
+class Node:
+    _tracked = ("x", "y", "hidden")
+
+    def __setattr__(self, name, value):
+        if name in self._tracked and "_live" in self.__dict__ and getattr(self, name, None) != value:
+            R.mutated("move" if name in ("x", "y") else name)
+        object.__setattr__(self, name, value)
+
+
+class Group(Node):
+    def __init__(self, *, scale=1, x=0, y=0):
+        self.x, self.y, self.scale, self.hidden, self._items, self._parent = x, y, scale, False, [], None
+        self._live = True
+
+    def _adopt(self, item):
+        if getattr(item, "_parent", None) is not None: raise ValueError("Layer already in a group")
+        object.__setattr__(item, "_parent", self); R.mutated("group")
+
+    def append(self, item):
+        self._adopt(item); self._items.append(item)
+
+    def insert(self, index, item):
+        self._adopt(item); self._items.insert(index, item)
+
+    def index(self, item):
+        for i, x in enumerate(self._items):
+            if x is item: return i
+        raise ValueError("object not in group")
+
+    def pop(self, index=-1):
+        item = self._items.pop(index)
+        object.__setattr__(item, "_parent", None); R.mutated("group")
+        return item
+
+    def remove(self, item):
+        self.pop(self.index(item))
+
+    def __contains__(self, item):
+        return any(x is item for x in self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index, item):
+        self.pop(index); self.insert(index, item)
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        self.width, self.height, self.value_count = width, height, value_count
+        self.data = bytearray(width * height)
+
+    def __getitem__(self, key):
+        return self.data[key[1] * self.width + key[0] if isinstance(key, tuple) else key]
+
+    def __setitem__(self, key, value):
+        R.mutated("pixel")
+        self.data[key[1] * self.width + key[0] if isinstance(key, tuple) else key] = value
+
+    def fill(self, value):
+        R.mutated("fill"); self.data[:] = bytes([value]) * len(self.data)
+
+
+class Palette:
+    def __init__(self, color_count):
+        self.colors, self.clear = [0] * color_count, [False] * color_count
+
+    def __len__(self):
+        return len(self.colors)
+
+    def __getitem__(self, index):
+        return self.colors[index]
+
+    def __setitem__(self, index, color):
+        R.mutated("palette"); self.colors[index] = color
+
+    def make_transparent(self, index):
+        R.mutated("palette"); self.clear[index] = True
+
+    def make_opaque(self, index):
+        R.mutated("palette"); self.clear[index] = False
+
+    def is_transparent(self, index):
+        return self.clear[index]
+
+
+class TileGrid(Node):
+    _tracked = ("x", "y", "hidden", "pixel_shader", "bitmap")
+
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None, tile_height=None,
+                 default_tile=0, x=0, y=0):
+        self.bitmap, self.pixel_shader, self.width, self.height = bitmap, pixel_shader, width, height
+        self.tile_width = tile_width or bitmap.width
+        self.tile_height = tile_height or bitmap.height
+        self.x, self.y, self.hidden, self._parent = x, y, False, None
+        self.tiles = bytearray([default_tile]) * (width * height)
+        self._live = True
+
+    def __getitem__(self, index):
+        return self.tiles[index[1] * self.width + index[0] if isinstance(index, tuple) else index]
+
+    def __setitem__(self, index, tile):
+        R.mutated("tile")
+        self.tiles[index[1] * self.width + index[0] if isinstance(index, tuple) else index] = tile
+
+
+def fill_region(bitmap, x1, y1, x2, y2, value):
+    R.mutated("fill_region")
+    x1, y1, x2, y2 = max(0, min(x1, x2)), max(0, min(y1, y2)), min(bitmap.width, max(x1, x2)), min(bitmap.height, max(y1, y2))
+    row = bytes([value]) * max(0, x2 - x1)
+    for y in range(y1, y2): bitmap.data[y * bitmap.width + x1:y * bitmap.width + x2] = row
+
+
+def blit(dest, source, x, y, *, x1=0, y1=0, x2=None, y2=None, skip_source_index=None, skip_dest_index=None, skip_index=None):
+    R.mutated("blit")
+    x2 = source.width if x2 is None else x2; y2 = source.height if y2 is None else y2
+    skip = skip_index if skip_source_index is None else skip_source_index
+    for sy in range(y1, y2):
+        dy = y + sy - y1
+        if not 0 <= dy < dest.height: continue
+        for sx in range(x1, x2):
+            dx = x + sx - x1
+            if not 0 <= dx < dest.width: continue
+            value = source.data[sy * source.width + sx]
+            if value == skip or (skip_dest_index is not None and dest.data[dy * dest.width + dx] == skip_dest_index): continue
+            dest.data[dy * dest.width + dx] = value
+
+
+class Display:
+    width = height = WIDTH
+
+    def __init__(self):
+        self.auto_refresh, self.root_group, self._brightness = True, None, 1.0
+        self.last_refresh = self.last_paced = 0
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        if value != self._brightness: R.mutated("brightness")
+        self._brightness = value
+
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        # As the core does it: a paced call more than a frame after the last paced call drops the
+        # frame and returns False; otherwise it waits for the next frame boundary after the last
+        # real refresh, then draws
+        if target_frames_per_second:
+            frame_ns, since_call = NS // target_frames_per_second, R.vt - self.last_paced
+            self.last_paced = R.vt
+            if since_call > frame_ns: R.counts["dropped_frames"] += 1; return False
+            R.vt += frame_ns - (R.vt - self.last_refresh) % frame_ns
+        R.counts["refresh"] += 1; self.last_refresh = R.vt; R.frame()
+        return True
+
+
+# fonts, labels, shapes
+
+class Glyph:
+    def __init__(self, bitmap, width, height, dx, dy, shift_x):
+        self.bitmap, self.width, self.height, self.dx, self.dy = bitmap, width, height, dx, dy
+        self.shift_x, self.shift_y, self.tile_index = shift_x, 0, 0
+
+
+class Font:
+    """A font from fonts/, read from the .pcf or .bdf code.py asks for."""
+
+    def __init__(self, path, advance=None, bbox=None):
+        self.bdf, self.advance = (read_pcf if path.endswith(".pcf") else read_bdf)(path), advance
+        self.name = os.path.basename(path)
+        self.glyphs = {}
+        if bbox: self.bdf["bbox"] = bbox
+
+    def get_bounding_box(self):
+        return self.bdf["bbox"]
+
+    def load_glyphs(self, codes):
+        for code in codes: self.get_glyph(code)
+
+    def get_glyph(self, code):
+        if code not in self.glyphs:
+            g = self.bdf["glyphs"].get(code)
+            if g is None: return None
+            w, h, dx, dy = g["bbx"]
+            bitmap, row_bits = Bitmap(max(1, w), max(1, h), 2), 8 * ((w + 7) // 8)
+            for y, row in enumerate(g["rows"][:h]):
+                for x in range(w): bitmap.data[y * bitmap.width + x] = row >> (row_bits - 1 - x) & 1
+            self.glyphs[code] = Glyph(bitmap, w, h, dx, dy, self.advance or g["dwidth"])
+        return self.glyphs[code]
+
+
+def load_font(path, **metrics):
+    name = os.path.basename(path)
+    local = os.path.join(REPO, "fonts", name if os.path.splitext(name)[1] else name + ".bdf")
+    if not os.path.exists(local): raise OSError(2, "No such file", path)
+    return Font(local, **metrics)
+
+
+class Label(Group):
+    """Glyph TileGrids under a scaled group, rebuilt on every text change like the real Label."""
+
+    def __init__(self, font, *, text="", color=0xFFFFFF, scale=1, x=0, y=0, anchor_point=None,
+                 anchored_position=None, line_spacing=1.25, **kwargs):
+        super().__init__(scale=scale, x=x, y=y)
+        object.__setattr__(self, "line_spacing", line_spacing)
+        w, h, bx, by = font.get_bounding_box()
+        object.__setattr__(self, "font", font)
+        object.__setattr__(self, "_ascent", h + by)
+        object.__setattr__(self, "_descent", -by)
+        object.__setattr__(self, "_palette", Palette(2))
+        object.__setattr__(self, "_own_palette", self._palette)  # themed_label swaps in a shared one
+        self._palette.clear[0] = True; self._palette.colors[1] = color
+        object.__setattr__(self, "_local_group", self)
+        object.__setattr__(self, "_anchor", [anchor_point, anchored_position])
+        object.__setattr__(self, "_text", None)
+        object.__setattr__(self, "_width", 0)
+        self._set_text(str(text))
+
+    def _set_text(self, text):
+        for tg in list(self._items): object.__setattr__(tg, "_parent", None)
+        self._items = []
+        pen, width, y_offset = 0, 0, self._ascent // 2
+        for c in text:
+            if c == "\n":
+                pen, y_offset = 0, y_offset + int((self._ascent + self._descent) * self.line_spacing); continue
+            g = self.font.get_glyph(ord(c))
+            if g is None: R.missing[self.font.name, c] += 1; continue  # the real Label skips it too
+            tg = TileGrid(g.bitmap, pixel_shader=self._palette, x=pen + g.dx, y=y_offset - g.height - g.dy)
+            object.__setattr__(tg, "_parent", self); self._items.append(tg)
+            pen += g.shift_x; width = max(width, pen)
+        object.__setattr__(self, "_text", text); object.__setattr__(self, "_width", width)
+        self._place()
+
+    def _place(self):
+        point, position = self._anchor
+        if point is None or position is None: return
+        top = self._ascent // 2 - self._ascent
+        object.__setattr__(self, "x", int(position[0] - point[0] * self._width * self.scale))
+        object.__setattr__(self, "y", int(position[1] - (point[1] * (self._ascent + self._descent) + top) * self.scale))
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        R.mutated("label_text")
+        if str(value) != self._text: R.mutated("label_text_changed"); self._set_text(str(value))
+
+    @property
+    def color(self):
+        return self._palette[1]
+
+    @color.setter
+    def color(self, value):
+        R.mutated("label_color"); self._palette.colors[1] = value
+        if self._palette is not self._own_palette: R.shared_color.append(self._text)
+
+    @property
+    def anchor_point(self):
+        return self._anchor[0]
+
+    @anchor_point.setter
+    def anchor_point(self, value):
+        self._anchor[0] = value; self._place()
+
+    @property
+    def anchored_position(self):
+        return self._anchor[1]
+
+    @anchored_position.setter
+    def anchored_position(self, value):
+        R.mutated("move"); self._anchor[1] = value; self._place()
+
+
+class Shape(TileGrid):
+    """Rect: 0 fill, 1 outline. RoundRect and Circle: 0 clear, 1 outline, 2 fill."""
+    _fill_index = 0
+
+    def __init__(self, x, y, width, height, r=0, *, fill=None, outline=None, stroke=1):
+        rounded = self._fill_index == 2
+        palette = Palette(3 if rounded else 2)
+        bitmap = Bitmap(width, height, len(palette))
+        for py in range(height):
+            for px in range(width):
+                inside, edge = corner(px, py, width, height, r, stroke)
+                if inside: bitmap.data[py * width + px] = 1 if edge and outline is not None else self._fill_index
+        super().__init__(bitmap, pixel_shader=palette, x=x, y=y)
+        if rounded: palette.clear[0] = True
+        for index, color in ((self._fill_index, fill), (1, outline)):
+            if color is None: palette.clear[index] = True
+            else: palette.colors[index] = color
+
+    def _shade(self, index, color):
+        pal = self.pixel_shader
+        if color is None: pal.make_transparent(index)
+        else: pal[index] = color; pal.make_opaque(index)
+
+    fill = property(lambda self: None, lambda self, c: (R.mutated("shape_fill"), self._shade(self._fill_index, c)))
+    outline = property(lambda self: None, lambda self, c: (R.mutated("shape_outline"), self._shade(1, c)))
+
+
+def corner(px, py, width, height, r, stroke):
+    # (inside, on the outline) for a rounded rectangle of radius r
+    cx = r if px < r else width - 1 - r if px > width - 1 - r else px
+    cy = r if py < r else height - 1 - r if py > height - 1 - r else py
+    if (cx, cy) == (px, py):
+        return True, px < stroke or py < stroke or px >= width - stroke or py >= height - stroke
+    d2 = (px - cx) ** 2 + (py - cy) ** 2
+    return d2 <= r * r + r, d2 > (r - stroke) ** 2 + (r - stroke)
+
+
+class Rect(Shape):
+    def __init__(self, x, y, width, height, *, fill=None, outline=None, stroke=1):
+        super().__init__(x, y, width, height, 0, fill=fill, outline=outline, stroke=stroke)
+
+
+class RoundRect(Shape):
+    _fill_index = 2
+
+    def __init__(self, x, y, width, height, r, *, fill=None, outline=None, stroke=1):
+        super().__init__(x, y, width, height, r, fill=fill, outline=outline, stroke=stroke)
+
+
+class Circle(RoundRect):
+    def __init__(self, x0, y0, r, *, fill=None, outline=None, stroke=1):
+        super().__init__(x0 - r, y0 - r, 2 * r + 1, 2 * r + 1, r, fill=fill, outline=outline, stroke=stroke)
+
+
+# I2C, touch, power, storage
+
+PMU_DEFAULTS = {0x00: 0x00, 0x01: 0x40, 0x30: 0x00}  # discharging (0x01 bits 6:5 = 10), no VBUS
+
+
+def pmu_regs(addr, regs):
+    # The AXP2101 gauge drains 1% every 6 virtual minutes from 87%, VBAT following it
+    if addr == 0x34:
+        percent = max(0, 87 - R.vt // (360 * NS))
+        mv = 3300 + percent * 9
+        regs[0xA4], regs[0x34], regs[0x35] = percent, mv >> 8 & 0x3F, mv & 0xFF
+    return regs
+
+
+LIS3DH_ADDR, LIS3DH_HZ, LIS3DH_FIFO, LIS3DH_INT = 0x19, 10, 32, "GPIO14"
+FT6336_ADDR = 0x38
+
+
+def lis3dh_events():
+    # Times INT1 latches: 6D movement into Z high (the other axes inside the threshold), held for
+    # INT1_DURATION samples. Only the configuration code.py uses is modelled.
+    regs = R.i2c_regs.get(LIS3DH_ADDR)
+    if not R.accel or regs is None or not regs[0x22] & 0x40 or regs[0x30] & 0xE0 != 0x60: return []
+    key = bytes(regs[0x30:0x34])
+    if key != R.int_key:
+        limit, hold, run, R.int_events = (regs[0x32] & 0x7F) * 16, regs[0x33], 0, []
+        for i, (x, y, z) in enumerate(R.accel["samples"]):
+            run = run + 1 if z > limit and abs(x) < limit and abs(y) < limit else 0
+            if run == hold + 1: R.int_events.append((i + 1) * NS // LIS3DH_HZ)
+        R.int_key = key
+    return R.int_events
+
+
+def lis3dh_int():
+    # When the latched line goes (or went) high since INT1_SRC was last read, or None
+    events = lis3dh_events()
+    i = bisect.bisect_right(events, R.int_clear)
+    return events[i] if i < len(events) else None
+
+
+def lis3dh_read(reg, buf, start, end):
+    # WHO_AM_I, INT1_SRC, FIFO_SRC and FIFO bursts from OUT_X_L (auto-increment wraps every six bytes)
+    acc, due = R.accel["samples"], min(len(R.accel["samples"]), R.vt * LIS3DH_HZ // NS)
+    reg &= 0x7F
+    if reg == 0x0F: buf[start] = 0x33; return True
+    if reg == 0x31:
+        fired = lis3dh_int()
+        fired = fired if fired is not None and fired <= R.vt else None
+        buf[start] = 0x60 if fired is not None else 0; R.int_clear = R.vt
+        if fired is not None and R.display.brightness > 0 and R.namespace.get("current_page") == "matrix":
+            R.saver_lift = (fired, R.counts["passes"])  # a wake if this pass ends the screensaver
+        return True
+    if reg == 0x2F:
+        n = due - R.accel_read
+        if n >= LIS3DH_FIFO: R.accel_read = due - LIS3DH_FIFO; R.counts["accel_overruns"] += n > LIS3DH_FIFO
+        buf[start] = 0x40 | 0x1F if n >= LIS3DH_FIFO else n | (0x20 if not n else 0)
+        return True
+    if reg == 0x28:
+        R.batch_t0 = host_time.perf_counter_ns()
+        for i in range(start, end - 5, 6):
+            sample = acc[min(R.accel_read, len(acc) - 1)]; R.accel_read += 1
+            for j, v in enumerate(sample):
+                v = (max(-2048, min(2047, int(v))) << 4) & 0xFFFF
+                buf[i + 2 * j], buf[i + 2 * j + 1] = v & 0xFF, v >> 8
+        return True
+    return False
+
+
+class I2CDevice:
+    def __init__(self, i2c, device_address, probe=True):
+        self.addr = device_address
+        self.regs = R.i2c_regs.setdefault(device_address, bytearray(256))
+        if device_address == 0x34 and not any(self.regs):
+            for reg, value in PMU_DEFAULTS.items(): self.regs[reg] = value
+
+    def __enter__(self):
+        if self.addr in R.i2c_fail: raise OSError(19, "No such device")
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def readinto(self, buf, *, start=0, end=None):
+        end = len(buf) if end is None else end
+        R.i2c_count(self.addr, end - start); buf[start:end] = bytes(end - start)
+
+    def write(self, buf, *, start=0, end=None):
+        data = bytes(buf[start:len(buf) if end is None else end])
+        R.i2c_count(self.addr, len(data))
+        if len(data) > 1: self.regs[data[0]:data[0] + len(data) - 1] = data[1:]
+
+    def write_then_readinto(self, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+        reg = out_buffer[out_start]
+        in_end = len(in_buffer) if in_end is None else in_end
+        regs = pmu_regs(self.addr, self.regs)
+        R.i2c_count(self.addr, (len(out_buffer) if out_end is None else out_end) - out_start + in_end - in_start)
+        if self.addr == LIS3DH_ADDR and R.accel and lis3dh_read(reg, in_buffer, in_start, in_end): return
+        if self.addr == FT6336_ADDR: ft6336_read(reg, in_buffer, in_start, in_end); return
+        in_buffer[in_start:in_end] = regs[reg:reg + in_end - in_start]
+
+
+def ft6336_read(reg, buf, start, end):
+    # TD_STATUS and the first point's registers from the trace; a touch counts as seen once read
+    regs, hit = bytearray(16), R.touch_at(R.vt)
+    if hit is None: R.seen_touch = None
+    else:
+        index, x, y = hit
+        regs[0x02], regs[0x03], regs[0x04], regs[0x05], regs[0x06] = 1, 0x80 | x >> 8, x & 0xFF, y >> 8, y & 0xFF
+        if index != R.seen_touch and end - start > 1:
+            R.seen_touch = index; R.pending_touches.append(R.starts[index])
+    buf[start:end] = regs[reg:reg + end - start]
+
+
+class PinAlarm:
+    def __init__(self, pin, value=False, edge=False, pull=False):
+        self.pin, self.value = pin, value
+
+
+class TimeAlarm:
+    def __init__(self, *, monotonic_time=None, epoch_time=None):
+        self.monotonic_time = monotonic_time
+
+
+def light_sleep_until_alarms(*alarms):
+    # Wakes at the earliest TimeAlarm, the next finger down or INT1; a level already there wakes at once
+    R.end_pass(); R.counts["light_sleeps"] += 1
+    wake, woke = R.limit, None
+    for a in alarms:
+        if isinstance(a, TimeAlarm) and a.monotonic_time is not None and math.ceil(a.monotonic_time * NS) < wake:
+            wake, woke = math.ceil(a.monotonic_time * NS), a  # rounding down could leave the clock where it was
+    for a in alarms:
+        if isinstance(a, PinAlarm) and a.pin == LIS3DH_INT:
+            lift = lis3dh_int()
+            if lift is not None and max(lift, R.vt) < wake: wake, woke = max(lift, R.vt), a
+        elif isinstance(a, PinAlarm):
+            touch = R.vt if R.touch_at(R.vt) else R.next_touch(R.vt)
+            if touch is not None and touch <= wake: wake, woke = touch, a
+    if isinstance(woke, PinAlarm) and woke.pin == LIS3DH_INT: R.lifts.append(wake); R.pending_lift = wake
+    R.advance(wake)
+    R.start_pass()
+    return woke
+
+
+class NVM(bytearray):
+    def __setitem__(self, index, value):
+        R.counts["nvm_writes"] += 1; super().__setitem__(index, value)
+
+
+class Pins:
+    def __getattr__(self, name):
+        return name
+
+
+def sim_path(path):
+    return os.path.join(R.root, path.lstrip("/")) if isinstance(path, str) and path.startswith("/") else path
+
+
+def on_sd(path):
+    return R.sd and isinstance(path, str) and path.startswith("/sd/")
+
+
+def sim_open(path, mode="r", *args, **kwargs):
+    if any(c in mode for c in "wax+"):
+        if R.readonly and not on_sd(path): raise OSError(30, "Read-only filesystem")
+        R.counts["sd_writes" if on_sd(path) else "file_writes"] += 1; R.writes[path] += 1
+    return open(sim_path(path), mode, *args, **kwargs)
+
+
+def stand_in_os():
+    def wrap(fn, write=False):
+        def call(*paths):
+            if write and R.readonly and not on_sd(paths[0]): raise OSError(30, "Read-only filesystem")
+            if write: R.counts["sd_ops" if on_sd(paths[0]) else "file_ops"] += 1
+            if fn is os.rename: R.writes[paths[1]] += 1
+            return fn(*[sim_path(p) for p in paths])
+        return call
+    return module("os", remove=wrap(os.remove, True), rename=wrap(os.rename, True), mkdir=wrap(os.mkdir, True),
+                  listdir=wrap(os.listdir), stat=wrap(os.stat), sync=lambda: None, sep="/")
+
+
+def getmount(path):
+    if path != "/sd" or not R.sd: raise OSError(22, "Invalid argument")
+    return object()
+
+
+def mount(vfs, path, readonly=False):
+    # Only the card: /sd maps to a directory in the run's root
+    if not R.card: raise OSError(19, "No such device")
+    os.makedirs(sim_path("/sd"), exist_ok=True); R.sd = True
+
+
+def mem_alloc():
+    return tracemalloc.get_traced_memory()[0] if R.alloc else 0
+
+
+def gc_collect():
+    R.counts["gc_collect"] += 1
+
+
+def module(name, **attrs):
+    m = types.ModuleType(name); m.__dict__.update(attrs)
+    return m
+
+
+def stand_ins():
+    R.display = Display()
+    mods = {
+        "board": module("board", DISPLAY=R.display, SD_SCK="SD_SCK", SD_MOSI="SD_MOSI", SD_MISO="SD_MISO", SD_CS="SD_CS"),
+        "displayio": module("displayio", Group=Group, Bitmap=Bitmap, Palette=Palette, TileGrid=TileGrid),
+        "bitmaptools": module("bitmaptools", fill_region=fill_region, blit=blit),
+        "terminalio": module("terminalio", FONT=load_font("scientificaBold-11", advance=6, bbox=(6, 12, 0, -2))),  # 6x12 like the built-in
+        "time": stand_in_time(),
+        "rtc": module("rtc", RTC=RTC),
+        "busio": module("busio", I2C=lambda scl, sda, frequency=100000: object(), SPI=lambda clock, MOSI=None, MISO=None: object()),
+        "microcontroller": module("microcontroller", pin=Pins(), nvm=R.nvm, cpu=module("cpu", temperature=41.0)),
+        "supervisor": module("supervisor", ticks_ms=lambda: R.vt // 1000000 & (1 << 29) - 1),
+        "gc": module("gc", collect=gc_collect, mem_free=lambda: max(0, HEAP - mem_alloc()), mem_alloc=mem_alloc),
+        "storage": module("storage", remount=lambda *a, **k: None, getmount=getmount, mount=mount, VfsFat=lambda card: card),
+        "sdcardio": module("sdcardio", SDCard=lambda spi, cs, baudrate=8000000: object()),
+        "os": stand_in_os(),
+        "adafruit_bus_device.i2c_device": module("adafruit_bus_device.i2c_device", I2CDevice=I2CDevice),
+        "adafruit_display_text.label": module("adafruit_display_text.label", Label=Label),
+        "adafruit_bitmap_font.bitmap_font": module("adafruit_bitmap_font.bitmap_font", load_font=load_font),
+        "adafruit_display_shapes.rect": module("adafruit_display_shapes.rect", Rect=Rect),
+        "adafruit_display_shapes.circle": module("adafruit_display_shapes.circle", Circle=Circle),
+        "adafruit_display_shapes.roundrect": module("adafruit_display_shapes.roundrect", RoundRect=RoundRect),
+        "alarm.pin": module("alarm.pin", PinAlarm=PinAlarm),
+        "alarm.time": module("alarm.time", TimeAlarm=TimeAlarm),
+    }
+    mods["alarm"] = module("alarm", light_sleep_until_alarms=light_sleep_until_alarms,
+                           pin=mods["alarm.pin"], time=mods["alarm.time"])
+    for name in list(mods):
+        if "." in name:
+            package, attr = name.split(".", 1)
+            setattr(mods.setdefault(package, module(package)), attr, mods[name])
+    return mods
+
+
+# Framebuffer
+
+def render(display):
+    fb = bytearray(3 * WIDTH * HEIGHT)
+    if display.root_group is not None and display.brightness > 0: draw(fb, display.root_group, 0, 0, 1)
+    return fb
+
+
+def draw(fb, node, ox, oy, scale):
+    if node.hidden: return
+    if isinstance(node, Group):
+        ox, oy, scale = ox + node.x * scale, oy + node.y * scale, scale * node.scale
+        for item in node: draw(fb, item, ox, oy, scale)
+        return
+    bm, pal, tw, th = node.bitmap, node.pixel_shader, node.tile_width, node.tile_height
+    cols = max(1, bm.width // tw)
+    for ty in range(node.height):
+        for tx in range(node.width):
+            tile = node.tiles[ty * node.width + tx]
+            sx, sy = tile % cols * tw, tile // cols * th
+            x0, y0 = ox + (node.x + tx * tw) * scale, oy + (node.y + ty * th) * scale
+            for py in range(th):
+                for px in range(tw):
+                    value = bm.data[(sy + py) * bm.width + sx + px]
+                    if value < len(pal) and not pal.clear[value]:
+                        block(fb, x0 + px * scale, y0 + py * scale, scale, pal[value])
+
+
+def block(fb, x, y, size, color):
+    x0, y0, x1, y1 = max(0, x), max(0, y), min(WIDTH, x + size), min(HEIGHT, y + size)
+    if x0 >= x1 or y0 >= y1: return
+    row = bytes((color >> 16 & 0xFF, color >> 8 & 0xFF, color & 0xFF)) * (x1 - x0)
+    for yy in range(y0, y1): fb[3 * (yy * WIDTH + x0):3 * (yy * WIDTH + x1)] = row
+
+
+def changed_pixels(old, new):
+    if old is None: return WIDTH * HEIGHT
+    return sum(old[i:i + 3] != new[i:i + 3] for i in range(0, len(new), 3))
+
+
+def write_ppm(path, fb):
+    with open(path, "wb") as f: f.write(b"P6 %d %d 255\n" % (WIDTH, HEIGHT) + bytes(fb))
+
+
+# Scenarios: (virtual seconds, touch trace)
+
+def tap(t, x, y):
+    return [t, x, y, 0.1]
+
+
+def palette_size(source):
+    for node in ast.walk(ast.parse(open(source).read())):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "color_palette" for t in node.targets):
+            return len(node.value.elts)
+    return 12
+
+
+def clock_hour(source):
+    # A tap on a dead spot every 4 s keeps the screen on for the whole hour
+    return 3600, [tap(t, *KEEP_ALIVE) for t in range(4, 3600, 4)]
+
+
+def dark_hour(source):
+    return 3600, []
+
+
+def log_day(source):
+    # Dark from 09:00 through midnight, so the logger closes a day and rotates
+    return 16 * 3600, []
+
+
+def cycle_colours(source):
+    # Fails unless the burst of taps reaches the settings file as exactly one write
+    trace, t, n = [tap(2, 220, 220)], 3.0, palette_size(source)  # clock -> settings
+    for x, steps in ((40, n), (120, n), (200, 4), (200, -4)):  # text, outline, brightness up and down
+        for _ in range(abs(steps)):
+            trace.append(tap(t, x, 40 if steps > 0 else 120)); t += 0.3
+    trace.append(tap(t, 220, 220))  # [X] back to the clock; settings flush when the screen sleeps
+
+    def check(run_, ns):
+        taps, writes = len(trace) - 2, run_.writes[ns["SETTINGS_PATH"]]
+        return [] if writes == 1 else ["{} taps wrote {} {} times, not once".format(taps, ns["SETTINGS_PATH"], writes)]
+
+    return t + 10, trace, None, (), check
+
+
+def calendar_24(source):
+    trace = [tap(2, 40, 220)] + [tap(3 + 0.5 * i, 200, 20) for i in range(24)]
+    return 3 + 0.5 * 24 + 2, trace + [tap(3 + 0.5 * 24, 220, 220)]
+
+
+def tour(source):
+    # Every page and most of its controls, asserting the region each tap lands in: (x, y, page,
+    # action, page after). Where a control overlaps the [X] corner the [X] wins, as registered first.
+    steps = [(120, 90, "clock", "go('timer')", "timer"), (120, 100, "timer", "timer_toggle()", "timer"),
+             (120, 100, "timer", "timer_toggle()", "timer"), (220, 220, "timer", "back()", "clock"),
+             (220, 220, "clock", "go('settings')", "settings"), (40, 40, "settings", "settings_step(0, True)", "settings"),
+             (40, 120, "settings", "settings_step(0, False)", "settings"), (120, 220, "settings", "toggle_seconds()", "settings"),
+             (120, 220, "settings", "toggle_seconds()", "settings"), (40, 220, "settings", "go('set')", "set"),
+             (220, 220, "set", "back()", "settings"), (220, 220, "settings", "back()", "clock"),
+             (40, 220, "clock", "go('calendar')", "calendar"), (200, 20, "calendar", "calendar_step(1)", "calendar"),
+             (40, 20, "calendar", "calendar_step(-1)", "calendar"), (220, 220, "calendar", "back()", "clock"),
+             (120, 20, "clock", "go('extra')", "extra"), (40, 40, "extra", "go('calc')", "calc"),
+             (120, 120, "calc", "calc_press()", "calc"), (220, 220, "calc", "back()", "extra"),
+             (120, 40, "extra", "go('dice')", "dice"), (120, 180, "dice", "roll_dice()", "dice"),
+             (220, 220, "dice", "back()", "extra"), (200, 40, "extra", "go('8ball')", "8ball"),
+             (120, 100, "8ball", "ask_eight_ball()", "8ball"), (220, 220, "8ball", "back()", "extra"),
+             (120, 120, "extra", "go('snake')", "snake"), (120, 100, "snake", "snake_tap()", "snake"),
+             (220, 220, "snake", "back()", "extra"), (40, 120, "extra", "go('status')", "status"),
+             (40, 220, "status", "toggle_hud()", "status"), (120, 220, "status", "toggle_stream()", "status"),
+             (120, 220, "status", "toggle_stream()", "status"), (220, 220, "status", "back()", "extra"),
+             (220, 220, "extra", "back()", "clock")]
+    trace = [tap(2 + i, x, y) for i, (x, y, *_) in enumerate(steps)]
+    return 2 + len(steps) + 8, trace, None, [(0, trace_touches)], expect_routes([step[2:] for step in steps])
+
+
+def swipe(t, x, y, dx, dy):
+    return [t, x, y, 0.15, x + dx, y + dy]
+
+
+def snake(source):
+    # Swipe through a short game, then the demo kept within 16 cells of a full board: every 3 s it
+    # is laid out again that long, since it fills the rest in as many moves
+    trace = [tap(2, 120, 20), tap(3, 120, 120), tap(4, 120, 100)]
+    for i, (dx, dy) in enumerate(((0, 60), (-60, 0), (0, -60), (60, 0)) * 3):
+        trace.append(swipe(5 + i, 120, 100, dx, dy))
+    trace += [tap(t, 100, 215) for t in range(18, 120, 4)]  # below the playfield: keeps the screen on
+    calls = [(t, lambda ns: ns["snake_reset"](ns["SNAKE_CELLS"] - 16, "demo")) for t in range(18, 120, 3)]
+    return 120, trace, None, calls
+
+
+def snake_evict(source):
+    # A game left on the extra page while opening calc with memory short enough to tear the snake
+    # page down; back on snake, the rebuilt grid must show the body and food the game holds
+    shown, failures = {}, ["the test never ran"]
+
+    def tiles(ns):
+        grid = ns["snake_grid"]
+        return sorted((c, grid[c]) for c in range(ns["SNAKE_CELLS"]) if grid[c])
+
+    def held(ns):
+        bits, food = ns["snake_bits"], ns["snake"]["food"]
+        return sorted([(c, 1) for c in range(ns["SNAKE_CELLS"]) if bits[c >> 3] & 1 << (c & 7)] + [(food, 2)])
+
+    def short(ns):
+        shown["free"], ns["PAGE_MIN_FREE"] = ns["PAGE_MIN_FREE"], 1 << 30
+
+    def back(ns):
+        ns["PAGE_MIN_FREE"] = shown["free"]
+        del failures[:]
+        if ns["pages"]["snake"]["group"] is not None: failures.append("the snake page was not torn down")
+
+    def check(ns):
+        if ns["snake"]["state"] != "play": failures.append("the game is {}, not play".format(ns["snake"]["state"]))
+        if tiles(ns) != held(ns): failures.append("{} tiles shown after the rebuild for {} held".format(len(tiles(ns)), len(held(ns))))
+
+    trace = [tap(2, 120, 20), tap(3, 120, 120), tap(4, 120, 100), tap(5, 220, 220), tap(7, 40, 40), tap(8, 220, 220), tap(9, 120, 120)]
+    return 11, trace, None, [(6, short), (8.5, back), (9.5, check)], lambda run_, ns: failures
+
+
+def matrix(source):
+    # Left alone the clock times out into the screensaver and then goes dark; woken, the second
+    # screensaver is ended by a tap and the third runs out again
+    return 48, [tap(17, *KEEP_ALIVE), tap(25, *KEEP_ALIVE)]
+
+
+def saver_cover(source):
+    # The screensaver over a page with state its enter hook would reset: an hour stepped on set,
+    # then a month stepped on the calendar; each must still be there when a tap ends the saver
+    kept, failures = {}, ["the test never ran"]
+
+    def keep(key, value):
+        return lambda ns: kept.__setitem__(key, value(ns))
+
+    def expect(page, key, value):
+        def call(ns):
+            if failures[:1] == ["the test never ran"]: del failures[:]
+            if ns["current_page"] != page: failures.append("the saver ended on {}, not {}".format(ns["current_page"], page))
+            if value(ns) != kept[key]: failures.append("{} went from {} to {} under the saver".format(key, kept[key], value(ns)))
+        return call
+
+    set_val = lambda ns: list(ns["set_val"])
+    month = lambda ns: (ns["cal_view_year"], ns["cal_view_month"])
+    trace = [tap(2, 220, 220), tap(3, 40, 220), tap(4, 40, 40), tap(12, 120, 120),
+             tap(14, 220, 220), tap(15, 220, 220), tap(16, 40, 220), tap(17, 200, 20), tap(25, 120, 120)]
+    calls = [(5, keep("set_val", set_val)), (11, keep("saver", lambda ns: ns["current_page"])), (13, expect("set", "set_val", set_val)),
+             (18, keep("month", month)), (24, keep("saver 2", lambda ns: ns["current_page"])), (26, expect("calendar", "month", month))]
+    check = lambda run_, ns: failures + ["the saver was not up" for k in ("saver", "saver 2") if kept.get(k) != "matrix"]
+    return 28, trace, None, calls, check
+
+
+def area(node):
+    # Pixels displayio composites for a node on a full redraw: every TileGrid's box, scaled
+    if node.hidden: return 0
+    if isinstance(node, Group): return sum(area(item) for item in node) * node.scale * node.scale
+    return node.width * node.tile_width * node.height * node.tile_height
+
+
+def measure(update, values):
+    # Host time, bytes allocated and widget writes per call, off the run's own counters
+    host, allocs, writes = [], [], []
+    for value in values:
+        mut, t0 = sum(R.mut.values()), host_time.perf_counter_ns()
+        if R.alloc: tracemalloc.reset_peak(); mem = tracemalloc.get_traced_memory()[0]
+        update(value)
+        host.append((host_time.perf_counter_ns() - t0) // 1000)
+        allocs.append(max(0, tracemalloc.get_traced_memory()[1] - mem) if R.alloc else 0)
+        writes.append(sum(R.mut.values()) - mut)
+    return {"host_us": spread(host), "alloc_bytes": spread(allocs), "mutations": spread(writes)}
+
+
+def bench(name, fn):
+    # A scenario call that times something in code.py's globals; its writes stay out of the counts
+    def call(ns):
+        kept = Counter(R.mut)
+        try: R.bench[name] = fn(ns)
+        finally: R.mut = kept
+    return call
+
+
+def action(handler):
+    # A handler by the function that made it and the constants it closed over: go('timer'),
+    # settings_step(0, True); the [X] region register_page adds reads as back()
+    base = handler.__qualname__.split(".<locals>")[0]
+    cells = [c.cell_contents for c in handler.__closure__ or () if isinstance(c.cell_contents, (str, int, float))]
+    return "{}({})".format("back" if base == "register_page" else base, ", ".join(repr(c) for c in cells))
+
+
+def trace_touches(ns):
+    # Wraps every registered handler so the report can say which region and action each touch hit
+    wrapped = {}
+
+    def traced(page, region):
+        x0, y0, x1, y1, handler = region
+        def call(tx, ty):
+            result = handler(tx, ty)
+            R.routed.append((R.vt // 1000000, page, [x0, y0, x1, y1], action(handler), ns["current_page"]))
+            return result
+        return (x0, y0, x1, y1, call)
+
+    for page, buckets in ns["touch_maps"].items():
+        for bucket in buckets:
+            bucket[:] = [wrapped.setdefault(id(r), traced(page, r)) for r in bucket]
+
+
+def expect_routes(expected):
+    # A check: each touch fires the expected (page, action, page after), in order
+    def check(run_, namespace):
+        got = [(page, act, after) for _, page, _, act, after in run_.routed]
+        failures = ["touch {}: expected {} on {} -> {}, got {}".format(i + 1, e[1], e[0], e[2],
+                    "{} on {} -> {}".format(g[1], g[0], g[2]) if g else "nothing")
+                    for i, (e, g) in enumerate(zip(expected, got + [None] * len(expected))) if tuple(e) != g]
+        if len(got) > len(expected): failures.append("{} touches routed, {} expected".format(len(got), len(expected)))
+        return failures
+    return check
+
+
+def timer_drift(source):
+    # An hour of stopwatch and a one-hour countdown on the timer page, every sleep overrunning by
+    # up to 8 ms: the shown seconds must turn over within 10 ms of the true edge all hour, never a
+    # second out, and the countdown must end within 10 ms of its deadline
+    state = {"shown": None, "lag": [], "wrong": [], "deadline": None, "ended": None}
+
+    def start(ns):
+        R.jitter = 8 * NS // 1000
+        ns["timer_direction"] = 1; ns["sw_start"](); ns["cd_set"]("hour", 3600); ns["cd_start"]("hour")
+        state["deadline"] = ns["countdowns"]["hour"]["deadline"]
+        ns["wake_task"](ns["timer_task"]); R.watch.append(watch)
+
+    def watch(ns):
+        if state["ended"] is None and ns["countdowns"]["hour"]["deadline"] is None: state["ended"] = R.vt
+        grid, t0 = ns["t_s_field"], ns["stopwatch"]["start"]
+        if ns["current_page"] != "timer" or grid is None or t0 is None: return
+        caps = 1 if grid.width == 4 else 0
+        shown = grid[caps] % 10 * 10 + grid[caps + 1] % 10
+        if shown == state["shown"]: return
+        state["shown"], k = shown, (R.vt - t0) // NS
+        if shown != k % 60: state["wrong"].append((R.vt // 1000000, shown, k % 60))
+        else: state["lag"].append(round((R.vt - t0 - k * NS) / 1e6, 3))
+
+    def check(run_, namespace):
+        failures = ["{} ms: {:02d} shown, {:02d} true".format(*w) for w in state["wrong"][:5]]
+        late = None if state["ended"] is None else round((state["ended"] - state["deadline"]) / 1e6, 3)
+        run_.bench["drift"] = {"edges": len(state["lag"]), "lag_ms": spread(state["lag"]), "countdown_late_ms": late}
+        if len(state["lag"]) < 3600: failures.append("{} second edges seen, 3600 expected".format(len(state["lag"])))
+        if state["lag"] and max(state["lag"]) >= 10: failures.append("a second edge shown {} ms late".format(max(state["lag"])))
+        if late is None or not 0 <= late < 10: failures.append("countdown ended {} ms after its deadline".format(late))
+        return failures
+
+    return 3606, [tap(2, 120, 90)], None, [(3, start)], check
+
+
+def i2c_bus(source):
+    # The bus manager against a mock device at 0x50 whose registers read back their own address;
+    # a read within its TTL must stay off the bus
+    results = ["the test never ran"]
+
+    def test(ns):
+        del results[:]
+        addr, regs = 0x50, R.i2c_regs.setdefault(0x50, bytearray(range(256)))
+        d = ns["i2c_device"]("sensor", addr)
+        shadow = d["regs"]
+
+        def expect(what, ok):
+            if not ok: results.append(what)
+
+        def bursts(fn):
+            before = R.i2c.get("0x50", {}).get("transactions", 0); fn()
+            return R.i2c["0x50"]["transactions"] - before
+
+        def adjacent():
+            for reg, n in ((0x12, 2), (0x10, 2), (0x20, 1)): ns["i2c_request"]("sensor", addr, reg, n)
+            expect("flush reported a failure", ns["i2c_flush"]())
+        expect("touching reads 0x10-0x13 and 0x20 took other than 2 bursts", bursts(adjacent) == 2)
+        expect("shadow 0x10-0x13, 0x20 differs from the device", bytes(shadow[0x10:0x14]) == bytes(range(0x10, 0x14)) and shadow[0x20] == 0x20)
+        def overlap():
+            ns["i2c_request"]("sensor", addr, 0x30, 4); ns["i2c_request"]("sensor", addr, 0x31, 1); ns["i2c_flush"]()
+        expect("overlapping reads took other than 1 burst", bursts(overlap) == 1)
+        expect("the device count is not 3 after 3 bursts", d["count"] == 3)
+        expect("a write did not reach the device", ns["i2c_write"]("sensor", addr, 0x40, 0xAA) and regs[0x40] == 0xAA)
+        expect("a read after a write differs", ns["i2c_read"]("sensor", addr, 0x40)[0] == 0xAA)
+        ttl = ns["I2C_PASS_TTL"]
+        expect("a read within its TTL went to the bus", bursts(lambda: ns["i2c_read"]("sensor", addr, 0x40, 1, ttl)) == 0)
+        expect("a read without a TTL came from the shadow", bursts(lambda: ns["i2c_read"]("sensor", addr, 0x40)) == 1)
+        R.vt += (ttl + 1) * 1000000
+        expect("a read past its TTL came from the shadow", bursts(lambda: ns["i2c_read"]("sensor", addr, 0x40, 1, ttl)) == 1)
+        expect("a TTL read of a register never read came from the shadow", bursts(lambda: ns["i2c_read"]("sensor", addr, 0x41, 1, ttl)) == 1)
+        buf = bytearray(4)
+        expect("a streamed read differs", ns["i2c_read_into"]("sensor", addr, 0x60, buf, 4) and bytes(buf) == bytes(range(0x60, 0x64)))
+        expect("a streamed read went through the shadow", shadow[0x60] == 0)
+        count, regs[0x10] = d["count"], 0xEE
+        R.i2c_fail.add(addr)
+        ns["i2c_request"]("sensor", addr, 0x10, 1)
+        expect("a NAK was not reported", not ns["i2c_flush"]())
+        expect("a NAK overwrote the shadow", shadow[0x10] == 0x10)
+        expect("a NAK was counted as a transaction", d["count"] == count)
+        expect("a pending read outlived its flush", not d["pending"])
+        R.i2c_fail.discard(addr)
+        expect("a read after the device came back is stale", ns["i2c_read"]("sensor", addr, 0x10)[0] == 0xEE)
+
+    return 3, [], None, [(2, test)], lambda run_, namespace: results
+
+
+def outline_stack(ns, text, x, y, scale):
+    # The clock's outlined digits before the sprite sheet: eight ring and eight shadow copies of
+    # the label under the text, 17 Labels a field
+    group, layers = ns["displayio"].Group(), []
+    for dist, color in ((12, ns["DARK_GREEN"]), (8, 0x000000), (0, ns["current_text_color"])):
+        for ox, oy in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, 1), (-1, 1), (1, -1)) if dist else ((0, 0),):
+            layer = ns["label"].Label(ns["custom_font"], text=text, color=color, scale=scale)
+            layer.anchor_point, layer.anchored_position = (0.5, 0.5), (x + ox * dist, y + oy * dist)
+            group.append(layer); layers.append(layer)
+    return group, layers
+
+
+def outline_fields(ns):
+    # One two-digit clock field both ways: build cost, a minute of ticks, and redraw area
+    out = {}
+    for way in ("labels", "tilegrid"):
+        mem, t0 = mem_alloc(), host_time.perf_counter_ns()
+        if way == "labels":
+            field, layers = outline_stack(ns, "00", 60, 88, 9)
+            update = lambda v: [setattr(layer, "text", "%02d" % v) for layer in layers]
+        else:
+            field = ns["create_outline_field"](ns["digit_sheet"], "00", 60, 88)
+            update = lambda v: ns["set_outline_digits"](field, v)
+        out[way] = {"build_us": (host_time.perf_counter_ns() - t0) // 1000, "build_bytes": mem_alloc() - mem,
+                    "tick": measure(update, range(1, 61)), "area_px": area(field)}
+    return out
+
+
+def outline(source):
+    # The clock field benchmark, with the sheet code.py already built at boot
+    return 4, [], None, [(2, bench("outline", outline_fields))]
+
+
+BENCH_PAGES = 40
+
+
+def tree_walk(node):
+    # What displayio goes over to find dirty areas each refresh: every node under the root,
+    # hidden ones included, and the area of the ones shown
+    if isinstance(node, Group):
+        nodes, px = 1, 0
+        for item in node:
+            n, a = tree_walk(item); nodes += n; px += 0 if node.hidden else a * node.scale * node.scale
+        return nodes, px
+    return 1, 0 if node.hidden else node.width * node.tile_width * node.height * node.tile_height
+
+
+def page_switching(ns):
+    # BENCH_PAGES more pages of 12 labels each on top of code.py's own: switch cost cold (built on
+    # entry) and warm, and the dirty-area walk with only the active page attached against all of
+    # them attached and hidden, as before the navigation stack
+    names = ["bench%d" % i for i in range(BENCH_PAGES)]
+
+    def build():
+        group = ns["displayio"].Group()
+        for row in range(12): group.append(ns["label"].Label(ns["custom_font"], text="ROW %d" % row, x=20, y=20 + row * 16))
+        return group
+
+    for name in names: ns["register_page"](name, build, back="clock")
+    out = {"pages": len(ns["pages"]), "cold": measure(lambda i: ns["replace_page"](names[i]), range(BENCH_PAGES)),
+           "warm": measure(lambda i: ns["replace_page"](names[i % BENCH_PAGES]), range(3 * BENCH_PAGES))}
+    root, pages_group = ns["display"].root_group, ns["pages_group"]
+    for layout in ("stack", "all_attached"):
+        hidden = [p["group"] for n, p in ns["pages"].items() if p["group"] is not None and n != ns["current_page"]] if layout == "all_attached" else []
+        for group in hidden: group.hidden = True; pages_group.append(group)
+        t0 = host_time.perf_counter_ns()
+        for _ in range(10): nodes, px = tree_walk(root)
+        out[layout] = {"nodes": nodes, "area_px": px, "walk_us": (host_time.perf_counter_ns() - t0) // 10000}
+        for group in hidden: pages_group.remove(group); group.hidden = False
+    ns["replace_page"]("clock")
+    return out
+
+
+def pages(source):
+    # The navigation stack with many pages registered
+    return 4, [], None, [(2, bench("pages", page_switching))]
+
+
+def font_costs(ns):
+    # Each font file code.py can boot with: host time, heap and glyphs for the UI range
+    out = {}
+    for path in ns["FONT_PATHS"]:
+        t0 = host_time.perf_counter_ns()
+        font, _, used = ns["load_font_timed"](path)
+        out[os.path.splitext(path)[1][1:]] = {"host_us": (host_time.perf_counter_ns() - t0) // 1000, "bytes": used,
+                                             "glyphs": sum(font.get_glyph(c) is not None for c in range(32, 127))}
+    return out
+
+
+def fonts(source):
+    # Loading the compiled subset against the BDF it was made from
+    return 3, [], None, [(2, bench("fonts", font_costs))]
+
+
+def walk_trace(seed=1):
+    # Rest, 2 minutes at 1.8 steps/s, three single arm lifts, a minute at 2.2 steps/s, rest.
+    # Each step is a vertical bounce with the arm swinging at half the step rate.
+    rng, samples, steps = random.Random(seed), [], 0
+
+    def noise():
+        return rng.gauss(0, 25)
+
+    def still(secs):
+        samples.extend((noise(), 80 + noise(), 1000 + noise()) for _ in range(int(secs * LIS3DH_HZ)))
+
+    still(20)
+    for rate, secs in ((1.8, 120), (None, 0), (2.2, 60)):
+        if rate is None:
+            for _ in range(3):
+                samples.extend((700 * math.sin(math.pi * i / 10) + noise(), 80 + noise(), 1000 - 300 * math.sin(math.pi * i / 10) + noise())
+                               for i in range(10))
+                still(3)
+            continue
+        for i in range(int(secs * LIS3DH_HZ)):
+            t = i / LIS3DH_HZ
+            samples.append((150 * math.sin(math.pi * rate * t) + noise(), 80 + noise(),
+                            1000 + 350 * math.sin(2 * math.pi * rate * t) + noise()))
+        steps += int(rate * secs)
+        still(5)
+    still(15)
+    return {"samples": samples, "steps": steps}
+
+
+def walk(source):
+    accel = walk_trace()
+    return len(accel["samples"]) / LIS3DH_HZ + 5, [], accel
+
+
+def lift_trace(seed=2):
+    # Arm hanging (gravity along the forearm, -x) with walks, wrist raises to face up held for a
+    # read, and things that should not wake: quick flicks through face up, reaching up, and a rest
+    # of the forearm on a desk, which 6D alone cannot tell from a raise
+    rng, samples, raises = random.Random(seed), [], []
+    hang, up, desk, reach = (-950, 0, 150), (-80, 0, 990), (-250, 0, 960), (900, 0, 150)
+
+    def noise():
+        return rng.gauss(0, 25)
+
+    def hold(pos, secs):
+        samples.extend(tuple(v + noise() for v in pos) for _ in range(int(secs * LIS3DH_HZ)))
+
+    def move(a, b, secs):
+        n = int(secs * LIS3DH_HZ)
+        samples.extend(tuple(p + (q - p) * (i + 1) / n + noise() for p, q in zip(a, b)) for i in range(n))
+
+    def walking(secs, rate=1.9):
+        for i in range(int(secs * LIS3DH_HZ)):
+            t = i / LIS3DH_HZ
+            samples.append((hang[0] + 150 * math.sin(math.pi * rate * t) + noise(), noise(),
+                            hang[2] + 300 * math.sin(2 * math.pi * rate * t) + noise()))
+
+    def glance(secs=4):
+        raises.append(len(samples) / LIS3DH_HZ); move(hang, up, 0.6); hold(up, secs); move(up, hang, 0.6)
+
+    hold(hang, 20)
+    for _ in range(3):
+        walking(30); glance(); hold(hang, 10)
+    for _ in range(4):
+        move(hang, up, 0.1); move(up, hang, 0.1); hold(hang, 8)  # flick through face up
+    move(hang, reach, 0.8); hold(reach, 2); move(reach, hang, 0.8); hold(hang, 10)
+    for _ in range(3):
+        glance(2); hold(hang, 10)
+    move(hang, desk, 1); hold(desk, 30); move(desk, hang, 1); hold(hang, 10)
+    return {"samples": samples, "steps": None, "raises": raises}
+
+
+def raise_wakes(run_):
+    # (wakes no raise explains, raises with no wake); a wake this soon after a raise starts is its own
+    raises, window = [int(t * NS) for t in run_.accel["raises"]], 3 * NS
+    return (sum(not any(r <= w < r + window for r in raises) for w in run_.lifts),
+            sum(not any(r <= w < r + window for w in run_.lifts) for r in raises))
+
+
+def lift(source):
+    # Fails if a raise does not wake the screen, whether it is dark or showing the screensaver
+    accel = lift_trace()
+    check = lambda run_, ns: ["{} raises did not wake the screen".format(raise_wakes(run_)[1])] if raise_wakes(run_)[1] else []
+    return len(accel["samples"]) / LIS3DH_HZ + 5, [], accel, (), check
+
+
+def read_accel(path):
+    samples, steps, raises = [], None, []
+    for line in open(path):
+        line = line.strip()
+        if line.startswith("#"):
+            words = line[1:].split()
+            if words[:1] == ["steps"]: steps = int(words[-1])
+            if words[:1] == ["raise"]: raises.append(float(words[-1]))
+        elif line: samples.append(tuple(float(v) for v in line.split(",")[:3]))
+    return {"samples": samples, "steps": steps, "raises": raises or None}
+
+
+SCENARIOS = {"clock_hour": clock_hour, "dark_hour": dark_hour, "cycle_colours": cycle_colours,
+             "calendar_24": calendar_24, "tour": tour, "walk": walk, "lift": lift, "log_day": log_day, "snake": snake, "snake_evict": snake_evict,
+             "matrix": matrix, "saver_cover": saver_cover, "outline": outline, "pages": pages, "fonts": fonts, "timer_drift": timer_drift,
+             "i2c_bus": i2c_bus}
+
+
+# Running and reporting
+
+def run(source, seconds, trace, readonly=False, render_frames=False, alloc=True, accel=None, card=True, sd_out=None, calls=()):
+    # calls: (t, fn) pairs; fn gets code.py's globals once virtual time reaches t
+    global R
+    root = tempfile.mkdtemp(prefix="twatch-sim-")
+    R = Run(seconds, trace, root, readonly, render_frames, alloc, accel, card, calls)
+    real_import, mods = builtins.__import__, stand_ins()
+
+    def sim_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if name in mods: return mods[name] if fromlist else mods[name.split(".")[0]]
+        return real_import(name, globals, locals, fromlist, level)
+
+    sim_builtins = dict(builtins.__dict__, __import__=sim_import, open=sim_open,
+                        print=lambda *a, sep=" ", end="\n": R.console.append(sep.join(str(x) for x in a)))
+    namespace, error = {"__name__": "__main__", "__builtins__": sim_builtins}, None
+    R.namespace = namespace
+    if alloc: tracemalloc.start()
+    started = host_time.perf_counter()
+    R.start_pass()
+    try: exec(compile(open(source).read(), source, "exec"), namespace)
+    except Stop: pass
+    except Exception as e:
+        import traceback
+        error = "".join(traceback.format_exception_only(type(e), e)).strip()
+        tb = [f for f in traceback.extract_tb(e.__traceback__) if f.filename == source]
+        if tb: error += " (code.py:{})".format(tb[-1].lineno)
+    finally:
+        if alloc: tracemalloc.stop()
+        if sd_out and R.sd: shutil.copytree(sim_path("/sd"), sd_out, dirs_exist_ok=True)
+        shutil.rmtree(root, ignore_errors=True)
+    wall = host_time.perf_counter() - started
+    return R, namespace, error, wall
+
+
+def spread(values):
+    if not values: return {"p50": 0, "p95": 0, "max": 0}
+    values = sorted(values)
+    return {"p50": values[len(values) // 2], "p95": values[min(len(values) - 1, len(values) * 95 // 100)], "max": values[-1]}
+
+
+def report(run_, namespace, error, wall, frames=False):
+    frames_ = [f for f in run_.frames if not f["boot"]]
+    out = {
+        "virtual_s": round(run_.vt / NS, 3), "host_s": round(wall, 2), "error": error,
+        "page": namespace.get("current_page"),
+        "boot": run_.boot,
+        "frames": {"count": len(frames_), "host_us": spread([f["host_us"] for f in frames_]),
+                   "alloc_bytes": dict(spread([f["alloc_bytes"] for f in frames_]), total=sum(f["alloc_bytes"] for f in frames_)),
+                   "mutations": dict(spread([f["mutations"] for f in frames_]), total=sum(f["mutations"] for f in frames_))},
+        "touch": {"count": len(run_.touches), "latency_ms": spread([t["latency_ms"] for t in run_.touches]),
+                  "host_us": spread([t["host_us"] for t in run_.touches])},
+        "counts": {"mutations": dict(sorted(run_.mut.items())), "i2c": run_.i2c, **dict(sorted(run_.counts.items()))},
+        "console": run_.console[:40],
+    }
+    if run_.render: out["frames"]["pixels"] = spread([f["pixels"] for f in frames_])
+    if run_.accel:
+        days = namespace.get("pedo_days") or []
+        counted, truth = sum(days[1::2]), run_.accel["steps"]
+        out["steps"] = {"counted": counted, "true": truth, "batches": len(run_.batches), "batch_host_us": spread(run_.batches),
+                        "error_pct": round(100 * (counted - truth) / truth, 1) if truth else None}
+        raises = run_.accel.get("raises")
+        false_wakes, missed = raise_wakes(run_) if raises else (None, None)
+        out["lift"] = {"wakes": len(run_.lifts), "latency_ms": spread([ms for ms, us in run_.lift_latency]),
+                       "host_us": spread([us for ms, us in run_.lift_latency]), "raises": len(raises) if raises else None,
+                       "false_wakes": false_wakes, "missed": missed}
+    long_ = [f for f in frames_ if f.get("snake_len", 0) >= namespace.get("SNAKE_CELLS", 0) - 16 and f["mutations"] < 8]
+    if long_:
+        # Moves with the snake near full length; the frames that lay it out again are left out
+        gaps = [b["t_ms"] - a["t_ms"] for a, b in zip(long_, long_[1:]) if b["t_ms"] - a["t_ms"] < 1000]
+        out["snake"] = {"frames": len(long_), "host_us": spread([f["host_us"] for f in long_]),
+                        "alloc_bytes": spread([f["alloc_bytes"] for f in long_]),
+                        "mutations": spread([f["mutations"] for f in long_]), "frame_gap_ms": spread(gaps)}
+    rain = [f for f in frames_ if f.get("rain")]
+    if rain:
+        # Screensaver ticks; the frame that builds or clears the screen is the one outlier
+        gaps = [b["t_ms"] - a["t_ms"] for a, b in zip(rain, rain[1:]) if b["t_ms"] - a["t_ms"] < 1000]
+        out["matrix"] = {"frames": len(rain), "host_us": spread([f["host_us"] for f in rain]),
+                         "alloc_bytes": spread([f["alloc_bytes"] for f in rain]),
+                         "mutations": spread([f["mutations"] for f in rain]), "frame_gap_ms": spread(gaps),
+                         "fps": round(1000 * len(gaps) / sum(gaps), 1) if gaps else 0}
+    if run_.bench: out["bench"] = run_.bench
+    if run_.routed: out["routed"] = run_.routed
+    if frames: out["frame_log"] = run_.frames
+    return out
+
+
+def flatten(counts, prefix=""):
+    for key, value in counts.items():
+        if isinstance(value, dict): yield from flatten(value, prefix + key + ".")
+        else: yield prefix + key, value
+
+
+def compare(new, old, tolerance):
+    # Deterministic counts only: more widget writes, bus traffic, refreshes or file writes is a regression
+    regressions = []
+    for name, scenario in new["scenarios"].items():
+        base = old.get("scenarios", {}).get(name)
+        if not base: continue
+        was = dict(flatten(base["counts"]))
+        for key, value in flatten(scenario["counts"]):
+            if key in was and value > was[key] * (1 + tolerance) + 1:
+                regressions.append("{}: {} {} -> {}".format(name, key, was[key], value))
+        if scenario["error"] and not base["error"]: regressions.append("{}: {}".format(name, scenario["error"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--source", default="code.py", help="the program to run")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run (default: all)")
+    parser.add_argument("--trace", help="JSON touch trace [[t, x, y, duration], ...] to replay instead of a scenario")
+    parser.add_argument("--expect", help="JSON [[page, action, page after], ...], one per touch --trace should fire")
+    parser.add_argument("--seconds", type=float, default=60, help="virtual run time for --trace")
+    parser.add_argument("--accel", help="CSV acceleration trace (x,y,z mg at 10 Hz) to walk with instead of a scenario")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier report; exit 1 if a count grew past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--frames", action="store_true", help="include every frame in the report")
+    parser.add_argument("--render", action="store_true", help="draw every frame and count changed pixels (slow)")
+    parser.add_argument("--ppm", help="directory to write each scenario's last frame to, as <scenario>.ppm")
+    parser.add_argument("--readonly", action="store_true", help="make the filesystem read-only, as without boot.py")
+    parser.add_argument("--no-alloc", action="store_true", help="skip tracemalloc, which slows runs down")
+    parser.add_argument("--no-sd", action="store_true", help="run without an SD card")
+    parser.add_argument("--sd", help="directory to copy each scenario's SD card to, as <scenario>/")
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.source)
+    if args.trace:
+        expect = expect_routes(json.load(open(args.expect))) if args.expect else None
+        jobs = {os.path.basename(args.trace): (args.seconds, json.load(open(args.trace)), None, [(0, trace_touches)], expect)}
+    elif args.accel:
+        accel = read_accel(args.accel)
+        jobs = {os.path.basename(args.accel): (len(accel["samples"]) / LIS3DH_HZ + 5, [], accel)}
+    else: jobs = {name: SCENARIOS[name](source) for name in args.scenario or SCENARIOS}
+    result = {"source": args.source, "sha1": hashlib.sha1(open(source, "rb").read()).hexdigest(),
+              "python": platform.python_version(), "scenarios": {}}
+    for name, job in jobs.items():
+        seconds, trace, accel, calls, check = list(job) + [None, (), None][len(job) - 2:]
+        run_, namespace, error, wall = run(source, seconds, trace, args.readonly, args.render, not args.no_alloc, accel,
+                                           not args.no_sd, args.sd and os.path.join(args.sd, name), calls)
+        fb = render(run_.display)
+        checks = check(run_, namespace) if check else None  # before the report, since a check may add to run_.bench
+        missing = ["{} has no glyph for {!r}, drawn {} times".format(font, c, n) for (font, c), n in sorted(run_.missing.items())]
+        missing += ["label {!r} set .color through a shared theme palette".format(text) for text in run_.shared_color]
+        if missing: checks = (checks or []) + missing
+        result["scenarios"][name] = dict(report(run_, namespace, error, wall, args.frames), frame_crc32=zlib.crc32(fb))
+        if checks is not None: result["scenarios"][name]["checks"] = checks
+        if args.ppm:
+            os.makedirs(args.ppm, exist_ok=True); write_ppm(os.path.join(args.ppm, name + ".ppm"), fb)
+        s = result["scenarios"][name]
+        print("{}: {} frames, p95 {} us, {} widget writes, {} I2C, {:.1f} s{}".format(
+            name, s["frames"]["count"], s["frames"]["host_us"]["p95"], s["frames"]["mutations"]["total"],
+            sum(e["transactions"] for e in run_.i2c.values()), wall, ", " + error if error else ""), file=sys.stderr)
+        if "steps" in s and s["steps"]["true"]: print("{}: {counted} steps counted, {true} true, p95 {p95} us a batch".format(
+            name, p95=s["steps"]["batch_host_us"]["p95"], **s["steps"]), file=sys.stderr)
+        if "snake" in s: print("{}: {frames} moves near full length, p95 {us} us, {alloc} bytes allocated, frames every {gap} ms".format(
+            name, us=s["snake"]["host_us"]["p95"], alloc=s["snake"]["alloc_bytes"]["p95"], gap=s["snake"]["frame_gap_ms"]["p50"], **s["snake"]), file=sys.stderr)
+        if "matrix" in s: print("{}: {frames} screensaver frames at {fps} fps, p95 {us} us, {alloc} bytes allocated, {writes} writes".format(
+            name, us=s["matrix"]["host_us"]["p95"], alloc=s["matrix"]["alloc_bytes"]["p95"], writes=s["matrix"]["mutations"]["p50"], **s["matrix"]), file=sys.stderr)
+        for line in s.get("checks") or (): print("{}: check failed: {}".format(name, line), file=sys.stderr)
+        if "drift" in s.get("bench", {}): print("{}: {edges} second edges, lag p50 {p50} ms max {max} ms, countdown {countdown_late_ms} ms late".format(
+            name, **s["bench"]["drift"], **s["bench"]["drift"]["lag_ms"]), file=sys.stderr)
+        for way, b in s.get("bench", {}).get("outline", {}).items(): print("{}: {} field, {} px to composite, built in {} us / {} bytes, p95 {} us and {} writes a tick".format(
+            name, way, b["area_px"], b["build_us"], b["build_bytes"], b["tick"]["host_us"]["p95"], b["tick"]["mutations"]["p95"]), file=sys.stderr)
+        b = s.get("bench", {}).get("pages")
+        if b: print("{}: {} pages, switch p95 {} us cold / {} us warm, {} writes; dirty walk {} nodes in {} us, {} with all attached in {} us".format(
+            name, b["pages"], b["cold"]["host_us"]["p95"], b["warm"]["host_us"]["p95"], b["warm"]["mutations"]["p95"],
+            b["stack"]["nodes"], b["stack"]["walk_us"], b["all_attached"]["nodes"], b["all_attached"]["walk_us"]), file=sys.stderr)
+        for kind, b in s.get("bench", {}).get("fonts", {}).items(): print("{}: {} loads {} glyphs in {} us host, {} bytes".format(
+            name, kind, b["glyphs"], b["host_us"], b["bytes"]), file=sys.stderr)
+        if "lift" in s and s["lift"]["raises"]: print("{}: {wakes} lift wakes for {raises} raises, {false_wakes} false, {missed} missed, p95 {p95} ms + {us} us host to a lit frame".format(
+            name, p95=s["lift"]["latency_ms"]["p95"], us=s["lift"]["host_us"]["p95"], **s["lift"]), file=sys.stderr)
+
+    text = json.dumps(result, indent=1)
+    if args.out:
+        with open(args.out, "w") as f: f.write(text + "\n")
+    else: print(text)
+    failed = any(s["error"] or s.get("checks") for s in result["scenarios"].values())
+    if args.compare:
+        regressions = compare(result, json.load(open(args.compare)), args.tolerance)
+        for line in regressions: print("regression:", line, file=sys.stderr)
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    main()